@@ -12,9 +12,17 @@ from app.models import AppConfig
 _DEFAULT_CONFIG_PATH = "/app/config/config.json"
 _DEFAULT_WEB_PORT = 8080
 _DEFAULT_LOG_LEVEL = "INFO"
+# Floor of the automatically sized manifest cache.  An entry costs about
+# 5 KB for an image manifest (~8 layers) and well under 1 KB for a config
+# blob, so ~60k tags (manifest + config each) take roughly 300 MB.
+_DEFAULT_MANIFEST_CACHE_SIZE = 50000
+_DEFAULT_CLEANUP_CONCURRENCY = 8
+_DEFAULT_SOURCE_TIMEOUT = 60.0
+_DEFAULT_PLAN_TTL = 900.0
 
 _lock = threading.Lock()
 _config: AppConfig | None = None
+_version = 0  # bumped on every load/save, see get_config_version()
 
 
 def get_config_path() -> Path:
@@ -32,11 +40,59 @@ def get_log_level() -> str:
     return os.environ.get("DIM_LOG_LEVEL", _DEFAULT_LOG_LEVEL)
 
 
+def get_manifest_cache_size() -> int:
+    """Manifest cache entries: the fixed size, or the floor when auto-sized."""
+    try:
+        return int(os.environ.get("DIM_MANIFEST_CACHE_SIZE", str(_DEFAULT_MANIFEST_CACHE_SIZE)))
+    except ValueError:
+        return _DEFAULT_MANIFEST_CACHE_SIZE
+
+
+def get_manifest_cache_auto_size() -> bool:
+    """Whether the manifest cache grows with the inventory (no fixed size set)."""
+    try:
+        int(os.environ["DIM_MANIFEST_CACHE_SIZE"])
+    except (KeyError, ValueError):
+        return True
+    return False
+
+
+def get_manifest_cache_dir() -> Path | None:
+    """Directory evicted manifests spill to, or ``None`` for memory only."""
+    value = os.environ.get("DIM_MANIFEST_CACHE_DIR", "")
+    return Path(value) if value else None
+
+
+def get_cleanup_concurrency() -> int:
+    """Upper bound on deletions in flight across all sources."""
+    try:
+        return int(os.environ.get("DIM_CLEANUP_CONCURRENCY", str(_DEFAULT_CLEANUP_CONCURRENCY)))
+    except ValueError:
+        return _DEFAULT_CLEANUP_CONCURRENCY
+
+
+def get_source_timeout() -> float:
+    """Default seconds a single source may take to answer an image listing."""
+    try:
+        return float(os.environ.get("DIM_SOURCE_TIMEOUT", str(_DEFAULT_SOURCE_TIMEOUT)))
+    except ValueError:
+        return _DEFAULT_SOURCE_TIMEOUT
+
+
+def get_plan_ttl() -> float:
+    """Seconds a cleanup preview stays executable by its plan ID."""
+    try:
+        return float(os.environ.get("DIM_PLAN_TTL", str(_DEFAULT_PLAN_TTL)))
+    except ValueError:
+        return _DEFAULT_PLAN_TTL
+
+
 def load_config() -> AppConfig:
     """Load config from JSON file.  Creates default if missing."""
-    global _config
+    global _config, _version
     path = get_config_path()
     with _lock:
+        _version += 1
         if path.exists():
             try:
                 data = json.loads(path.read_text(encoding="utf-8"))
@@ -51,7 +107,7 @@ def load_config() -> AppConfig:
 
 def save_config(cfg: AppConfig) -> None:
     """Persist config to JSON file."""
-    global _config
+    global _config, _version
     path = get_config_path()
     with _lock:
         path.parent.mkdir(parents=True, exist_ok=True)
@@ -60,6 +116,16 @@ def save_config(cfg: AppConfig) -> None:
             encoding="utf-8",
         )
         _config = cfg
+        _version += 1
+
+
+def get_config_version() -> int:
+    """Counter that changes whenever the in-memory config may have changed.
+
+    Routers mutate the config object in place and then call
+    :func:`save_config`, so every change is followed by a bump.
+    """
+    return _version
 
 
 def get_current_config() -> AppConfig:
@@ -13,7 +13,11 @@ from fastapi.staticfiles import StaticFiles
 
 from app.config import load_config, get_web_port
 from app.routers import sources, images, policies, cleanup, auth
+from app.services import engine_watch, http_clients
+from app.services.cleanup_jobs import get_cleanup_jobs
+from app.services.inventory import get_inventory, run_inventory_refresher
 from app.services.scheduler import run_scheduler
+from app.utils import aio
 from app.utils.logger import setup_logging, get_logger
 from fastapi import Request
 from fastapi.responses import FileResponse, JSONResponse
@@ -29,10 +33,18 @@ async def lifespan(app: FastAPI):
     
     # Start the automatic cleanup scheduler
     scheduler_task = asyncio.create_task(run_scheduler())
+    # Keep per-source inventory snapshots warm for the image/cleanup APIs
+    inventory_task = asyncio.create_task(run_inventory_refresher())
     
     yield
     
     scheduler_task.cancel()
+    inventory_task.cancel()
+    get_inventory().shutdown()
+    engine_watch.stop_all()
+    get_cleanup_jobs().shutdown()
+    await asyncio.to_thread(http_clients.close_all)
+    aio.shutdown()
     log.info("Docker Image Manager shutting down")
 
 
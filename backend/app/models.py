@@ -24,6 +24,9 @@ class DockerEngineConnection(BaseModel):
     socket_path: str = "/var/run/docker.sock"
     host: Optional[str] = None  # e.g. tcp://192.168.1.100:2375
     tls: bool = False
+    watch_events: bool = False  # keep the inventory current from /events
+    prune_dangling: bool = False  # prune dangling images after a cleanup
+    prune_build_cache: bool = False  # prune build cache after a cleanup
 
 
 class RegistryConnection(BaseModel):
@@ -31,6 +34,8 @@ class RegistryConnection(BaseModel):
     username: str = ""
     password: str = ""
     insecure: bool = False  # allow HTTP
+    max_concurrency: int = 16  # parallel requests while listing
+    fetch_created: bool = True  # read tag creation time from config blobs
 
 
 class ArtifactoryConnection(BaseModel):
@@ -38,7 +43,9 @@ class ArtifactoryConnection(BaseModel):
     username: str = ""
     password: str = ""
     api_key: str = ""
+    repository: str = ""  # repo key; derived from ".../api/docker/<key>" URLs
     use_registry_api: bool = False
+    use_aql: bool = False  # bulk inventory via AQL items.find
 
 
 # ---------------------------------------------------------------------------
@@ -61,6 +68,9 @@ class ImagePolicy(BaseModel):
     keep_tags: Optional[int] = None  # None → use default
     exclude_from_cleanup: bool = False
     protected_tags: list[str] = Field(default_factory=list)
+    keep_semver: Optional[int] = None  # also keep the N highest versions
+    keep_per_major: Optional[int] = None  # also keep the N highest of each major version
+    delete_older_than: Optional[str] = None  # delete tags older than e.g. "30d"
 
 
 # ---------------------------------------------------------------------------
@@ -105,6 +115,7 @@ class AppConfig(BaseModel):
     default_keep_tags: int = 5
     auto_cleanup_schedule: str = "disabled"
     last_cleanup_run: float = 0.0
+    inventory_refresh_interval: int = 300  # seconds; 0 disables background refresh
     auth: AuthConfig = Field(default_factory=AuthConfig)
     sources: list[Source] = Field(default_factory=list)
     image_policies: dict[str, ImagePolicy] = Field(default_factory=dict)
@@ -140,6 +151,7 @@ class CleanupPreviewItem(BaseModel):
     tags_to_delete: list[str]
     tags_to_keep: list[str]
     reason_kept: dict[str, str] = Field(default_factory=dict)  # tag → reason
+    digests: dict[str, str] = Field(default_factory=dict)  # tag → digest (tags_to_delete)
     freed_bytes: int = 0
 
 
@@ -148,6 +160,7 @@ class CleanupResult(BaseModel):
     total_failed: int = 0
     total_freed_bytes: int = 0
     details: list[CleanupResultDetail] = Field(default_factory=list)
+    source_errors: dict[str, str] = Field(default_factory=dict)  # sources skipped, by ID
 
 
 class CleanupResultDetail(BaseModel):
@@ -158,6 +171,30 @@ class CleanupResultDetail(BaseModel):
     error: Optional[str] = None
 
 
+class CleanupJobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class CleanupJobInfo(BaseModel):
+    id: str
+    state: CleanupJobState
+    source_ids: Optional[list[str]] = None
+    plan_id: Optional[str] = None  # reviewed preview being executed, if any
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    total_planned: int = 0  # tags to delete, known once planning is done
+    total_deleted: int = 0
+    total_failed: int = 0
+    total_freed_bytes: int = 0
+    error: Optional[str] = None
+    source_errors: dict[str, str] = Field(default_factory=dict)  # sources skipped, by ID
+
+
 # ---------------------------------------------------------------------------
 # Request bodies
 # ---------------------------------------------------------------------------
@@ -179,6 +216,9 @@ class PolicyUpdate(BaseModel):
     keep_tags: Optional[int] = None
     exclude_from_cleanup: Optional[bool] = None
     protected_tags: Optional[list[str]] = None
+    keep_semver: Optional[int] = None  # 0 clears
+    keep_per_major: Optional[int] = None  # 0 clears
+    delete_older_than: Optional[str] = None  # "" clears
 
 
 class DefaultPolicyUpdate(BaseModel):
@@ -2,12 +2,22 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.services.cleanup import build_cleanup_preview, execute_cleanup
+from app.config import get_current_config
+from app.models import CleanupJobInfo
+from app.services.cleanup import build_cleanup_plan
+from app.services.cleanup_plans import get_plan_store
+from app.services.cleanup_jobs import DETAIL_CHUNK_SIZE, FINISHED_STATES, CleanupJob, get_cleanup_jobs
+from app.services.inventory import get_inventory, snapshot_headers
 from app.utils.security import get_current_user
 
 router = APIRouter(prefix="/api/cleanup", tags=["cleanup"], dependencies=[Depends(get_current_user)])
@@ -15,15 +25,120 @@ router = APIRouter(prefix="/api/cleanup", tags=["cleanup"], dependencies=[Depend
 
 class CleanupRequest(BaseModel):
     source_ids: Optional[list[str]] = None  # None = all sources
+    plan_id: Optional[str] = None  # execute this reviewed preview (X-Cleanup-Plan)
 
 
 @router.post("/preview")
-def preview(body: CleanupRequest):
-    """Dry-run: show what would be deleted."""
-    return build_cleanup_preview(body.source_ids)
+def preview(body: CleanupRequest, response: Response, refresh: bool = False):
+    """Dry-run: show what would be deleted (from the inventory snapshots).
 
+    The plan is kept for execution under the ``X-Cleanup-Plan`` ID until
+    ``X-Cleanup-Plan-Expires``.
+    """
+    stored = get_plan_store().put(build_cleanup_plan(body.source_ids, refresh))
+    store = get_inventory()
+    snapshots = [
+        snap
+        for s in get_current_config().sources
+        if (not body.source_ids or s.id in body.source_ids)
+        and (snap := store.peek(s.id)) is not None
+    ]
+    response.headers.update(snapshot_headers(snapshots))
+    response.headers["X-Cleanup-Plan"] = stored.id
+    response.headers["X-Cleanup-Plan-Expires"] = (
+        datetime.fromtimestamp(stored.expires_at, tz=timezone.utc).isoformat()
+    )
+    return stored.plan.previews
 
-@router.post("/execute")
+
+_EVENT_POLL = 0.5
+_EVENT_HEARTBEAT = 15.0
+
+
+def _get_job(job_id: str) -> CleanupJob:
+    job = get_cleanup_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(404, "Cleanup job not found")
+    return job
+
+
+@router.post("/execute", status_code=202, response_model=CleanupJobInfo)
 def execute(body: CleanupRequest):
-    """Execute cleanup (irreversible)."""
-    return execute_cleanup(body.source_ids)
+    """Start a cleanup job (irreversible); poll ``/jobs/{id}`` for progress.
+
+    With ``plan_id`` the reviewed preview is executed as shown; otherwise
+    every source is relisted and planned afresh.
+    """
+    plan = None
+    if body.plan_id:
+        plan = get_plan_store().take(body.plan_id)
+        if plan is None:
+            raise HTTPException(404, "Cleanup plan not found or expired; preview again")
+    return get_cleanup_jobs().submit(body.source_ids, plan, body.plan_id).info()
+
+
+@router.get("/jobs", response_model=list[CleanupJobInfo])
+def list_jobs():
+    """Recent cleanup jobs, newest first."""
+    return [job.info() for job in get_cleanup_jobs().list()]
+
+
+@router.get("/jobs/{job_id}", response_model=CleanupJobInfo)
+def get_job(job_id: str):
+    return _get_job(job_id).info()
+
+
+@router.get("/jobs/{job_id}/details")
+def get_job_details(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DETAIL_CHUNK_SIZE, ge=1, le=DETAIL_CHUNK_SIZE),
+):
+    """Per-tag results in completion order; page with ``next_offset``."""
+    job = _get_job(job_id)
+    finished = job.finished
+    items = job.details(offset, limit)
+    next_offset = offset + len(items)
+    if len(items) < limit and finished:
+        next_offset = None  # nothing more will ever arrive
+    return {"items": items, "next_offset": next_offset}
+
+
+async def _job_events(request: Request, job: CleanupJob) -> AsyncIterator[str]:
+    seen = -1
+    last_sent = time.monotonic()
+    while not await request.is_disconnected():
+        version = job.version
+        if version != seen:
+            seen = version
+            info = job.info()
+            event = "done" if info.state in FINISHED_STATES else "progress"
+            yield f"event: {event}\ndata: {json.dumps(info.model_dump(mode='json'))}\n\n"
+            last_sent = time.monotonic()
+            if event == "done":
+                return
+        elif time.monotonic() - last_sent >= _EVENT_HEARTBEAT:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(_EVENT_POLL)
+
+
+@router.get("/jobs/{job_id}/events")
+def job_events(job_id: str, request: Request):
+    """Server-sent ``progress`` events until a final ``done`` event."""
+    job = _get_job(job_id)
+    return StreamingResponse(
+        _job_events(request, job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=CleanupJobInfo)
+def cancel_job(job_id: str):
+    """Stop a queued or running job; deletions already in flight complete."""
+    job = _get_job(job_id)
+    if job.finished:
+        raise HTTPException(409, "Cleanup job already finished")
+    get_cleanup_jobs().cancel(job_id)
+    return job.info()
@@ -2,67 +2,290 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Literal
 
-from app.config import get_current_config
-from app.models import SourceType
-from app.services.docker_engine import DockerEngineService
-from app.services.private_registry import PrivateRegistryService
-from app.services.artifactory import ArtifactoryService
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.config import get_config_version, get_current_config, get_source_timeout
+from app.models import AppConfig, ImageInfo, Source, SourceType
+from app.services.cleanup import decide
+from app.services.factory import get_service, get_service_class
+from app.services.image_index import InvalidCursor, SortField, get_image_index, image_filter
+from app.services.inventory import Snapshot, get_inventory, snapshot_headers
+from app.services.policy_index import get_policy_index
+from app.utils.etag import is_fresh, make_etag, not_modified, set_validators
+from app.utils.logger import get_logger
 from app.utils.security import get_current_user
 
+log = get_logger(__name__)
+
 router = APIRouter(prefix="/api/images", tags=["images"], dependencies=[Depends(get_current_user)])
 
 
-def _get_service(source):
-    if source.type == SourceType.DOCKER_ENGINE:
-        return DockerEngineService(source.connection)
-    elif source.type == SourceType.PRIVATE_REGISTRY:
-        return PrivateRegistryService(source.connection)
-    elif source.type == SourceType.ARTIFACTORY:
-        return ArtifactoryService(source.connection)
-    return None
+def _mark_protected(images: list[ImageInfo], cfg: AppConfig) -> list[ImageInfo]:
+    # Snapshots and the engine watcher's cache share these objects (and the
+    # snapshot digest is computed from them), so mark copies.
+    policies = get_policy_index(cfg)
+    marked = []
+    for img in images:
+        protected = policies.protected(img.name)
+        tags = [t.model_copy(update={"is_protected": protected(t.tag)}) for t in img.tags]
+        marked.append(img.model_copy(update={"tags": tags}))
+    return marked
 
 
-@router.get("")
-def list_all_images():
-    """List images from all enabled sources."""
-    cfg = get_current_config()
-    all_images = []
-    for source in cfg.sources:
-        if not source.enabled:
-            continue
+def _source_timeout(source: Source) -> float:
+    return float(source.connection.get("list_timeout", get_source_timeout()))
+
+
+def _error_entry(source: Source, error: str, elapsed: float) -> dict[str, Any]:
+    return {
+        "name": f"[Error] {source.name}",
+        "tag_count": 0,
+        "tags": [],
+        "source_id": source.id,
+        "source_name": source.name,
+        "source_type": source.type,
+        "error": error,
+        "latency_ms": round(elapsed * 1000, 1),
+    }
+
+
+async def _timed_read(
+    source: Source, max_age: float, refresh: bool
+) -> tuple[Snapshot | None, str | None, float]:
+    """Read one source under its deadline → ``(snapshot, error, seconds)``."""
+    timeout = _source_timeout(source)
+    started = time.perf_counter()
+    try:
+        snapshot = await get_inventory().aread(source, max_age, refresh, timeout)
+        return snapshot, snapshot.error, time.perf_counter() - started
+    except asyncio.TimeoutError:
+        log.warning("Listing %s exceeded %gs, returning partial results", source.name, timeout)
+        return None, f"Timed out after {timeout:g}s", time.perf_counter() - started
+
+
+StreamFormat = Literal["ndjson", "sse"]
+
+_STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _encode(fmt: StreamFormat, event: str, payload: str) -> bytes:
+    if fmt == "sse":
+        return f"event: {event}\ndata: {payload}\n\n".encode()
+    return f"{payload}\n".encode()
+
+
+async def _stream_images(
+    sources: list[Source],
+    cfg: AppConfig,
+    refresh: bool,
+    fmt: StreamFormat,
+    predicate: Callable[[ImageInfo], bool] | None = None,
+) -> AsyncIterator[bytes]:
+    """Emit images from all *sources* as each one becomes available.
+
+    Every source is listed on its own worker thread through
+    :meth:`InventoryStore.stream`; a source that fails or misses its
+    deadline ends with an error entry, like the array response.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[tuple[str, ImageInfo | str | None]] = asyncio.Queue()
+    stops = {s.id: threading.Event() for s in sources}
+    store = get_inventory()
+
+    def produce(source: Source) -> None:
+        error = None
+        listing = store.stream(source, cfg.inventory_refresh_interval, refresh)
         try:
-            svc = _get_service(source)
-            if svc is None:
-                continue
-            images = svc.list_images(source.id, source.name)
-            
-            for img in images:
-                policy = cfg.image_policies.get(img.name)
-                if policy and policy.protected_tags:
-                    protected_set = set(policy.protected_tags)
-                    for t in img.tags:
-                        t.is_protected = t.tag in protected_set
-
-            all_images.extend(images)
+            for img in listing:
+                if stops[source.id].is_set():
+                    return
+                loop.call_soon_threadsafe(events.put_nowait, (source.id, img))
         except Exception as exc:
+            error = str(exc)
+        finally:
+            listing.close()
+        loop.call_soon_threadsafe(events.put_nowait, (source.id, error))
+
+    started = loop.time()
+    pending = {s.id: s for s in sources}
+    deadlines = {s.id: started + _source_timeout(s) for s in sources}
+    for source in sources:
+        loop.run_in_executor(None, produce, source)
+    try:
+        while pending:
+            wait = max(0.0, min(deadlines[sid] for sid in pending) - loop.time())
+            try:
+                sid, item = await asyncio.wait_for(events.get(), wait)
+            except asyncio.TimeoutError:
+                now = loop.time()
+                for sid in [sid for sid in pending if deadlines[sid] <= now]:
+                    source = pending.pop(sid)
+                    stops[sid].set()
+                    timeout = _source_timeout(source)
+                    log.warning("Streaming %s exceeded %gs, ending its listing early", source.name, timeout)
+                    entry = _error_entry(source, f"Timed out after {timeout:g}s", now - started)
+                    yield _encode(fmt, "error", json.dumps(entry))
+                continue
+            if sid not in pending:
+                continue  # source already timed out
+            if isinstance(item, ImageInfo):
+                if predicate is not None and not predicate(item):
+                    continue
+                (item,) = _mark_protected([item], cfg)
+                yield _encode(fmt, "image", item.model_dump_json())
+                continue
+            source = pending.pop(sid)
+            if item is not None:
+                entry = _error_entry(source, item, loop.time() - started)
+                yield _encode(fmt, "error", json.dumps(entry))
+        if fmt == "sse":
+            yield _encode(fmt, "end", "{}")
+    finally:
+        for stop in stops.values():
+            stop.set()
+
+
+def _streaming_response(
+    sources: list[Source],
+    cfg: AppConfig,
+    refresh: bool,
+    fmt: StreamFormat,
+    predicate: Callable[[ImageInfo], bool] | None = None,
+) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_images(sources, cfg, refresh, fmt, predicate),
+        media_type=_STREAM_MEDIA_TYPES[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _deletable_filter(cfg: AppConfig, deletable: bool) -> Callable[[ImageInfo], bool]:
+    """Match images whose policy would (or would not) delete any tag."""
+    seen: dict[int, bool] = {}  # the index scans rows twice per page
+
+    def check(img: ImageInfo) -> bool:
+        key = id(img)
+        if key not in seen:
+            decision = decide(img.source_id, img, cfg)
+            seen[key] = decision is not None and bool(decision.tags_to_delete)
+        return seen[key] == deletable
+
+    return check
+
+
+@router.get("")
+async def list_all_images(
+    request: Request,
+    response: Response,
+    refresh: bool = False,
+    stream: StreamFormat | None = None,
+    name: str | None = None,
+    source_id: list[str] | None = Query(None),
+    source_type: list[SourceType] | None = Query(None),
+    deletable: bool | None = None,
+    sort: SortField | None = None,
+    order: Literal["asc", "desc"] = "asc",
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+):
+    """List images from all enabled sources.
+
+    Served from the inventory snapshots (see :mod:`app.services.inventory`);
+    stale snapshots are revalidated in the background and ``refresh=true``
+    forces a relisting.  Sources without a usable snapshot are listed
+    concurrently, each with its own deadline (``list_timeout`` connection
+    option, default ``DIM_SOURCE_TIMEOUT``).  A source that fails or misses
+    its deadline contributes an error entry instead of holding up the
+    others; per-source latency is reported in the ``Server-Timing`` header.
+
+    ``stream=ndjson`` (one JSON object per line) or ``stream=sse``
+    (``image``/``error`` events, then ``end``) sends each image as soon as
+    it is available instead of one array at the end.
+
+    Filters: ``name`` (prefix, or glob when it contains ``*?[``),
+    ``source_id``/``source_type`` (repeatable) and ``deletable`` (whether
+    the retention policy would delete any tag).  ``sort`` orders by
+    ``name``, ``size``, ``tag_count`` or ``created`` (newest tag).  With
+    ``limit`` or ``cursor`` the response becomes one page,
+    ``{items, next_cursor, total, errors}``; pass ``next_cursor`` back with
+    the same sort to get the next page.
+
+    Responses carry a strong ``ETag`` derived from the content digests of
+    the snapshots read, the config version and the query; a matching
+    ``If-None-Match`` is answered with ``304`` before the body is built.
+    """
+    config_version = get_config_version()
+    cfg = get_current_config()
+    sources = [
+        s for s in cfg.sources
+        if s.enabled
+        and (not source_id or s.id in source_id)
+        and (not source_type or s.type in source_type)
+    ]
+    extra = _deletable_filter(cfg, deletable) if deletable is not None else None
+    predicate = image_filter(name, source_id, source_type, extra)
+    if stream is not None:
+        return _streaming_response(sources, cfg, refresh, stream, predicate)
+    max_age = cfg.inventory_refresh_interval
+    outcomes = await asyncio.gather(*(_timed_read(s, max_age, refresh) for s in sources))
+
+    errors = []
+    timings = []
+    snapshots = []
+    for idx, (source, (snapshot, error, elapsed)) in enumerate(zip(sources, outcomes)):
+        timings.append(f'src{idx};dur={elapsed * 1000:.1f};desc="{source.name}"')
+        if error is None:
+            snapshots.append(snapshot)
+        else:
             # Return error info instead of crashing the whole request
-            all_images.append({
-                "name": f"[Error] {source.name}",
-                "tag_count": 0,
-                "tags": [],
-                "source_id": source.id,
-                "source_name": source.name,
-                "source_type": source.type,
-                "error": str(exc),
-            })
-    return all_images
+            errors.append(_error_entry(source, error, elapsed))
+    if not errors:
+        # Error entries carry timings and are not worth revalidating
+        etag = make_etag(
+            "images", *(f"{s.source_id}:{s.digest}" for s in snapshots), config_version, request.url.query
+        )
+        if is_fresh(request, etag):
+            return not_modified(etag)
+        set_validators(response, etag)
+    response.headers["Server-Timing"] = ", ".join(timings)
+    response.headers.update(snapshot_headers(snapshots))
+
+    if limit is None and cursor is None:
+        if sort is None:
+            images = [img for snap in snapshots for img in snap.images if predicate(img)]
+        else:
+            page = await asyncio.to_thread(get_image_index(snapshots).query, predicate, sort, order)
+            images = page.items
+        return _mark_protected(images, cfg) + errors
+
+    index = get_image_index(snapshots)
+    try:
+        # Deletability depends on the policies, so the config version is part of the filter
+        filter_key = (
+            name, tuple(source_id or ()), tuple(source_type or ()), deletable,
+            config_version if deletable is not None else None,
+        )
+        page = await asyncio.to_thread(
+            index.query, predicate, sort or "name", order, limit, cursor, filter_key
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(400, str(exc))
+    items = _mark_protected(page.items, cfg)
+    return {"items": items, "next_cursor": page.next_cursor, "total": page.total, "errors": errors}
 
 
 @router.get("/by-source/{source_id}")
-def list_images_by_source(source_id: str):
-    """List images from a specific source."""
+async def list_images_by_source(
+    source_id: str, response: Response, refresh: bool = False, stream: StreamFormat | None = None
+):
+    """List images from a specific source (``stream`` as for ``/api/images``)."""
     cfg = get_current_config()
     source = None
     for s in cfg.sources:
@@ -72,23 +295,16 @@ def list_images_by_source(source_id: str):
     if not source:
         raise HTTPException(404, "Source not found")
 
-    svc = _get_service(source)
-    if svc is None:
+    if get_service_class(source.type) is None:
         raise HTTPException(400, "Unsupported source type")
 
-    try:
-        images = svc.list_images(source.id, source.name)
-        
-        for img in images:
-            policy = cfg.image_policies.get(img.name)
-            if policy and policy.protected_tags:
-                protected_set = set(policy.protected_tags)
-                for t in img.tags:
-                    t.is_protected = t.tag in protected_set
-                    
-        return images
-    except Exception as exc:
-        raise HTTPException(500, str(exc))
+    if stream is not None:
+        return _streaming_response([source], cfg, refresh, stream)
+    snapshot, error, _ = await _timed_read(source, cfg.inventory_refresh_interval, refresh)
+    if error is not None:
+        raise HTTPException(500, error)
+    response.headers.update(snapshot_headers([snapshot]))
+    return _mark_protected(snapshot.images, cfg)
 
 @router.delete("/{source_id}/{image_name:path}/tags/{tag}")
 def delete_image_tag(source_id: str, image_name: str, tag: str, force: bool = False):
@@ -98,7 +314,7 @@ def delete_image_tag(source_id: str, image_name: str, tag: str, force: bool = Fa
     if not source:
         raise HTTPException(404, "Source not found")
 
-    svc = _get_service(source)
+    svc = get_service(source)
     if svc is None:
         raise HTTPException(400, "Unsupported source type")
 
@@ -109,6 +325,7 @@ def delete_image_tag(source_id: str, image_name: str, tag: str, force: bool = Fa
             success = svc.delete_tag(image_name, tag)
             
         if success:
+            get_inventory().drop(source.id)
             return {"status": "success", "message": f"Deleted {image_name}:{tag}"}
         else:
             raise HTTPException(400, f"Failed to delete {image_name}:{tag}. It may not exist or cannot be removed.")
@@ -2,17 +2,24 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Response, status, Depends
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
 
-from app.config import get_current_config, save_config, get_config_path
+from app.config import get_current_config, get_config_version, save_config, get_config_path
 from app.models import DefaultPolicyUpdate, ImagePolicy, PolicyUpdate
+from app.services.retention import parse_duration
+from app.services.policy_index import get_policy_index, validate_image_pattern, validate_tag_pattern
+from app.utils.etag import is_fresh, make_etag, not_modified, set_validators
 from app.utils.security import get_current_user
 
 router = APIRouter(prefix="/api/policies", tags=["policies"], dependencies=[Depends(get_current_user)])
 
 
 @router.get("")
-def get_all_policies():
+def get_all_policies(request: Request, response: Response):
+    etag = make_etag("policies", get_config_version())
+    if is_fresh(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
     cfg = get_current_config()
     return {
         "default_keep_tags": cfg.default_keep_tags,
@@ -35,8 +42,11 @@ def update_default_policy(body: DefaultPolicyUpdate):
 
 
 @router.get("/{image_name:path}")
-def get_image_policy(image_name: str):
+def get_image_policy(image_name: str, resolve: bool = False):
+    """Policy stored under *image_name*; with ``resolve``, the one applied to that image."""
     cfg = get_current_config()
+    if resolve:
+        return get_policy_index(cfg).resolve(image_name)
     policy = cfg.image_policies.get(image_name)
     if policy is None:
         return ImagePolicy()
@@ -45,6 +55,15 @@ def get_image_policy(image_name: str):
 
 @router.put("/{image_name:path}")
 def update_image_policy(image_name: str, body: PolicyUpdate):
+    try:
+        validate_image_pattern(image_name)
+        for pattern in body.protected_tags or []:
+            validate_tag_pattern(pattern)
+        if body.delete_older_than:
+            parse_duration(body.delete_older_than)
+    except ValueError as exc:
+        raise HTTPException(422, str(exc))
+
     cfg = get_current_config()
     existing = cfg.image_policies.get(image_name, ImagePolicy())
 
@@ -60,6 +79,12 @@ def update_image_policy(image_name: str, body: PolicyUpdate):
                 unique_tags.append(t)
                 seen.add(t)
         existing.protected_tags = unique_tags
+    if body.keep_semver is not None:
+        existing.keep_semver = body.keep_semver or None
+    if body.keep_per_major is not None:
+        existing.keep_per_major = body.keep_per_major or None
+    if body.delete_older_than is not None:
+        existing.delete_older_than = body.delete_older_than or None
 
     cfg.image_policies[image_name] = existing
     save_config(cfg)
@@ -2,20 +2,26 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Depends
-
-from app.config import get_current_config, save_config, get_config_path
-from app.models import Source, SourceCreate, SourceUpdate, SourceType
-from app.services.docker_engine import DockerEngineService
-from app.services.private_registry import PrivateRegistryService
-from app.services.artifactory import ArtifactoryService
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+
+from app.config import get_current_config, get_config_version, save_config, get_config_path
+from app.models import Source, SourceCreate, SourceUpdate
+from app.services import engine_watch, http_clients
+from app.services.cleanup import forget_source
+from app.services.factory import get_service
+from app.services.inventory import get_inventory
+from app.utils.etag import is_fresh, make_etag, not_modified, set_validators
 from app.utils.security import get_current_user
 
 router = APIRouter(prefix="/api/sources", tags=["sources"], dependencies=[Depends(get_current_user)])
 
 
 @router.get("")
-def list_sources():
+def list_sources(request: Request, response: Response):
+    etag = make_etag("sources", get_config_version())
+    if is_fresh(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
     cfg = get_current_config()
     return cfg.sources
 
@@ -51,6 +57,11 @@ def update_source(source_id: str, body: SourceUpdate):
             if body.name is not None:
                 s.name = body.name
             if body.connection is not None:
+                if body.connection != s.connection:
+                    http_clients.release(s.id)
+                    engine_watch.release(s.id)
+                    get_inventory().drop(s.id)
+                    forget_source(s.id)
                 s.connection = body.connection
             if body.enabled is not None:
                 s.enabled = body.enabled
@@ -67,6 +78,10 @@ def delete_source(source_id: str):
     if len(cfg.sources) == original_len:
         raise HTTPException(404, "Source not found")
     save_config(cfg)
+    http_clients.release(source_id)
+    engine_watch.release(source_id)
+    get_inventory().drop(source_id)
+    forget_source(source_id)
 
 
 @router.post("/{source_id}/test")
@@ -82,13 +97,8 @@ def test_source(source_id: str):
         raise HTTPException(404, "Source not found")
 
     try:
-        if source.type == SourceType.DOCKER_ENGINE:
-            svc = DockerEngineService(source.connection)
-        elif source.type == SourceType.PRIVATE_REGISTRY:
-            svc = PrivateRegistryService(source.connection)
-        elif source.type == SourceType.ARTIFACTORY:
-            svc = ArtifactoryService(source.connection)
-        else:
+        svc = get_service(source)
+        if svc is None:
             raise HTTPException(400, "Unknown source type")
 
         ok = svc.ping()
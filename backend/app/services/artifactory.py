@@ -2,45 +2,62 @@
 
 from __future__ import annotations
 
-from typing import Any
+import json
+from typing import Any, Iterator
 
 import httpx
 
 from app.models import ImageInfo, TagInfo, SourceType
-from app.services.private_registry import PrivateRegistryService
+from app.services import http_clients
+from app.services.manifest_cache import get_manifest_cache
+from app.services.private_registry import _MANIFEST_ACCEPT, PrivateRegistryService, next_page_url
 from app.utils.logger import get_logger
 
 log = get_logger(__name__)
 
 _TIMEOUT = 30.0
+_AQL_PAGE_SIZE = 5000
+_MANIFEST_NAMES = ("manifest.json", "list.manifest.json")
 
 
 class ArtifactoryService:
     """Interact with JFrog Artifactory's Docker repository.
 
-    Supports two modes:
+    Supports three modes:
     1. JFrog REST API (default)  – uses /api/docker/ endpoints
     2. Registry API V2 fallback  – when ``use_registry_api`` is True
+    3. AQL bulk inventory        – when ``use_aql`` is True; lists the whole
+       repository with a few paginated ``items.find`` queries
     """
 
-    def __init__(self, connection: dict[str, Any]):
+    def __init__(self, connection: dict[str, Any], source_id: str | None = None):
+        self.connection = connection
+        self.source_key = source_id or f"conn:{http_clients.fingerprint(connection)}"
         self.base_url = connection.get("url", "").rstrip("/")
         self.username = connection.get("username", "")
         self.password = connection.get("password", "")
         self.api_key = connection.get("api_key", "")
         self.use_registry_api = connection.get("use_registry_api", False)
+        self.use_aql = connection.get("use_aql", False)
 
-        # build a registry-api fallback if required
-        if self.use_registry_api:
-            registry_conn = {
-                "url": self.base_url,
-                "username": self.username,
-                "password": self.password or self.api_key,
-                "insecure": connection.get("insecure", False),
-            }
-            self._registry = PrivateRegistryService(registry_conn)
-        else:
-            self._registry = None
+        # ".../artifactory/api/docker/<repo-key>" → Artifactory root + repo key
+        root, sep, rest = self.base_url.partition("/api/docker/")
+        self.root_url = root if sep else self.base_url
+        self.repo_key = connection.get("repository") or rest.split("/", 1)[0]
+
+        # Registry API V2 client: the listing/deletion fallback when
+        # ``use_registry_api`` is set, and the manifest reader for sizes.
+        registry_conn = {
+            "url": self.base_url,
+            "username": self.username,
+            "password": self.password or self.api_key,
+            "insecure": connection.get("insecure", False),
+            "headers": self._headers(),
+        }
+        for key in ("max_concurrency", "fetch_created"):
+            if key in connection:
+                registry_conn[key] = connection[key]
+        self._registry = PrivateRegistryService(registry_conn, source_id=self.source_key)
 
     # ------------------------------------------------------------------
     # Helpers
@@ -58,7 +75,11 @@ class ArtifactoryService:
         return None
 
     def _client(self) -> httpx.Client:
-        return httpx.Client(
+        """Pooled keep-alive client shared by every call for this source."""
+        return http_clients.get_client(
+            self.source_key,
+            "artifactory",
+            self.connection,
             auth=self._auth(),
             headers=self._headers(),
             timeout=_TIMEOUT,
@@ -69,12 +90,12 @@ class ArtifactoryService:
     # ------------------------------------------------------------------
 
     def ping(self) -> bool:
-        if self.use_registry_api and self._registry:
+        if self.use_registry_api:
             return self._registry.ping()
         try:
-            with self._client() as c:
-                r = c.get(f"{self.base_url}/v2/")
-                return r.status_code in (200, 401)
+            c = self._client()
+            r = c.get(f"{self.base_url}/v2/")
+            return r.status_code in (200, 401)
         except httpx.HTTPError:
             return False
 
@@ -82,24 +103,27 @@ class ArtifactoryService:
     # Catalog / tags  (JFrog REST API)
     # ------------------------------------------------------------------
 
+    def _iter_pages_rest(self, path: str, key: str) -> Iterator[str]:
+        """Yield items of a paginated V2 listing, following ``Link`` headers."""
+        url: str | None = f"{self.base_url}{path}"
+        c = self._client()
+        while url:
+            r = c.get(url)
+            if r.status_code != 200:
+                return
+            yield from r.json().get(key) or []
+            url = next_page_url(r)
+
     def _list_repositories_rest(self) -> list[str]:
         try:
-            with self._client() as c:
-                r = c.get(f"{self.base_url}/v2/_catalog")
-                if r.status_code != 200:
-                    return []
-                return r.json().get("repositories", [])
+            return list(self._iter_pages_rest("/v2/_catalog", "repositories"))
         except httpx.HTTPError as exc:
             log.error("Artifactory list repos failed: %s", exc)
             return []
 
     def _list_tags_rest(self, image: str) -> list[str]:
         try:
-            with self._client() as c:
-                r = c.get(f"{self.base_url}/v2/{image}/tags/list")
-                if r.status_code != 200:
-                    return []
-                return r.json().get("tags") or []
+            return list(self._iter_pages_rest(f"/v2/{image}/tags/list", "tags"))
         except httpx.HTTPError as exc:
             log.error("Artifactory list tags for %s failed: %s", image, exc)
             return []
@@ -107,75 +131,198 @@ class ArtifactoryService:
     def _get_tag_info_rest(self, image: str, tag: str) -> dict[str, Any]:
         info: dict[str, Any] = {}
         try:
-            with self._client() as c:
-                # Attempt to convert docker API URL to storage API URL to get size
-                path = self.base_url.replace("/api/docker/", "/api/storage/")
-                r = c.get(f"{path}/{image}/{tag}")
-                if r.status_code == 200:
-                    data = r.json()
-                    info["size"] = data.get("size", 0)
-                    info["created"] = data.get("created", "")
+            c = self._client()
+            # Storage API folder info carries the creation time of the tag
+            path = self.base_url.replace("/api/docker/", "/api/storage/")
+            r = c.get(f"{path}/{image}/{tag}")
+            if r.status_code == 200:
+                info["created"] = r.json().get("created", "")
         except httpx.HTTPError:
             pass
         return info
 
+    # ------------------------------------------------------------------
+    # Sizes  (manifest layer aggregation)
+    # ------------------------------------------------------------------
+
+    def _fill_sizes(self, images: list[ImageInfo]) -> None:
+        """Set each tag's size to the sum of its manifest's blobs.
+
+        Folder sizes from the storage API are usually 0 for Docker tags, so
+        the manifest is read instead – concurrently, and from the digest
+        cache whenever the digest is already known (AQL mode).
+        """
+        tags = [(img.name, t) for img in images for t in img.tags]
+        infos = self._registry.get_manifest_infos(
+            [(name, t.digest or t.tag) for name, t in tags]
+        )
+        for (_, t), info in zip(tags, infos):
+            t.size = info.get("size")
+            t.digest = t.digest or info.get("digest")
+
+    # ------------------------------------------------------------------
+    # Bulk inventory  (AQL)
+    # ------------------------------------------------------------------
+
+    def _aql_query(self, offset: int) -> str:
+        criteria = {
+            "repo": self.repo_key,
+            "$or": [{"name": n} for n in _MANIFEST_NAMES],
+        }
+        return (
+            f"items.find({json.dumps(criteria)})"
+            '.include("repo","path","name","size","created","sha256")'
+            '.sort({"$asc":["path"]})'
+            f".offset({offset}).limit({_AQL_PAGE_SIZE})"
+        )
+
+    def _iter_manifest_items_aql(self) -> Iterator[dict[str, Any]]:
+        """Yield every tag manifest item of the repository, page by page."""
+        c = self._client()
+        offset = 0
+        while True:
+            r = c.post(
+                f"{self.root_url}/api/search/aql",
+                content=self._aql_query(offset),
+                headers={"Content-Type": "text/plain"},
+            )
+            r.raise_for_status()
+            results = r.json().get("results") or []
+            yield from results
+            if len(results) < _AQL_PAGE_SIZE:
+                return
+            offset += _AQL_PAGE_SIZE
+
+    def _list_images_aql(self, source_id: str, source_name: str) -> list[ImageInfo]:
+        if not self.repo_key:
+            log.error("Artifactory AQL listing needs a repository key")
+            return []
+        repo_map: dict[str, dict[str, TagInfo]] = {}
+        try:
+            for item in self._iter_manifest_items_aql():
+                image, _, tag = item.get("path", "").rpartition("/")
+                # sha256__* folders hold platform manifests of multi-arch tags
+                if not image or tag.startswith("sha256__"):
+                    continue
+                tags = repo_map.setdefault(image, {})
+                # A fat manifest supersedes a plain one stored alongside it
+                if tag in tags and item.get("name") != "list.manifest.json":
+                    continue
+                sha = item.get("sha256")
+                tags[tag] = TagInfo(
+                    tag=tag,
+                    digest=f"sha256:{sha}" if sha else None,
+                    created=item.get("created"),
+                )
+        except (httpx.HTTPError, ValueError) as exc:
+            log.error("Artifactory AQL inventory failed: %s", exc)
+            return []
+
+        return [
+            ImageInfo(
+                name=image,
+                tag_count=len(tags),
+                tags=list(tags.values()),
+                source_id=source_id,
+                source_name=source_name,
+                source_type=SourceType.ARTIFACTORY,
+            )
+            for image, tags in sorted(repo_map.items())
+        ]
+
     # ------------------------------------------------------------------
     # Image listing
     # ------------------------------------------------------------------
 
     def list_images(self, source_id: str, source_name: str) -> list[ImageInfo]:
-        if self.use_registry_api and self._registry:
+        if self.use_registry_api:
             images = self._registry.list_images(source_id, source_name)
             for img in images:
                 img.source_type = SourceType.ARTIFACTORY
             return images
 
-        repos = self._list_repositories_rest()
-        result: list[ImageInfo] = []
-        for repo in repos:
-            tags_raw = self._list_tags_rest(repo)
-            tags: list[TagInfo] = []
-            for t in tags_raw:
-                info = self._get_tag_info_rest(repo, t)
-                tags.append(
-                    TagInfo(
-                        tag=t,
-                        size=info.get("size"),
-                        created=info.get("created"),
-                    )
-                )
-            result.append(
-                ImageInfo(
-                    name=repo,
-                    tag_count=len(tags),
-                    tags=tags,
-                    source_id=source_id,
-                    source_name=source_name,
-                    source_type=SourceType.ARTIFACTORY,
-                )
-            )
+        if self.use_aql:
+            images = self._list_images_aql(source_id, source_name)
+            self._fill_sizes(images)
+            return images
+
+        result = [
+            self._list_image_rest(repo, source_id, source_name)
+            for repo in self._list_repositories_rest()
+        ]
+        self._fill_sizes(result)
         return result
 
+    def iter_images(self, source_id: str, source_name: str) -> Iterator[ImageInfo]:
+        """Streaming :meth:`list_images`.
+
+        The registry API streams repos as they resolve and the REST API
+        yields each repo once its tags are sized; an AQL listing is a
+        single query, so its images all arrive together.
+        """
+        if self.use_registry_api:
+            for img in self._registry.iter_images(source_id, source_name):
+                img.source_type = SourceType.ARTIFACTORY
+                yield img
+        elif self.use_aql:
+            yield from self.list_images(source_id, source_name)
+        else:
+            for repo in self._list_repositories_rest():
+                image = self._list_image_rest(repo, source_id, source_name)
+                self._fill_sizes([image])
+                yield image
+
+    def _list_image_rest(self, repo: str, source_id: str, source_name: str) -> ImageInfo:
+        tags: list[TagInfo] = []
+        for t in self._list_tags_rest(repo):
+            info = self._get_tag_info_rest(repo, t)
+            tags.append(TagInfo(tag=t, created=info.get("created")))
+        return ImageInfo(
+            name=repo,
+            tag_count=len(tags),
+            tags=tags,
+            source_id=source_id,
+            source_name=source_name,
+            source_type=SourceType.ARTIFACTORY,
+        )
+
+    def get_manifest_digest(self, image: str, tag: str) -> str | None:
+        """Current digest of ``image:tag``; ``""`` if Artifactory does not report one."""
+        if self.use_registry_api:
+            return self._registry.get_manifest_digest(image, tag)
+        try:
+            r = http_clients.request_with_retry(
+                self._client(), "HEAD", f"{self.base_url}/v2/{image}/manifests/{tag}",
+                headers={"Accept": _MANIFEST_ACCEPT},
+            )
+            r.raise_for_status()
+            return r.headers.get("Docker-Content-Digest", "")
+        except httpx.HTTPError as exc:
+            log.error("Artifactory digest for %s:%s failed: %s", image, tag, exc)
+            return None
+
     # ------------------------------------------------------------------
     # Deletion
     # ------------------------------------------------------------------
 
-    def delete_tag(self, image: str, tag: str) -> bool:
-        if self.use_registry_api and self._registry:
-            return self._registry.delete_tag(image, tag)
+    def delete_tag(self, image: str, tag: str, digest: str | None = None) -> bool:
+        if self.use_registry_api:
+            return self._registry.delete_tag(image, tag, digest=digest)
 
         try:
-            with self._client() as c:
-                # Delete the tag manifest via REST
-                r = c.delete(f"{self.base_url}/v2/{image}/manifests/{tag}")
-                if r.status_code in (200, 202, 204):
-                    log.info("Artifactory: deleted %s:%s", image, tag)
-                    return True
-                log.error(
-                    "Artifactory delete %s:%s → %s: %s",
-                    image, tag, r.status_code, r.text,
-                )
-                return False
+            # Delete the tag manifest via REST
+            r = http_clients.request_with_retry(
+                self._client(), "DELETE", f"{self.base_url}/v2/{image}/manifests/{tag}"
+            )
+            if r.status_code in (200, 202, 204):
+                get_manifest_cache().forget_tag(self.source_key, image, tag)
+                log.info("Artifactory: deleted %s:%s", image, tag)
+                return True
+            log.error(
+                "Artifactory delete %s:%s → %s: %s",
+                image, tag, r.status_code, r.text,
+            )
+            return False
         except httpx.HTTPError as exc:
             log.error("Artifactory delete %s:%s failed: %s", image, tag, exc)
             return False
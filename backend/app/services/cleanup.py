@@ -2,46 +2,255 @@
 
 from __future__ import annotations
 
-from app.config import get_current_config
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+
+from app.config import get_cleanup_concurrency, get_current_config
 from app.models import (
     AppConfig,
     CleanupPreviewItem,
     CleanupResult,
     CleanupResultDetail,
     ImageInfo,
-    ImagePolicy,
+    Source,
     SourceType,
+    TagInfo,
 )
-from app.services.docker_engine import DockerEngineService
-from app.services.private_registry import PrivateRegistryService
-from app.services.artifactory import ArtifactoryService
+from app.services.deletion import DEFAULT_SOURCE_CONCURRENCY, DeletionExecutor, DeletionTask
+from app.services.docker_engine import DiskUsage
+from app.services.factory import get_service, get_service_class
+from app.services.inventory import Snapshot, get_inventory
+from app.services.layer_graph import LayerGraph, NodeKey
+from app.services.manifest_cache import get_manifest_cache
+from app.services.policy_index import get_policy_index
+from app.services.retention import TagKey, retained
 from app.utils.logger import get_logger
 
 log = get_logger(__name__)
 
+# Engines serialise much of image removal internally, so more parallel
+# removals against one daemon mostly just queue up.
+ENGINE_DELETE_CONCURRENCY = 2
 
-def _get_service(source):
-    """Instantiate the correct service for a source."""
-    stype = source.type
-    conn = source.connection
-    if stype == SourceType.DOCKER_ENGINE:
-        return DockerEngineService(conn)
-    elif stype == SourceType.PRIVATE_REGISTRY:
-        return PrivateRegistryService(conn)
-    elif stype == SourceType.ARTIFACTORY:
-        return ArtifactoryService(conn)
-    return None
 
+@dataclass
+class ImageDecision:
+    """Outcome of applying an image's retention policy to its tags."""
 
-def _resolve_policy(image_name: str, cfg: AppConfig) -> ImagePolicy:
-    """Return the effective policy for an image."""
-    return cfg.image_policies.get(image_name, ImagePolicy())
+    tags_to_keep: list[str] = field(default_factory=list)
+    tags_to_delete: list[TagInfo] = field(default_factory=list)
+    reason_kept: dict[str, str] = field(default_factory=dict)
+    valid_until: float = math.inf  # when age-based retention may decide differently
 
 
-def build_cleanup_preview(source_ids: list[str] | None = None) -> list[CleanupPreviewItem]:
-    """Dry-run: compute what tags would be deleted without touching anything."""
+def evaluate_image(
+    img: ImageInfo, cfg: AppConfig, now: float | None = None
+) -> ImageDecision | None:
+    """Decide which tags of *img* to keep; ``None`` if it is excluded from cleanup."""
+    policies = get_policy_index(cfg)
+    policy = policies.resolve(img.name)
+
+    # Skip excluded images
+    if policy.exclude_from_cleanup:
+        return None
+
+    protected = policies.protected(img.name)
+
+    # Newest first; creation times and versions are parsed once per tag
+    keys = sorted((TagKey.of(t) for t in img.tags), key=lambda k: k.created, reverse=True)
+
+    decision = ImageDecision()
+    candidates: list[TagKey] = []
+    for key in keys:
+        tag = key.tag.tag
+        # Protected by policy
+        if protected(tag):
+            decision.reason_kept[tag] = "protected_tag"
+        # Running container (Docker Engine only)
+        elif key.tag.is_running:
+            decision.reason_kept[tag] = "running_container"
+        else:
+            candidates.append(key)
+
+    # Retention strategies; a tag any of them keeps survives unless it is past delete_older_than
+    reasons, decision.valid_until = retained(candidates, policies.retention(img.name), now)
+    decision.reason_kept.update(reasons)
+    for key in keys:
+        if key.tag.tag in decision.reason_kept:
+            decision.tags_to_keep.append(key.tag.tag)
+        else:
+            decision.tags_to_delete.append(key.tag)
+
+    return decision
+
+
+@dataclass(frozen=True, slots=True)
+class _Memo:
+    inputs: bytes
+    decision: ImageDecision | None
+    valid_until: float
+
+
+class DecisionMemo:
+    """Last decision per ``(source, image)`` with a hash of what it depends on.
+
+    The hash covers the image's tags (name, digest, creation time, running
+    state) and its effective policy, so a preview only re-evaluates images
+    that got new or changed tags or whose resolved policy changed.
+    Decisions are shared and must not be modified.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sources: dict[str, dict[str, _Memo]] = {}
+
+    @staticmethod
+    def _inputs(img: ImageInfo, policy_fingerprint: str) -> bytes:
+        h = hashlib.blake2b(policy_fingerprint.encode(), digest_size=16)
+        for t in sorted(img.tags, key=lambda t: t.tag):
+            h.update(f"\n{t.tag}\0{t.digest}\0{t.created}\0{t.is_running:d}".encode())
+        return h.digest()
+
+    def decide(self, source_id: str, img: ImageInfo, cfg: AppConfig) -> tuple[ImageDecision | None, bool]:
+        """Decision for *img* and whether it was reused."""
+        inputs = self._inputs(img, get_policy_index(cfg).fingerprint(img.name))
+        now = time.time()
+        with self._lock:
+            memo = self._sources.get(source_id, {}).get(img.name)
+        if memo is not None and memo.inputs == inputs and now < memo.valid_until:
+            return memo.decision, True
+        decision = evaluate_image(img, cfg, now)
+        memo = _Memo(inputs, decision, decision.valid_until if decision is not None else math.inf)
+        with self._lock:
+            self._sources.setdefault(source_id, {})[img.name] = memo
+        return decision, False
+
+    def retain(self, source_id: str, image_names: set[str]) -> None:
+        """Forget images of *source_id* that are no longer listed."""
+        with self._lock:
+            memos = self._sources.get(source_id)
+            if memos is not None and len(memos) > len(image_names):
+                self._sources[source_id] = {n: m for n, m in memos.items() if n in image_names}
+
+    def forget(self, source_id: str) -> None:
+        with self._lock:
+            self._sources.pop(source_id, None)
+
+
+_decisions = DecisionMemo()
+
+
+def decide(source_id: str, img: ImageInfo, cfg: AppConfig) -> ImageDecision | None:
+    """:func:`evaluate_image`, reusing the last decision while its inputs are unchanged."""
+    return _decisions.decide(source_id, img, cfg)[0]
+
+
+def _node_key(source_type: SourceType, image_name: str, tag: str, digest: str | None) -> NodeKey:
+    """Deletable unit a tag belongs to (see :mod:`app.services.layer_graph`)."""
+    if not digest:
+        return (image_name, f"tag:{tag}")
+    if source_type == SourceType.DOCKER_ENGINE:
+        return ("", digest)  # image ID, shared by tags across repositories
+    return (image_name, digest)
+
+
+def _engine_usage(source: Source) -> DiskUsage | None:
+    try:
+        return get_service(source).disk_usage()
+    except Exception as exc:
+        log.warning("Failed to read disk usage of %s: %s", source.name, exc)
+        return None
+
+
+def _build_graph(
+    source: Source, images: list[ImageInfo], usage: DiskUsage | None = None
+) -> LayerGraph:
+    """Blob graph of a source from manifests already cached while listing.
+
+    Docker Engine images count with their unique bytes from ``system df``
+    (*usage*) and are pinned while any container still uses them.  Tags
+    whose manifest is unknown count as one opaque blob of their reported
+    size, shared by every tag of the same node.
+    """
+    cache = get_manifest_cache()
+    engine_images = usage.images if usage is not None else {}
+    graph = LayerGraph()
+    for img in images:
+        for t in img.tags:
+            node = _node_key(source.type, img.name, t.tag, t.digest)
+            engine_image = engine_images.get(t.digest) if t.digest else None
+            if engine_image is not None:
+                graph.add_tag(
+                    node, {t.digest: engine_image.unique_size}, pinned=engine_image.containers > 0
+                )
+                continue
+            blobs = cache.blob_sizes(source.id, t.digest) if t.digest else None
+            if blobs is None:
+                blobs = {"\0".join(node): t.size or 0}
+            graph.add_tag(node, blobs)
+    return graph
+
+
+_graphs: dict[str, tuple[float, LayerGraph]] = {}  # source ID → (snapshot time, graph)
+_graphs_lock = threading.Lock()
+
+
+def _snapshot_graph(source: Source, snapshot: Snapshot) -> LayerGraph:
+    """Graph of a registry snapshot, built once per snapshot (graphs are read-only)."""
+    with _graphs_lock:
+        cached = _graphs.get(source.id)
+    if cached is not None and cached[0] == snapshot.generated_at:
+        return cached[1]
+    graph = _build_graph(source, snapshot.images)
+    with _graphs_lock:
+        _graphs[source.id] = (snapshot.generated_at, graph)
+    return graph
+
+
+def forget_source(source_id: str) -> None:
+    """Drop what previews remember about an edited or deleted source."""
+    _decisions.forget(source_id)
+    with _graphs_lock:
+        _graphs.pop(source_id, None)
+
+
+@dataclass
+class CleanupPlan:
+    previews: list[CleanupPreviewItem]
+    graphs: dict[str, LayerGraph]  # by source ID
+    engine_usage: dict[str, DiskUsage]  # by source ID, as read while planning
+    errors: dict[str, str] = field(default_factory=dict)  # sources that could not be listed
+
+    def only(self, source_ids: list[str]) -> CleanupPlan:
+        ids = set(source_ids)
+        return CleanupPlan(
+            [item for item in self.previews if item.source_id in ids],
+            {sid: g for sid, g in self.graphs.items() if sid in ids},
+            {sid: u for sid, u in self.engine_usage.items() if sid in ids},
+            {sid: e for sid, e in self.errors.items() if sid in ids},
+        )
+
+
+def build_cleanup_plan(
+    source_ids: list[str] | None = None,
+    refresh: bool = False,
+) -> CleanupPlan:
+    """Compute preview items plus the blob graph of every listed source.
+
+    Listings come from the inventory snapshots; ``refresh`` forces every
+    source to be relisted first, and a source whose relisting fails is
+    skipped (see ``errors``) rather than planned from its older snapshot.
+    """
     cfg = get_current_config()
+    inventory = get_inventory()
     previews: list[CleanupPreviewItem] = []
+    graphs: dict[str, LayerGraph] = {}
+    engine_usage: dict[str, DiskUsage] = {}
+    errors: dict[str, str] = {}
 
     for source in cfg.sources:
         if not source.enabled:
@@ -49,130 +258,304 @@ def build_cleanup_preview(source_ids: list[str] | None = None) -> list[CleanupPr
         if source_ids and source.id not in source_ids:
             continue
 
-        try:
-            svc = _get_service(source)
-            if svc is None:
-                continue
-            images = svc.list_images(source.id, source.name)
-        except Exception as exc:
-            log.error("Error listing images from %s: %s", source.name, exc)
+        if get_service_class(source.type) is None:
+            continue
+        snapshot = inventory.read(source, cfg.inventory_refresh_interval, refresh)
+        error = snapshot.error or (snapshot.refresh_error if refresh else None)
+        if error:
+            log.error("Error listing images from %s: %s", source.name, error)
+            errors[source.id] = error
             continue
+        images = snapshot.images
 
-        for img in images:
-            policy = _resolve_policy(img.name, cfg)
+        usage = None
+        if source.type == SourceType.DOCKER_ENGINE:
+            usage = _engine_usage(source)
+            if usage is not None:
+                engine_usage[source.id] = usage
+        if usage is None:
+            graph = _snapshot_graph(source, snapshot)
+        else:
+            graph = _build_graph(source, images, usage)
+        graphs[source.id] = graph
+        source_items: list[tuple[CleanupPreviewItem, list[NodeKey]]] = []
 
-            # Skip excluded images
-            if policy.exclude_from_cleanup:
+        reused = 0
+        for img in images:
+            decision, hit = _decisions.decide(source.id, img, cfg)
+            reused += hit
+            if decision is None or not decision.tags_to_delete:
                 continue
+            deleted_nodes = [
+                _node_key(source.type, img.name, t.tag, t.digest) for t in decision.tags_to_delete
+            ]
+            item = CleanupPreviewItem(
+                source_id=source.id,
+                source_name=source.name,
+                source_type=source.type,
+                image_name=img.name,
+                tags_to_delete=[t.tag for t in decision.tags_to_delete],
+                tags_to_keep=decision.tags_to_keep,
+                reason_kept=decision.reason_kept,
+                digests={t.tag: t.digest for t in decision.tags_to_delete if t.digest},
+            )
+            source_items.append((item, deleted_nodes))
+        _decisions.retain(source.id, {img.name for img in images})
+        log.debug("Preview of %s: %d of %d images unchanged", source.name, reused, len(images))
 
-            keep_count = policy.keep_tags if policy.keep_tags is not None else cfg.default_keep_tags
-            protected = set(policy.protected_tags)
+        # Unique bytes are only known once every deletion in the source is
+        # decided: a blob is freed when no remaining manifest references it.
+        freed = graph.freed(n for _, nodes in source_items for n in nodes)
+        for item, nodes in source_items:
+            item.freed_bytes = sum(freed.get(n, 0) for n in set(nodes))
+            previews.append(item)
 
-            # Sort tags by created date descending (newest first)
-            sorted_tags = sorted(
-                img.tags,
-                key=lambda t: t.created or "",
-                reverse=True,
-            )
+    return CleanupPlan(previews, graphs, engine_usage, errors)
 
-            tags_to_keep: list[str] = []
-            tags_to_delete: list[str] = []
-            reason_kept: dict[str, str] = {}
-            kept_count = 0
-            freed_bytes = 0
-
-            for tinfo in sorted_tags:
-                tag = tinfo.tag
-
-                # Protected by policy
-                if tag in protected:
-                    tags_to_keep.append(tag)
-                    reason_kept[tag] = "protected_tag"
-                    continue
-
-                # Running container (Docker Engine only)
-                if tinfo.is_running:
-                    tags_to_keep.append(tag)
-                    reason_kept[tag] = "running_container"
-                    continue
-
-                # Retention count
-                if kept_count < keep_count:
-                    tags_to_keep.append(tag)
-                    reason_kept[tag] = "retention_policy"
-                    kept_count += 1
-                else:
-                    tags_to_delete.append(tag)
-                    if tinfo.size:
-                        freed_bytes += tinfo.size
-
-            if tags_to_delete:
-                previews.append(
-                    CleanupPreviewItem(
-                        source_id=source.id,
-                        source_name=source.name,
-                        source_type=source.type,
-                        image_name=img.name,
-                        tags_to_delete=tags_to_delete,
-                        tags_to_keep=tags_to_keep,
-                        reason_kept=reason_kept,
-                        freed_bytes=freed_bytes,
-                    )
-                )
 
-    return previews
+def build_cleanup_preview(
+    source_ids: list[str] | None = None, refresh: bool = False
+) -> list[CleanupPreviewItem]:
+    """Dry-run: compute what tags would be deleted without touching anything."""
+    return build_cleanup_plan(source_ids, refresh).previews
+
+
+def _delete(svc, source_type: SourceType, task: DeletionTask) -> bool:
+    if task.whole_image:
+        return svc.remove_image_id(task.digest)
+    if source_type == SourceType.DOCKER_ENGINE:
+        return svc.delete_image(task.image_name, task.tag)
+    # Reuse the digest resolved during the preview listing
+    return svc.delete_tag(task.image_name, task.tag, digest=task.digest)
+
 
+def _revalidate(svc, task: DeletionTask, tag_tasks: list[DeletionTask]) -> None:
+    """Raise unless the tags of *task* still are what the plan showed."""
+    if task.whole_image:
+        tags = svc.get_image_tags(task.digest)
+        if tags is None:
+            raise LookupError(f"Image {task.digest} no longer exists")
+        added = set(tags) - {f"{t.image_name}:{t.tag}" for t in tag_tasks}
+        if added:
+            raise ValueError(f"Image was tagged {', '.join(sorted(added))} after the preview")
+        return
+    current = svc.get_manifest_digest(task.image_name, task.tag)
+    if current is None:
+        raise LookupError(f"Tag {task.image_name}:{task.tag} no longer exists")
+    if task.digest and current and current != task.digest:
+        raise ValueError(f"Tag now points at {current}, not the previewed {task.digest}")
 
-def execute_cleanup(source_ids: list[str] | None = None) -> CleanupResult:
-    """Actually delete tags according to the retention policy."""
+
+def execute_cleanup(
+    source_ids: list[str] | None = None,
+    progress: CleanupProgress | None = None,
+    cancel: threading.Event | None = None,
+    plan: CleanupPlan | None = None,
+) -> CleanupResult:
+    """Actually delete tags according to the retention policy.
+
+    Deletions run concurrently: sources in parallel with each other, each
+    capped by its ``delete_concurrency`` connection option, and all of them
+    bounded by ``DIM_CLEANUP_CONCURRENCY``.
+
+    With *progress*, per-tag details go to it instead of
+    ``result.details``.  Setting *cancel* stops new deletions from being
+    started; those already running finish and are reported.
+
+    Given a reviewed *plan*, exactly its tags are deleted without
+    relisting any source; each tag is first checked to still point at the
+    previewed digest and skipped as failed if it moved.
+    """
     cfg = get_current_config()
     result = CleanupResult()
+    if progress is None:
+        progress = _KeepDetails(result)
 
-    preview = build_cleanup_preview(source_ids)
+    revalidate = plan is not None
+    if plan is None:
+        # Never delete based on a cached listing
+        plan = build_cleanup_plan(source_ids, refresh=True)
+    elif source_ids:
+        plan = plan.only(source_ids)
+    graphs = plan.graphs
+    for source_id, error in plan.errors.items():
+        progress.source_error(source_id, error)
 
     # Build source lookup
     source_map = {s.id: s for s in cfg.sources}
 
-    for item in preview:
+    # Freed engine bytes are measured against the daemon as it is now; a
+    # reviewed plan's usage may be minutes old.
+    engine_usage = dict(plan.engine_usage)
+    if revalidate:
+        for source_id in engine_usage:
+            source = source_map.get(source_id)
+            usage = _engine_usage(source) if source is not None else None
+            if usage is not None:
+                engine_usage[source_id] = usage
+    services: dict[str, object] = {}
+    limits: dict[str, int] = {}
+    tasks: list[DeletionTask] = []
+    engine_tasks: dict[str, dict[NodeKey, list[DeletionTask]]] = {}
+
+    for item in plan.previews:
         source = source_map.get(item.source_id)
         if not source:
             continue
+        if source.id not in services:
+            svc = get_service(source)
+            if svc is None:
+                continue
+            services[source.id] = svc
+            default_limit = (
+                ENGINE_DELETE_CONCURRENCY
+                if source.type == SourceType.DOCKER_ENGINE
+                else DEFAULT_SOURCE_CONCURRENCY
+            )
+            limits[source.id] = int(source.connection.get("delete_concurrency", default_limit))
+        for tag in item.tags_to_delete:
+            task = DeletionTask(item.source_id, item.image_name, tag, item.digests.get(tag))
+            if source.type == SourceType.DOCKER_ENGINE and task.digest:
+                node = _node_key(source.type, item.image_name, tag, task.digest)
+                engine_tasks.setdefault(source.id, {}).setdefault(node, []).append(task)
+            else:
+                tasks.append(task)
 
-        svc = _get_service(source)
-        if svc is None:
-            continue
+    # An engine image losing every tag is removed once by ID instead of
+    # being untagged tag by tag – a forced removal, so only when system df
+    # confirms that no container (running or stopped) uses the image.
+    covered: dict[DeletionTask, list[DeletionTask]] = {}
+    for source_id, by_node in engine_tasks.items():
+        graph = graphs[source_id]
+        usage = engine_usage.get(source_id)
+        for node, node_tasks in by_node.items():
+            engine_image = usage.images.get(node[1]) if usage is not None else None
+            if (
+                len(node_tasks) > 1
+                and len(node_tasks) == graph.tag_count(node)
+                and engine_image is not None
+                and engine_image.containers == 0
+            ):
+                whole = replace(node_tasks[0], whole_image=True)
+                covered[whole] = node_tasks
+                tasks.append(whole)
+            else:
+                tasks.extend(node_tasks)
 
-        for tag in item.tags_to_delete:
-            try:
-                if source.type == SourceType.DOCKER_ENGINE:
-                    ok = svc.delete_image(item.image_name, tag)
-                else:
-                    ok = svc.delete_tag(item.image_name, tag)
-
-                detail = CleanupResultDetail(
-                    source_id=item.source_id,
-                    image_name=item.image_name,
-                    tag=tag,
-                    success=ok,
-                    error=None if ok else "Delete returned False",
+    def delete(task: DeletionTask) -> bool:
+        source = source_map[task.source_id]
+        svc = services[task.source_id]
+        if revalidate:
+            _revalidate(svc, task, covered.get(task, [task]))
+        return _delete(svc, source.type, task)
+
+    deleted_nodes: dict[str, list[NodeKey]] = {}
+    remaining = Counter(task.source_id for task in tasks)
+    progress.planned(sum(len(covered.get(task, [task])) for task in tasks))
+
+    def finish_source(source_id: str) -> None:
+        # Bytes actually released by the deletions that succeeded
+        nodes = deleted_nodes.get(source_id, [])
+        if source_id in engine_usage:
+            # A cancelled run stops at the deletions; it never starts a prune
+            freed = _finish_engine(
+                source_map[source_id], engine_usage[source_id], graphs[source_id], nodes,
+                prune=cancel is None or not cancel.is_set(),
+            )
+        else:
+            freed = sum(graphs[source_id].freed(nodes).values())
+        if nodes:
+            get_inventory().drop(source_id)
+        result.total_freed_bytes += freed
+        progress.freed(freed)
+
+    executor = DeletionExecutor(get_cleanup_concurrency())
+    for task, ok, error in executor.run(tasks, delete, limits, cancel):
+        for tag_task in covered.get(task, [task]):
+            detail = CleanupResultDetail(
+                source_id=tag_task.source_id,
+                image_name=tag_task.image_name,
+                tag=tag_task.tag,
+                success=ok,
+                error=error,
+            )
+            if ok:
+                result.total_deleted += 1
+                source = source_map[tag_task.source_id]
+                deleted_nodes.setdefault(tag_task.source_id, []).append(
+                    _node_key(source.type, tag_task.image_name, tag_task.tag, tag_task.digest)
                 )
-                result.details.append(detail)
-                if ok:
-                    result.total_deleted += 1
-                    # Approximate the freed size based on preview
-                    result.total_freed_bytes += item.freed_bytes // len(item.tags_to_delete) if item.freed_bytes else 0
-                else:
-                    result.total_failed += 1
-            except Exception as exc:
+            else:
                 result.total_failed += 1
-                result.details.append(
-                    CleanupResultDetail(
-                        source_id=item.source_id,
-                        image_name=item.image_name,
-                        tag=tag,
-                        success=False,
-                        error=str(exc),
-                    )
-                )
+            progress.detail(detail)
+        remaining[task.source_id] -= 1
+        if remaining[task.source_id] == 0:
+            finish_source(task.source_id)
+
+    # Sources cut short by cancellation, and engines that may still prune
+    for source_id in graphs:
+        if remaining.get(source_id, 0) > 0 or (
+            source_id not in remaining and source_id in engine_usage
+        ):
+            finish_source(source_id)
 
     return result
+
+
+class CleanupProgress:
+    """Receives :func:`execute_cleanup` progress as it happens."""
+
+    def planned(self, total_tags: int) -> None:
+        pass
+
+    def detail(self, detail: CleanupResultDetail) -> None:
+        pass
+
+    def freed(self, freed_bytes: int) -> None:
+        pass
+
+    def source_error(self, source_id: str, error: str) -> None:
+        pass
+
+
+class _KeepDetails(CleanupProgress):
+    def __init__(self, result: CleanupResult):
+        self.result = result
+
+    def source_error(self, source_id: str, error: str) -> None:
+        self.result.source_errors[source_id] = error
+
+    def detail(self, detail: CleanupResultDetail) -> None:
+        self.result.details.append(detail)
+
+
+def _finish_engine(
+    source: Source,
+    before: DiskUsage,
+    graph: LayerGraph,
+    deleted: list[NodeKey],
+    prune: bool = True,
+) -> int:
+    """Optionally prune an engine, then return the bytes its daemon reclaimed.
+
+    ``prune_dangling``/``prune_build_cache`` connection options enable the
+    prunes, unless *prune* is false.  Image bytes come from the drop in ``LayersSize`` between
+    *before* (read as execution started) and now; the estimate from *graph* is used only if the daemon
+    cannot be asked again.
+    """
+    svc = get_service(source)
+    conn = source.connection
+    dangling = prune and bool(conn.get("prune_dangling", False))
+    build_cache = prune and bool(conn.get("prune_build_cache", False))
+    if not deleted and not dangling and not build_cache:
+        return 0
+
+    # Build cache is not part of LayersSize, so its bytes are counted apart.
+    cache_reclaimed = svc.prune_build_cache() if build_cache else 0
+    if dangling:
+        svc.prune_images()
+        get_inventory().drop(source.id)
+    after = _engine_usage(source)
+    if after is None or not before.layers_size:
+        return sum(graph.freed(deleted).values()) + cache_reclaimed
+    return max(0, before.layers_size - after.layers_size) + cache_reclaimed
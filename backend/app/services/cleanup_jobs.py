@@ -0,0 +1,200 @@
+"""Background cleanup jobs with progress, cancellation and bounded history.
+
+``POST /api/cleanup/execute`` only enqueues a :class:`CleanupJob`; a
+single worker thread runs jobs one at a time so two cleanups never race
+on the same sources.  Each job exposes live counters, its per-tag results
+in fixed-size chunks, and a ``version`` that changes on every update for
+pollers and the progress stream.  Only the most recent finished jobs are
+kept.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.models import CleanupJobInfo, CleanupJobState, CleanupResultDetail
+from app.services.cleanup import CleanupPlan, CleanupProgress, execute_cleanup
+from app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+DETAIL_CHUNK_SIZE = 500
+_MAX_FINISHED_JOBS = 50
+
+FINISHED_STATES = frozenset({CleanupJobState.SUCCEEDED, CleanupJobState.FAILED, CleanupJobState.CANCELLED})
+
+
+class CleanupJob(CleanupProgress):
+    """One cleanup run; also the progress sink :func:`execute_cleanup` reports to."""
+
+    def __init__(
+        self,
+        source_ids: list[str] | None = None,
+        plan: CleanupPlan | None = None,
+        plan_id: str | None = None,
+    ):
+        self.plan = plan
+        self.cancel_event = threading.Event()
+        self.future: Future[None] | None = None
+        self.version = 0
+        self._lock = threading.Lock()
+        self._chunks: list[list[CleanupResultDetail]] = []
+        self._info = CleanupJobInfo(
+            id=uuid.uuid4().hex,
+            state=CleanupJobState.QUEUED,
+            source_ids=source_ids,
+            plan_id=plan_id,
+            created_at=time.time(),
+        )
+
+    @property
+    def id(self) -> str:
+        return self._info.id
+
+    @property
+    def finished(self) -> bool:
+        return self._info.state in FINISHED_STATES
+
+    def info(self) -> CleanupJobInfo:
+        with self._lock:
+            return self._info.model_copy()
+
+    def details(self, offset: int = 0, limit: int = DETAIL_CHUNK_SIZE) -> list[CleanupResultDetail]:
+        """Per-tag results ``[offset, offset + limit)`` in completion order."""
+        with self._lock:
+            chunks = list(self._chunks)
+        out: list[CleanupResultDetail] = []
+        idx, pos = divmod(offset, DETAIL_CHUNK_SIZE)
+        while idx < len(chunks) and len(out) < limit:
+            chunk = chunks[idx]
+            out.extend(chunk[pos:pos + limit - len(out)])
+            idx, pos = idx + 1, 0
+        return out
+
+    def _update(self, **changes) -> None:
+        with self._lock:
+            for key, value in changes.items():
+                setattr(self._info, key, value)
+            self.version += 1
+
+    # CleanupProgress --------------------------------------------------
+
+    def planned(self, total_tags: int) -> None:
+        self._update(total_planned=total_tags)
+
+    def detail(self, detail: CleanupResultDetail) -> None:
+        with self._lock:
+            if not self._chunks or len(self._chunks[-1]) >= DETAIL_CHUNK_SIZE:
+                self._chunks.append([])
+            self._chunks[-1].append(detail)
+            if detail.success:
+                self._info.total_deleted += 1
+            else:
+                self._info.total_failed += 1
+            self.version += 1
+
+    def freed(self, freed_bytes: int) -> None:
+        with self._lock:
+            self._info.total_freed_bytes += freed_bytes
+            self.version += 1
+
+    def source_error(self, source_id: str, error: str) -> None:
+        with self._lock:
+            self._info.source_errors[source_id] = error
+            self.version += 1
+
+    # Execution --------------------------------------------------------
+
+    def request_cancel(self) -> None:
+        """Stop starting deletions; the job ends once running ones finish."""
+        self.cancel_event.set()
+        self._update()
+
+    def run(self) -> None:
+        if self.cancel_event.is_set():
+            self._update(state=CleanupJobState.CANCELLED, finished_at=time.time())
+            return
+        self._update(state=CleanupJobState.RUNNING, started_at=time.time())
+        try:
+            execute_cleanup(
+                self._info.source_ids, progress=self, cancel=self.cancel_event, plan=self.plan
+            )
+        except Exception as exc:
+            log.error("Cleanup job %s failed: %s", self.id, exc)
+            self._update(state=CleanupJobState.FAILED, error=str(exc), finished_at=time.time())
+            return
+        finally:
+            self.plan = None  # graphs can be large; the history keeps only counters
+        state = CleanupJobState.CANCELLED if self.cancel_event.is_set() else CleanupJobState.SUCCEEDED
+        self._update(state=state, finished_at=time.time())
+        info = self.info()
+        log.info("Cleanup job %s %s. Deleted: %d, Failed: %d, Freed Bytes: %d",
+                 self.id, state.value, info.total_deleted, info.total_failed, info.total_freed_bytes)
+
+
+class CleanupJobManager:
+    """Runs queued jobs on one worker and keeps a bounded history."""
+
+    def __init__(self, max_finished: int = _MAX_FINISHED_JOBS):
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, CleanupJob] = OrderedDict()
+        self._max_finished = max_finished
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix="dim-cleanup")
+
+    def submit(
+        self,
+        source_ids: list[str] | None = None,
+        plan: CleanupPlan | None = None,
+        plan_id: str | None = None,
+    ) -> CleanupJob:
+        """Queue a cleanup; with *plan*, exactly that reviewed plan is executed."""
+        job = CleanupJob(source_ids, plan, plan_id)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        job.future = self._pool.submit(job.run)
+        return job
+
+    def _trim(self) -> None:
+        # Caller holds self._lock; queued/running jobs are never evicted.
+        finished = [jid for jid, job in self._jobs.items() if job.finished]
+        for jid in finished[: max(0, len(finished) - self._max_finished)]:
+            del self._jobs[jid]
+
+    def get(self, job_id: str) -> CleanupJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[CleanupJob]:
+        with self._lock:
+            self._trim()
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> CleanupJob | None:
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.request_cancel()
+        return job
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_manager: CleanupJobManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_cleanup_jobs() -> CleanupJobManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = CleanupJobManager()
+        return _manager
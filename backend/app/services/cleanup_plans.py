@@ -0,0 +1,81 @@
+"""Reviewed cleanup plans, kept for execution.
+
+Every preview is stored as an immutable :class:`~app.services.cleanup.CleanupPlan`
+under a content hash of what it would delete, so executing a preview
+deletes exactly the set the operator saw – and does not relist every
+source to rebuild it.  Identical previews share one ID.  Plans expire
+after ``DIM_PLAN_TTL`` seconds; executing one consumes it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.config import get_plan_ttl
+from app.services.cleanup import CleanupPlan
+
+_MAX_PLANS = 20
+
+
+def plan_id(plan: CleanupPlan) -> str:
+    """Content hash of the tags (and digests) *plan* would delete."""
+    content = sorted(
+        [item.source_id, item.image_name, sorted(item.tags_to_delete), sorted(item.digests.items())]
+        for item in plan.previews
+    )
+    raw = json.dumps(content, separators=(",", ":")).encode()
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class StoredPlan:
+    id: str
+    plan: CleanupPlan
+    expires_at: float
+
+
+class PlanStore:
+    def __init__(self, max_plans: int = _MAX_PLANS):
+        self._lock = threading.Lock()
+        self._plans: OrderedDict[str, StoredPlan] = OrderedDict()
+        self._max_plans = max_plans
+
+    def put(self, plan: CleanupPlan) -> StoredPlan:
+        stored = StoredPlan(plan_id(plan), plan, time.time() + get_plan_ttl())
+        with self._lock:
+            self._plans.pop(stored.id, None)
+            self._plans[stored.id] = stored
+            self._expire()
+            while len(self._plans) > self._max_plans:
+                self._plans.popitem(last=False)
+        return stored
+
+    def take(self, plan_id: str) -> CleanupPlan | None:
+        """Remove and return a live plan, so it is executed at most once."""
+        with self._lock:
+            self._expire()
+            stored = self._plans.pop(plan_id, None)
+        return stored.plan if stored is not None else None
+
+    def _expire(self) -> None:
+        # Caller holds self._lock
+        now = time.time()
+        for pid in [pid for pid, s in self._plans.items() if s.expires_at <= now]:
+            del self._plans[pid]
+
+
+_store: PlanStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_plan_store() -> PlanStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PlanStore()
+        return _store
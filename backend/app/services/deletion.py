@@ -0,0 +1,92 @@
+"""Concurrent deletion executor used by the cleanup engine.
+
+Sources are worked on in parallel so a slow backend cannot hold up the
+others.  Each source has its own concurrency cap, and a shared thread
+pool bounds the total number of deletes in flight.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+from app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_SOURCE_CONCURRENCY = 4
+
+
+@dataclass(frozen=True)
+class DeletionTask:
+    source_id: str
+    image_name: str
+    tag: str
+    digest: str | None = None
+    whole_image: bool = False  # engine: remove image ID *digest* with all its tags
+
+
+DeleteFn = Callable[[DeletionTask], bool]
+
+
+class DeletionExecutor:
+    """Run deletions with a global cap and per-source caps."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+
+    def run(
+        self,
+        tasks: Iterable[DeletionTask],
+        delete: DeleteFn,
+        limits: dict[str, int] | None = None,
+        cancel: threading.Event | None = None,
+    ) -> Iterator[tuple[DeletionTask, bool, str | None]]:
+        """Yield ``(task, success, error)`` for every task as it completes.
+
+        Only up to ``limits[source_id]`` deletes of a source are handed to
+        the pool at a time, so a source with a low cap never ties up pool
+        workers that other sources could use.  Once *cancel* is set no
+        further tasks are started; running ones are still reported.
+        """
+        limits = limits or {}
+        queues: dict[str, deque[DeletionTask]] = {}
+        for task in tasks:
+            queues.setdefault(task.source_id, deque()).append(task)
+
+        running: Counter[str] = Counter()
+        inflight: dict[Future[bool], DeletionTask] = {}
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="dim-delete") as pool:
+
+            def fill(source_id: str) -> None:
+                queue = queues[source_id]
+                limit = max(1, limits.get(source_id, DEFAULT_SOURCE_CONCURRENCY))
+                while queue and running[source_id] < limit:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    task = queue.popleft()
+                    running[source_id] += 1
+                    inflight[pool.submit(delete, task)] = task
+
+            for source_id in queues:
+                fill(source_id)
+
+            while inflight:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = inflight.pop(future)
+                    running[task.source_id] -= 1
+                    try:
+                        ok = future.result()
+                        error = None if ok else "Delete returned False"
+                    except Exception as exc:
+                        log.error(
+                            "Deleting %s:%s failed: %s", task.image_name, task.tag, exc
+                        )
+                        ok, error = False, str(exc)
+                    yield task, ok, error
+                    fill(task.source_id)
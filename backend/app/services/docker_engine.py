@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Any
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
 
 import docker
-from docker.errors import APIError, DockerException
+from docker.errors import APIError, DockerException, NotFound
 
 from app.models import ImageInfo, TagInfo, SourceType
 from app.utils.logger import get_logger
@@ -13,10 +15,123 @@ from app.utils.logger import get_logger
 log = get_logger(__name__)
 
 
+_NONE_REFS = frozenset({"<none>:<none>", "<none>@<none>"})
+
+
+@dataclass(slots=True)
+class EngineImage:
+    """Lightweight image record; pydantic models are only built in :func:`build_images`."""
+
+    id: str
+    repo_tags: tuple[str, ...]
+    repo_digests: tuple[str, ...]
+    created: str  # ISO-8601
+    size: int
+    shared_size: int = -1  # bytes shared with other images, -1 if unknown
+    containers: int = -1  # containers using the image, -1 if unknown
+
+    @property
+    def unique_size(self) -> int:
+        """Bytes no other image uses – what removing this one frees."""
+        return self.size - self.shared_size if self.shared_size >= 0 else self.size
+
+    @classmethod
+    def from_summary(cls, d: dict[str, Any]) -> EngineImage:
+        """From a ``GET /images/json`` entry (``Created`` is epoch seconds)."""
+        return cls(
+            id=d["Id"],
+            repo_tags=tuple(t for t in d.get("RepoTags") or () if t not in _NONE_REFS),
+            repo_digests=tuple(t for t in d.get("RepoDigests") or () if t not in _NONE_REFS),
+            created=datetime.fromtimestamp(d.get("Created") or 0, timezone.utc).isoformat(),
+            size=d.get("Size") or 0,
+            shared_size=d.get("SharedSize", -1),
+            containers=d.get("Containers", -1),
+        )
+
+    @classmethod
+    def from_inspect(cls, d: dict[str, Any]) -> EngineImage:
+        """From a ``GET /images/{id}/json`` response."""
+        return cls(
+            id=d["Id"],
+            repo_tags=tuple(t for t in d.get("RepoTags") or () if t not in _NONE_REFS),
+            repo_digests=tuple(t for t in d.get("RepoDigests") or () if t not in _NONE_REFS),
+            created=d.get("Created") or "",
+            size=d.get("Size") or 0,
+        )
+
+
+@dataclass(slots=True)
+class DiskUsage:
+    images: dict[str, EngineImage]  # by image ID
+    layers_size: int  # bytes of all image layers on the daemon
+
+
+def running_refs(containers: list[dict[str, Any]], images: Iterable[EngineImage]) -> set[str]:
+    """Image references used by running containers (see :meth:`DockerEngineService.get_running_tags`)."""
+    running_ids = {c.get("ImageID") for c in containers}
+    running = running_ids | {c.get("Image") for c in containers}
+    for img in images:
+        if img.id in running_ids:
+            running.update(img.repo_tags)
+            running.update(img.repo_digests)
+    running -= {None, ""}
+    return running
+
+
+def build_images(
+    images: Iterable[EngineImage],
+    running_tags: set[str],
+    source_id: str,
+    source_name: str,
+) -> list[ImageInfo]:
+    """Group image records into one :class:`ImageInfo` per repository.
+
+    A tag is running if it or its image ID is in *running_tags*.  Models
+    are built with ``model_construct`` as every field is already typed.
+    """
+    repo_map: dict[str, list[TagInfo]] = {}
+
+    for img in images:
+        id_running = img.id in running_tags
+        for full_tag in img.repo_tags:
+            # full_tag looks like  "repo:tag" or "registry/repo:tag"
+            if ":" in full_tag:
+                repo, tag = full_tag.rsplit(":", 1)
+            else:
+                repo, tag = full_tag, "latest"
+
+            tag_info = TagInfo.model_construct(
+                tag=tag,
+                digest=img.id,
+                size=img.size,
+                created=img.created,
+                is_running=id_running or full_tag in running_tags,
+                is_protected=False,
+            )
+
+            repo_map.setdefault(repo, []).append(tag_info)
+
+    result: list[ImageInfo] = []
+    for repo, tags in sorted(repo_map.items()):
+        tags.sort(key=lambda t: t.created or "", reverse=True)
+        result.append(
+            ImageInfo.model_construct(
+                name=repo,
+                tag_count=len(tags),
+                tags=tags,
+                source_id=source_id,
+                source_name=source_name,
+                source_type=SourceType.DOCKER_ENGINE,
+            )
+        )
+    return result
+
+
 class DockerEngineService:
     """Manage images on a Docker Engine via docker.sock or TCP."""
 
-    def __init__(self, connection: dict[str, Any]):
+    def __init__(self, connection: dict[str, Any], source_id: str | None = None):
+        self.source_id = source_id
         host = connection.get("host")
         socket_path = connection.get("socket_path", "/var/run/docker.sock")
         use_tls = connection.get("tls", False)
@@ -44,72 +159,117 @@ class DockerEngineService:
     # ------------------------------------------------------------------
 
     def get_running_tags(self) -> set[str]:
-        """Return set of image:tag strings currently used by running containers."""
-        running: set[str] = set()
+        """Return image references used by running containers.
+
+        Contains every ``repo:tag`` and ``repo@digest`` of each running
+        image plus the image IDs themselves, so a container started by
+        digest, or whose tag has since moved elsewhere, still protects the
+        image it runs.  Costs two API calls however many containers run:
+        container summaries carry ``ImageID``, which is joined against one
+        image listing.
+        """
         try:
-            for ctr in self.client.containers.list(all=False):
-                img_tags = ctr.image.tags if ctr.image else []
-                for t in img_tags:
-                    running.add(t)
+            return running_refs(self.client.api.containers(), self.list_image_records())
         except DockerException as exc:
             log.warning("Failed to list running containers: %s", exc)
-        return running
+            return set()
 
     # ------------------------------------------------------------------
     # Image listing
     # ------------------------------------------------------------------
 
+    def list_image_records(self) -> list[EngineImage]:
+        """All tagged and untagged top-level images from one ``/images/json`` call.
+
+        ``images.list()`` would inspect every image separately; the summary
+        already has what listings need.  Shared sizes and container counts
+        come from :meth:`disk_usage` instead.
+        """
+        return [EngineImage.from_summary(d) for d in self.client.api.images()]
+
     def list_images(self, source_id: str, source_name: str) -> list[ImageInfo]:
         """List all images grouped by repository name."""
-        running_tags = self.get_running_tags()
-        repo_map: dict[str, list[TagInfo]] = {}
-
         try:
-            images = self.client.images.list(all=False)
+            records = self.list_image_records()
         except DockerException as exc:
             log.error("Failed to list images: %s", exc)
             return []
 
-        for img in images:
-            for full_tag in img.tags:
-                # full_tag looks like  "repo:tag" or "registry/repo:tag"
-                if ":" in full_tag:
-                    repo, tag = full_tag.rsplit(":", 1)
-                else:
-                    repo, tag = full_tag, "latest"
-
-                created = img.attrs.get("Created", "")
-                size = img.attrs.get("Size", 0)
-                img_id = img.id
-
-                tag_info = TagInfo(
-                    tag=tag,
-                    digest=img_id,
-                    size=size,
-                    created=created,
-                    is_running=full_tag in running_tags,
-                )
-
-                repo_map.setdefault(repo, []).append(tag_info)
-
-        result: list[ImageInfo] = []
-        for repo, tags in sorted(repo_map.items()):
-            result.append(
-                ImageInfo(
-                    name=repo,
-                    tag_count=len(tags),
-                    tags=sorted(tags, key=lambda t: t.created or "", reverse=True),
-                    source_id=source_id,
-                    source_name=source_name,
-                    source_type=SourceType.DOCKER_ENGINE,
-                )
-            )
-        return result
+        try:
+            running_tags = running_refs(self.client.api.containers(), records)
+        except DockerException as exc:
+            log.warning("Failed to list running containers: %s", exc)
+            running_tags = set()
+
+        return build_images(records, running_tags, source_id, source_name)
+
+    def disk_usage(self) -> DiskUsage:
+        """Image sizes and total layer bytes from ``GET /system/df``.
+
+        Unlike ``Size``, ``Size - SharedSize`` is what removing an image
+        actually frees, and ``Containers`` counts stopped containers too.
+        """
+        df = self.client.api.df()
+        images = {
+            img.id: img for img in map(EngineImage.from_summary, df.get("Images") or [])
+        }
+        return DiskUsage(images, df.get("LayersSize") or 0)
+
+    def iter_images(self, source_id: str, source_name: str) -> Iterator[ImageInfo]:
+        """Streaming :meth:`list_images`; the engine answers in one call."""
+        yield from self.list_images(source_id, source_name)
+
+    # ------------------------------------------------------------------
+    def get_manifest_digest(self, image_name: str, tag: str) -> str | None:
+        """Image ID ``image_name:tag`` points at now, ``None`` if untagged."""
+        try:
+            return self.client.api.inspect_image(f"{image_name}:{tag}").get("Id")
+        except NotFound:
+            return None
+
+    def get_image_tags(self, image_id: str) -> list[str] | None:
+        """``repo:tag`` references of an image ID, ``None`` if it is gone."""
+        try:
+            return self.client.api.inspect_image(image_id).get("RepoTags") or []
+        except NotFound:
+            return None
 
     # ------------------------------------------------------------------
     # Deletion
     # ------------------------------------------------------------------
 
+    def remove_image_id(self, image_id: str) -> bool:
+        """Remove an image and all of its tags at once.
+
+        Forced, because the daemon refuses to remove an ID referenced by
+        several tags otherwise – and a forced removal also untags images
+        that stopped containers still use.  Only call this once every tag
+        is meant to go and ``system df`` reports no container for the image.
+        """
+        try:
+            self.client.api.remove_image(image_id, force=True)
+            log.info("Deleted image %s", image_id)
+            return True
+        except APIError as exc:
+            log.error("Failed to delete %s: %s", image_id, exc)
+            return False
+
+    def prune_images(self) -> int:
+        """Remove dangling images; returns the bytes the daemon reclaimed."""
+        try:
+            return self.client.api.prune_images(filters={"dangling": True}).get("SpaceReclaimed") or 0
+        except APIError as exc:
+            log.error("Failed to prune dangling images: %s", exc)
+            return 0
+
+    def prune_build_cache(self) -> int:
+        """Remove unused build cache; returns the bytes the daemon reclaimed."""
+        try:
+            return self.client.api.prune_builds().get("SpaceReclaimed") or 0
+        except APIError as exc:
+            log.error("Failed to prune build cache: %s", exc)
+            return 0
+
     def delete_image(self, image_name: str, tag: str, force: bool = False) -> bool:
         """Delete a specific image:tag. Returns True on success."""
         full = f"{image_name}:{tag}"
@@ -0,0 +1,233 @@
+"""Event-driven Docker Engine inventory.
+
+For engines with ``watch_events`` enabled, one :class:`EngineWatcher`
+thread per source follows the daemon's ``/events`` stream and keeps an
+in-memory index of images and running containers.  A full listing only
+happens when the stream (re)connects; after that each image or container
+event updates the index, and listings are served from it.
+
+Changes are coalesced for :data:`_PUBLISH_DELAY` seconds and then handed
+to an ``on_change`` callback, which the inventory uses to publish a fresh
+snapshot – so running-container protection follows the engine in near
+real time instead of on the refresh interval.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable
+
+from docker.errors import DockerException, NotFound
+
+from app.models import ImageInfo, Source
+from app.services.docker_engine import DockerEngineService, EngineImage, build_images, running_refs
+from app.services.http_clients import fingerprint
+from app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_PUBLISH_DELAY = 0.5
+_RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+# Image events after which the image is re-inspected; "delete" drops it.
+_IMAGE_UPDATES = frozenset({"pull", "tag", "untag", "import", "load"})
+_CONTAINER_STOPS = frozenset({"die", "destroy"})
+
+
+class EngineWatcher:
+    """Image/running-container index of one engine, kept current from events."""
+
+    def __init__(self, source: Source, on_change: Callable[[EngineWatcher], None]):
+        self.source_id = source.id
+        self.fingerprint = fingerprint(source.connection)
+        self._connection = source.connection
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._images: dict[str, EngineImage] = {}  # image ID → record
+        self._containers: dict[str, dict[str, Any]] = {}  # running container ID → summary
+        self._synced = threading.Event()
+        self._stop = threading.Event()
+        self._stream: Any = None
+        self._timer: threading.Timer | None = None
+        self._built: tuple[int, list[ImageInfo]] | None = None
+        self.version = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"dim-engine-events-{source.id[:8]}", daemon=True
+        )
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def wait_synced(self, timeout: float) -> bool:
+        return self._synced.wait(timeout)
+
+    def _running_tags(self) -> set[str]:
+        return running_refs(list(self._containers.values()), self._images.values())
+
+    def list_images(self, source_id: str, source_name: str) -> list[ImageInfo]:
+        """Images from the index; rebuilt only after the index changed."""
+        with self._lock:
+            if self._built is not None and self._built[0] == self.version:
+                return self._built[1]
+            version = self.version
+            images = list(self._images.values())
+            running = self._running_tags()
+        built = build_images(images, running, source_id, source_name)
+        with self._lock:
+            if self.version == version:
+                self._built = (version, built)
+        return built
+
+    # ------------------------------------------------------------------
+    # Event loop
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        attempt = 0
+        while not self._stop.is_set():
+            svc = None
+            try:
+                svc = DockerEngineService(self._connection, source_id=self.source_id)
+                # Subscribe from before the resync so nothing slips between
+                # the two; replayed events are idempotent re-inspections.
+                since = int(time.time()) - 1
+                self._resync(svc)
+                self._stream = svc.client.events(
+                    since=since, decode=True, filters={"type": ["image", "container"]}
+                )
+                attempt = 0
+                for event in self._stream:
+                    if self._stop.is_set():
+                        break
+                    self._apply(svc, event)
+            except Exception as exc:
+                if not self._stop.is_set():
+                    log.warning("Event stream of engine %s lost: %s", self.source_id, exc)
+            finally:
+                self._synced.clear()
+                if svc is not None:
+                    svc.client.close()
+            delay = _RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)]
+            attempt += 1
+            self._stop.wait(delay)
+
+    def _resync(self, svc: DockerEngineService) -> None:
+        images = {img.id: img for img in svc.list_image_records()}
+        containers = {c["Id"]: c for c in svc.client.api.containers()}
+        with self._lock:
+            self._images = images
+            self._containers = containers
+            self._synced.set()
+            self._changed()
+        log.info("Engine %s synced: %d images, %d running containers",
+                 self.source_id, len(images), len(containers))
+
+    def _apply(self, svc: DockerEngineService, event: dict[str, Any]) -> None:
+        kind = event.get("Type")
+        action = event.get("Action", "")
+        actor = (event.get("Actor") or {}).get("ID") or event.get("id", "")
+        try:
+            if kind == "image" and action == "delete":
+                with self._lock:
+                    if self._images.pop(actor, None) is not None:
+                        self._changed()
+            elif kind == "image" and action in _IMAGE_UPDATES:
+                self._upsert_image(svc, actor)
+            elif kind == "container" and action == "start":
+                inspected = svc.client.api.inspect_container(actor)
+                # Same keys as a /containers/json summary
+                summary = {
+                    "Id": actor,
+                    "ImageID": inspected.get("Image"),
+                    "Image": (inspected.get("Config") or {}).get("Image"),
+                }
+                with self._lock:
+                    self._containers[actor] = summary
+                    self._changed()
+            elif kind == "container" and action in _CONTAINER_STOPS:
+                with self._lock:
+                    if self._containers.pop(actor, None) is not None:
+                        self._changed()
+        except NotFound:
+            pass  # gone again before we looked; a later event covers it
+        except DockerException as exc:
+            log.warning("Failed to apply %s %s event on engine %s: %s", kind, action, self.source_id, exc)
+
+    def _upsert_image(self, svc: DockerEngineService, ref: str) -> None:
+        try:
+            image = EngineImage.from_inspect(svc.client.api.inspect_image(ref))
+        except NotFound:
+            return
+        tags = set(image.repo_tags)
+        with self._lock:
+            # A repo:tag names one image; drop it from whichever held it before.
+            for other in self._images.values():
+                if other.id != image.id and tags.intersection(other.repo_tags):
+                    other.repo_tags = tuple(t for t in other.repo_tags if t not in tags)
+            self._images[image.id] = image
+            self._changed()
+
+    def _changed(self) -> None:
+        # Caller holds self._lock
+        self.version += 1
+        if self._timer is None and self._synced.is_set():
+            self._timer = threading.Timer(_PUBLISH_DELAY, self._publish)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _publish(self) -> None:
+        with self._lock:
+            self._timer = None
+        try:
+            self._on_change(self)
+        except Exception as exc:
+            log.error("Failed to publish engine %s inventory: %s", self.source_id, exc)
+
+    def stop(self) -> None:
+        self._stop.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+
+
+_watchers: dict[str, EngineWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(source: Source, on_change: Callable[[EngineWatcher], None]) -> EngineWatcher:
+    """Watcher for *source*, (re)started if missing or its connection changed."""
+    fp = fingerprint(source.connection)
+    stale = None
+    with _watchers_lock:
+        watcher = _watchers.get(source.id)
+        if watcher is None or watcher.fingerprint != fp:
+            stale = watcher
+            watcher = _watchers[source.id] = EngineWatcher(source, on_change)
+    if stale is not None:
+        stale.stop()
+    return watcher
+
+
+def release(source_id: str) -> None:
+    """Stop the watcher of an edited or deleted source."""
+    with _watchers_lock:
+        watcher = _watchers.pop(source_id, None)
+    if watcher is not None:
+        watcher.stop()
+
+
+def stop_all() -> None:
+    with _watchers_lock:
+        watchers = list(_watchers.values())
+        _watchers.clear()
+    for watcher in watchers:
+        watcher.stop()
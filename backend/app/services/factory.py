@@ -0,0 +1,27 @@
+"""Service factory – maps a configured source to its client service."""
+
+from __future__ import annotations
+
+from app.models import Source, SourceType
+from app.services.artifactory import ArtifactoryService
+from app.services.docker_engine import DockerEngineService
+from app.services.private_registry import PrivateRegistryService
+
+
+def get_service_class(stype: SourceType):
+    """Service class handling a source type (``None`` if unknown)."""
+    if stype == SourceType.DOCKER_ENGINE:
+        return DockerEngineService
+    elif stype == SourceType.PRIVATE_REGISTRY:
+        return PrivateRegistryService
+    elif stype == SourceType.ARTIFACTORY:
+        return ArtifactoryService
+    return None
+
+
+def get_service(source: Source):
+    """Instantiate the correct service for a source (``None`` if unknown)."""
+    cls = get_service_class(source.type)
+    if cls is None:
+        return None
+    return cls(source.connection, source_id=source.id)
@@ -0,0 +1,166 @@
+"""Source-scoped pool of keep-alive HTTP clients.
+
+Every configured source gets one sync ``httpx.Client`` and one
+``httpx.AsyncClient`` per service kind, reused across API requests so
+connections (and TLS sessions) survive between calls.  A pool entry is
+rebuilt only when the source's connection dict changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from app.utils import aio
+from app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# HTTP/2 needs the optional ``h2`` package (``httpx[http2]``).
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_RETRY_ATTEMPTS = 4
+_RETRY_BACKOFF = 0.5
+_RETRY_MAX_DELAY = 30.0
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    options: dict[str, Any]
+    sync: httpx.Client | None = None
+    async_: httpx.AsyncClient | None = None
+
+
+_lock = threading.Lock()
+_pool: dict[str, dict[str, _Entry]] = {}  # source key → kind → entry
+
+
+def fingerprint(connection: dict[str, Any]) -> str:
+    """Stable hash of a connection dict, used to detect edits."""
+    raw = json.dumps(connection, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry(source_key: str, kind: str, connection: dict[str, Any], options: dict[str, Any]) -> _Entry:
+    fp = fingerprint(connection)
+    stale: _Entry | None = None
+    with _lock:
+        kinds = _pool.setdefault(source_key, {})
+        entry = kinds.get(kind)
+        if entry is None or entry.fingerprint != fp:
+            stale = entry
+            entry = _Entry(fingerprint=fp, options=options)
+            kinds[kind] = entry
+    if stale is not None:
+        _close_entry(stale)
+    return entry
+
+
+def get_client(
+    source_key: str, kind: str, connection: dict[str, Any], **options: Any
+) -> httpx.Client:
+    """Return the pooled sync client for ``(source_key, kind)``."""
+    entry = _entry(source_key, kind, connection, options)
+    with _lock:
+        if entry.sync is None:
+            entry.sync = httpx.Client(http2=_HTTP2, **entry.options)
+        return entry.sync
+
+
+def get_async_client(
+    source_key: str, kind: str, connection: dict[str, Any], **options: Any
+) -> httpx.AsyncClient:
+    """Return the pooled async client for ``(source_key, kind)``.
+
+    The client is bound to the shared loop in :mod:`app.utils.aio`; only
+    await it from coroutines running there.
+    """
+    entry = _entry(source_key, kind, connection, options)
+    with _lock:
+        if entry.async_ is None:
+            entry.async_ = httpx.AsyncClient(http2=_HTTP2, **entry.options)
+        return entry.async_
+
+
+def _retry_delay(r: httpx.Response | None, attempt: int) -> float:
+    if r is not None:
+        try:
+            return min(float(r.headers["Retry-After"]), _RETRY_MAX_DELAY)
+        except (KeyError, ValueError):
+            pass
+    delay = _RETRY_BACKOFF * (2 ** attempt)
+    return min(delay + random.uniform(0, delay / 2), _RETRY_MAX_DELAY)
+
+
+def request_with_retry(client: httpx.Client, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """Send a request, retrying 429/5xx and transport errors with backoff.
+
+    Honours ``Retry-After`` when the server sends one.  The last response
+    is returned as-is; the last transport error is re-raised.
+    """
+    attempt = 0
+    while True:
+        last = attempt + 1 >= _RETRY_ATTEMPTS
+        try:
+            r = client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            if last:
+                raise
+            log.warning("%s %s failed (%s), retrying", method, url, exc)
+            time.sleep(_retry_delay(None, attempt))
+        else:
+            if r.status_code not in RETRY_STATUSES or last:
+                return r
+            log.warning("%s %s returned %s, retrying", method, url, r.status_code)
+            time.sleep(_retry_delay(r, attempt))
+        attempt += 1
+
+
+def _close_entry(entry: _Entry) -> None:
+    if entry.sync is not None:
+        try:
+            entry.sync.close()
+        except Exception as exc:
+            log.warning("Error closing HTTP client: %s", exc)
+    if entry.async_ is None:
+        return
+    if aio.in_loop():
+        # Blocking here would deadlock the loop the close has to run on
+        aio.spawn(entry.async_.aclose()).add_done_callback(_log_close_error)
+        return
+    try:
+        aio.run_sync(entry.async_.aclose(), timeout=10)
+    except Exception as exc:
+        log.warning("Error closing async HTTP client: %s", exc)
+
+
+def _log_close_error(future: Future[None]) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        log.warning("Error closing async HTTP client: %s", future.exception())
+
+
+def release(source_key: str) -> None:
+    """Close and forget every client belonging to *source_key*."""
+    with _lock:
+        kinds = _pool.pop(source_key, {})
+    for entry in kinds.values():
+        _close_entry(entry)
+
+
+def close_all() -> None:
+    """Close every pooled client (application shutdown)."""
+    with _lock:
+        keys = list(_pool)
+    for key in keys:
+        release(key)
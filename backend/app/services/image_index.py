@@ -0,0 +1,223 @@
+"""Sorted, filterable index over inventory snapshots for paged image queries.
+
+Each snapshot is reduced once to one :class:`IndexRow` per image with the
+sort keys precomputed; the merged, sorted order of the current snapshots
+is cached per sort key, so paging through ``/api/images`` never relists a
+backend and never re-sorts until a snapshot changes.
+
+Pagination is keyset based: the cursor carries the sort key of the last
+row returned, so pages stay consistent while snapshots are refreshed.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import fnmatch
+import json
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterator, Literal
+
+from app.models import ImageInfo, SourceType
+from app.services.inventory import Snapshot
+from app.services.retention import parse_created
+
+SortField = Literal["name", "size", "tag_count", "created"]
+
+_GLOB_CHARS = frozenset("*?[")
+_MAX_TOTALS = 64  # cached match counts per index
+
+
+@dataclass(frozen=True, slots=True)
+class IndexRow:
+    image: ImageInfo
+    size: int  # sum of reported tag sizes
+    created: float  # newest tag's creation time (epoch), -inf if unknown
+
+    @classmethod
+    def of(cls, image: ImageInfo) -> IndexRow:
+        return cls(
+            image=image,
+            size=sum(t.size or 0 for t in image.tags),
+            created=max((parse_created(t.created) for t in image.tags), default=-math.inf),
+        )
+
+    def key(self, sort: SortField) -> tuple[Any, ...]:
+        img = self.image
+        if sort == "name":
+            return (img.name, img.source_id)
+        value = self.size if sort == "size" else img.tag_count if sort == "tag_count" else self.created
+        return (value, img.name, img.source_id)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort: SortField, order: str, key: tuple[Any, ...]) -> str:
+    if sort == "created" and key[0] == -math.inf:
+        key = (None, *key[1:])  # JSON has no infinity
+    raw = json.dumps([sort, order, list(key)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _valid_key(sort: SortField, key: Any) -> bool:
+    # Keys are compared with the index's own, so their shape must match IndexRow.key
+    if not isinstance(key, list):
+        return False
+    if sort == "name":
+        return len(key) == 2 and all(isinstance(v, str) for v in key)
+    if len(key) != 3 or not all(isinstance(v, str) for v in key[1:]):
+        return False
+    if sort == "created":
+        return key[0] is None or _is_int(key[0]) or isinstance(key[0], float)
+    return _is_int(key[0])
+
+
+def decode_cursor(cursor: str, sort: SortField, order: str) -> tuple[Any, ...]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        c_sort, c_order, key = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if (c_sort, c_order) != (sort, order):
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    if not _valid_key(sort, key):
+        raise InvalidCursor("Malformed cursor")
+    if sort == "created":
+        key[0] = -math.inf if key[0] is None else float(key[0])
+    return tuple(key)
+
+
+def name_matcher(pattern: str) -> Callable[[str], bool]:
+    """Glob match if *pattern* has wildcards, otherwise a name prefix match."""
+    if _GLOB_CHARS.intersection(pattern):
+        return lambda name: fnmatch.fnmatchcase(name, pattern)
+    return lambda name: name.startswith(pattern)
+
+
+@dataclass
+class Page:
+    items: list[ImageInfo]
+    next_cursor: str | None
+    total: int
+
+
+class ImageIndex:
+    """Rows of a fixed set of snapshots, sorted lazily per sort field."""
+
+    def __init__(self, snapshots: list[Snapshot]):
+        self.rows = [IndexRow.of(img) for snap in snapshots for img in snap.images]
+        self._orders: dict[SortField, tuple[list[IndexRow], list[tuple[Any, ...]]]] = {}
+        self._totals: OrderedDict[Hashable, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ordered(self, sort: SortField) -> tuple[list[IndexRow], list[tuple[Any, ...]]]:
+        with self._lock:
+            if sort not in self._orders:
+                rows = sorted(self.rows, key=lambda r: r.key(sort))
+                self._orders[sort] = (rows, [r.key(sort) for r in rows])
+            return self._orders[sort]
+
+    def _total(self, predicate: Callable[[ImageInfo], bool], filter_key: Hashable | None) -> int:
+        if filter_key is not None:
+            with self._lock:
+                if filter_key in self._totals:
+                    self._totals.move_to_end(filter_key)
+                    return self._totals[filter_key]
+        total = sum(1 for r in self.rows if predicate(r.image))
+        if filter_key is not None:
+            with self._lock:
+                self._totals[filter_key] = total
+                while len(self._totals) > _MAX_TOTALS:
+                    self._totals.popitem(last=False)
+        return total
+
+    def _walk(self, sort: SortField, desc: bool, after: tuple[Any, ...] | None) -> Iterator[IndexRow]:
+        rows, keys = self._ordered(sort)
+        if desc:
+            start = bisect_left(keys, after) - 1 if after is not None else len(rows) - 1
+            return (rows[i] for i in range(start, -1, -1))
+        start = bisect_right(keys, after) if after is not None else 0
+        return (rows[i] for i in range(start, len(rows)))
+
+    def query(
+        self,
+        predicate: Callable[[ImageInfo], bool],
+        sort: SortField = "name",
+        order: Literal["asc", "desc"] = "asc",
+        limit: int | None = None,
+        cursor: str | None = None,
+        filter_key: Hashable | None = None,
+    ) -> Page:
+        """Rows matching *predicate* in sort order, at most *limit* after *cursor*.
+
+        *filter_key* identifies what *predicate* matches; when given, the
+        match count is computed once per index instead of on every page.
+        Raises :class:`InvalidCursor` for a cursor from another sort order.
+        """
+        after = decode_cursor(cursor, sort, order) if cursor else None
+        total = self._total(predicate, filter_key)
+        items: list[IndexRow] = []
+        next_cursor = None
+        for row in self._walk(sort, order == "desc", after):
+            if not predicate(row.image):
+                continue
+            if limit is not None and len(items) == limit:
+                next_cursor = encode_cursor(sort, order, items[-1].key(sort))
+                break
+            items.append(row)
+        return Page([r.image for r in items], next_cursor, total)
+
+
+def image_filter(
+    name: str | None = None,
+    source_ids: list[str] | None = None,
+    source_types: list[SourceType] | None = None,
+    extra: Callable[[ImageInfo], bool] | None = None,
+) -> Callable[[ImageInfo], bool]:
+    """Combine the query filters; the cheap ones run before *extra*."""
+    matches = name_matcher(name) if name else None
+    ids = set(source_ids or ())
+    types = set(source_types or ())
+
+    def predicate(img: ImageInfo) -> bool:
+        if ids and img.source_id not in ids:
+            return False
+        if types and img.source_type not in types:
+            return False
+        if matches is not None and not matches(img.name):
+            return False
+        return extra is None or extra(img)
+
+    return predicate
+
+
+_MAX_CACHED = 4
+
+_cache: OrderedDict[tuple[tuple[str, float], ...], ImageIndex] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_image_index(snapshots: list[Snapshot]) -> ImageIndex:
+    """Index over *snapshots*, reused until any of them is replaced."""
+    ident = tuple((s.source_id, s.generated_at) for s in snapshots)
+    with _cache_lock:
+        index = _cache.get(ident)
+        if index is not None:
+            _cache.move_to_end(ident)
+            return index
+    index = ImageIndex(snapshots)
+    with _cache_lock:
+        _cache[ident] = index
+        while len(_cache) > _MAX_CACHED:
+            _cache.popitem(last=False)
+    return index
@@ -0,0 +1,314 @@
+"""In-process inventory snapshots served with stale-while-revalidate.
+
+Each source's image listing is kept as an immutable :class:`Snapshot`.
+Reads return the current snapshot straight away and, when it is older
+than the refresh interval, trigger one background relisting – however
+many readers ask at once.  A background task keeps every enabled source
+warm on the interval configured in ``inventory_refresh_interval``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Iterator
+from datetime import datetime, timezone
+
+from app.config import get_current_config
+from app.models import ImageInfo, Source, SourceType
+from app.services import engine_watch
+from app.services.factory import get_service
+from app.services.manifest_cache import get_manifest_cache
+from app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_MAX_WORKERS = 8
+_ENGINE_SYNC_WAIT = 30.0  # seconds a listing waits for an engine watcher's first sync
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    source_id: str
+    images: list[ImageInfo]
+    generated_at: float  # epoch seconds
+    duration: float  # seconds the listing took
+    error: str | None = None
+    digest: str = ""  # content hash, set when the snapshot is stored
+    # Set on the last good snapshot handed to a refresh that failed: the
+    # images are older than the caller asked for.
+    refresh_error: str | None = None
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.generated_at)
+
+
+def snapshot_headers(snapshots: list[Snapshot]) -> dict[str, str]:
+    """``Age``/``X-Generated-At`` headers for the oldest of *snapshots*."""
+    if not snapshots:
+        return {}
+    oldest = min(snapshots, key=lambda snap: snap.generated_at)
+    generated_at = datetime.fromtimestamp(oldest.generated_at, tz=timezone.utc)
+    return {"Age": str(int(oldest.age)), "X-Generated-At": generated_at.isoformat()}
+
+
+def content_digest(images: list[ImageInfo], error: str | None = None) -> str:
+    """Hash of what a listing returned, independent of when it was taken."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update((error or "").encode())
+    for img in images:
+        h.update(b"\0")
+        h.update(img.model_dump_json().encode())
+    return h.hexdigest()
+
+
+def _publish_engine(watcher: engine_watch.EngineWatcher) -> None:
+    source = next((s for s in get_current_config().sources if s.id == watcher.source_id), None)
+    if source is not None and source.enabled:
+        get_inventory().publish(source.id, watcher.list_images(source.id, source.name))
+
+
+def _watched_images(source: Source) -> list[ImageInfo] | None:
+    """Listing from the engine's event-driven index, if it is enabled and synced."""
+    if source.type != SourceType.DOCKER_ENGINE or not source.connection.get("watch_events"):
+        return None
+    watcher = engine_watch.get_watcher(source, _publish_engine)
+    if not watcher.wait_synced(_ENGINE_SYNC_WAIT):
+        return None  # still (re)connecting – list directly instead
+    return watcher.list_images(source.id, source.name)
+
+
+def _list_source(source: Source) -> list[ImageInfo]:
+    images = _watched_images(source)
+    if images is not None:
+        return images
+    svc = get_service(source)
+    if svc is None:
+        return []
+    return svc.list_images(source.id, source.name)
+
+
+def _iter_source(source: Source) -> Iterator[ImageInfo]:
+    images = _watched_images(source)
+    if images is not None:
+        yield from images
+        return
+    svc = get_service(source)
+    if svc is not None:
+        yield from svc.iter_images(source.id, source.name)
+
+
+def _chain(src: Future[Snapshot], dst: Future[Snapshot]) -> None:
+    if src.cancelled():
+        dst.cancel()
+    elif src.exception() is not None:
+        dst.set_exception(src.exception())
+    else:
+        dst.set_result(src.result())
+
+
+class InventoryStore:
+    """Per-source snapshots with de-duplicated background refreshes."""
+
+    def __init__(self, max_workers: int = _MAX_WORKERS):
+        self._lock = threading.Lock()
+        self._snapshots: dict[str, Snapshot] = {}
+        self._inflight: dict[str, Future[Snapshot]] = {}
+        self._epochs: Counter[str] = Counter()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="dim-inventory")
+        self.generation = 0  # bumped whenever any snapshot's content changes
+
+    def peek(self, source_id: str) -> Snapshot | None:
+        with self._lock:
+            return self._snapshots.get(source_id)
+
+    def refresh(self, source: Source) -> Future[Snapshot]:
+        """Start relisting *source* unless a refresh is already running."""
+        with self._lock:
+            future = self._inflight.get(source.id)
+            if future is None:
+                future = self._pool.submit(self._load, source, self._epochs[source.id])
+                self._inflight[source.id] = future
+                future.add_done_callback(lambda f, sid=source.id: self._settle(sid, f))
+            return future
+
+    def _settle(self, source_id: str, future: Future[Snapshot]) -> None:
+        with self._lock:
+            if self._inflight.get(source_id) is future:
+                del self._inflight[source_id]
+
+    def _load(self, source: Source, epoch: int) -> Snapshot:
+        started = time.time()
+        try:
+            snapshot = Snapshot(source.id, _list_source(source), time.time(), time.time() - started)
+        except Exception as exc:
+            log.error("Error listing images from %s: %s", source.name, exc)
+            snapshot = Snapshot(source.id, [], time.time(), time.time() - started, str(exc))
+        return self._commit(source.id, epoch, snapshot)
+
+    def _commit(self, source_id: str, epoch: int, snapshot: Snapshot) -> Snapshot:
+        snapshot = replace(snapshot, digest=content_digest(snapshot.images, snapshot.error))
+        with self._lock:
+            current = self._snapshots.get(source_id)
+            if self._epochs[source_id] != epoch:
+                return snapshot  # source was edited/dropped while listing
+            if snapshot.error and current is not None and not current.error:
+                # Readers keep the last good listing; the refresher learns it failed
+                return replace(current, refresh_error=snapshot.error)
+            self._snapshots[source_id] = snapshot
+            if current is None or current.digest != snapshot.digest:
+                self.generation += 1
+                listed = self._registry_tags()
+            else:
+                listed = None
+        if listed is not None:
+            get_manifest_cache().fit(listed)
+        return snapshot
+
+    def _registry_tags(self) -> int:
+        # Caller holds self._lock.  Engines never use the manifest cache.
+        return sum(
+            len(img.tags)
+            for snap in self._snapshots.values()
+            for img in snap.images
+            if img.source_type != SourceType.DOCKER_ENGINE
+        )
+
+    def publish(self, source_id: str, images: list[ImageInfo]) -> Snapshot:
+        """Store a listing produced outside :meth:`refresh`, e.g. from engine events."""
+        with self._lock:
+            epoch = self._epochs[source_id]
+        return self._commit(source_id, epoch, Snapshot(source_id, images, time.time(), 0.0))
+
+    def read(self, source: Source, max_age: float, refresh: bool = False) -> Snapshot:
+        """Blocking read: cached snapshot (revalidated if stale) or a fresh one."""
+        snapshot = self.peek(source.id)
+        if snapshot is not None and not refresh:
+            if snapshot.age >= max_age:
+                self.refresh(source)
+            return snapshot
+        return self.refresh(source).result()
+
+    async def aread(
+        self,
+        source: Source,
+        max_age: float,
+        refresh: bool = False,
+        timeout: float | None = None,
+    ) -> Snapshot:
+        """Async :meth:`read`; waits at most *timeout* for a listing.
+
+        On timeout the previous snapshot is returned if there is one,
+        otherwise ``asyncio.TimeoutError`` propagates.  The listing keeps
+        running either way and lands in the store when it finishes.
+        """
+        snapshot = self.peek(source.id)
+        if snapshot is not None and not refresh:
+            if snapshot.age >= max_age:
+                self.refresh(source)
+            return snapshot
+        future = asyncio.wrap_future(self.refresh(source))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if snapshot is not None:
+                return snapshot
+            raise
+
+    def stream(self, source: Source, max_age: float, refresh: bool = False) -> Iterator[ImageInfo]:
+        """Blocking :meth:`read` that yields images as they become available.
+
+        A usable snapshot is replayed as is.  Otherwise the caller's thread
+        does the listing itself, yielding each image as the service
+        resolves it, and the result becomes the new snapshot – unless the
+        consumer stops early, in which case a background refresh takes over.
+        Raises ``RuntimeError`` when the listing fails.
+        """
+        snapshot = self.peek(source.id)
+        if snapshot is not None and not refresh:
+            if snapshot.age >= max_age:
+                self.refresh(source)
+            yield from snapshot.images
+            return
+
+        with self._lock:
+            future = self._inflight.get(source.id)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[source.id] = future
+                future.add_done_callback(lambda f, sid=source.id: self._settle(sid, f))
+            epoch = self._epochs[source.id]
+        if not owner:
+            snapshot = future.result()
+            if snapshot.error:
+                raise RuntimeError(snapshot.error)
+            yield from snapshot.images
+            return
+
+        started = time.time()
+        images: list[ImageInfo] = []
+        snapshot = None
+        listing = _iter_source(source)
+        try:
+            for img in listing:
+                images.append(img)
+                yield img
+            snapshot = Snapshot(source.id, images, time.time(), time.time() - started)
+        except Exception as exc:
+            log.error("Error listing images from %s: %s", source.name, exc)
+            snapshot = Snapshot(source.id, [], time.time(), time.time() - started, str(exc))
+            raise RuntimeError(str(exc)) from exc
+        finally:
+            listing.close()
+            if snapshot is not None:
+                future.set_result(self._commit(source.id, epoch, snapshot))
+            else:
+                # Abandoned mid-listing: hand waiters over to a normal refresh.
+                self._settle(source.id, future)
+                self.refresh(source).add_done_callback(lambda f: _chain(f, future))
+
+    def drop(self, source_id: str) -> None:
+        """Forget a source's snapshot, e.g. after it was edited or modified."""
+        with self._lock:
+            self._snapshots.pop(source_id, None)
+            self._inflight.pop(source_id, None)
+            self._epochs[source_id] += 1
+            self.generation += 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_store: InventoryStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_inventory() -> InventoryStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = InventoryStore()
+        return _store
+
+
+async def run_inventory_refresher() -> None:
+    """Background task keeping every enabled source's snapshot warm."""
+    store = get_inventory()
+    while True:
+        interval = get_current_config().inventory_refresh_interval
+        try:
+            if interval > 0:
+                for source in get_current_config().sources:
+                    snapshot = store.peek(source.id)
+                    if source.enabled and (snapshot is None or snapshot.age >= interval):
+                        store.refresh(source)
+        except Exception as exc:
+            log.error("Error in inventory refresher: %s", exc)
+        await asyncio.sleep(max(5.0, interval / 4) if interval > 0 else 60.0)
@@ -0,0 +1,73 @@
+"""Reference-counted blob graph used to estimate bytes freed by a cleanup.
+
+Nodes are the deletable units of a source (a manifest within a repository
+for registries, an image ID for Docker Engine).  Each node references a
+set of blobs, and a blob is reclaimable only once every node referencing
+it is gone – so shared base layers and tags aliasing one digest are
+counted once, and only when nothing kept still needs them.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable
+
+NodeKey = tuple[str, str]
+
+
+class LayerGraph:
+    """Blob reference counts of one source, built from listed tags."""
+
+    def __init__(self) -> None:
+        self._node_tags: Counter[NodeKey] = Counter()
+        self._node_blobs: dict[NodeKey, dict[str, int]] = {}
+        self._blob_refs: Counter[str] = Counter()
+        self._pinned: set[NodeKey] = set()
+
+    def add_tag(self, node: NodeKey, blobs: dict[str, int], pinned: bool = False) -> None:
+        """Register one tag pointing at *node*, which references *blobs*.
+
+        A *pinned* node survives losing all its tags (e.g. an engine image
+        still used by a stopped container), so its blobs are never freed.
+        """
+        self._node_tags[node] += 1
+        if pinned:
+            self._pinned.add(node)
+        if node not in self._node_blobs:
+            self._node_blobs[node] = blobs
+            self._blob_refs.update(blobs.keys())
+
+    def tag_count(self, node: NodeKey) -> int:
+        return self._node_tags.get(node, 0)
+
+    def is_pinned(self, node: NodeKey) -> bool:
+        return node in self._pinned
+
+    def freed(self, deleted: Iterable[NodeKey]) -> dict[NodeKey, int]:
+        """Unique bytes released per node when the given tags are deleted.
+
+        *deleted* holds one entry per deleted tag.  A node is removed only
+        when all of its tags are deleted; a blob is released only when all
+        nodes referencing it are removed, and is credited to the first
+        removed node that references it.
+        """
+        counts = Counter(deleted)
+        removed = [
+            n for n, c in counts.items()
+            if c >= self._node_tags.get(n, 0) > 0 and n not in self._pinned
+        ]
+        dropped: Counter[str] = Counter()
+        for node in removed:
+            dropped.update(self._node_blobs[node].keys())
+
+        result: dict[NodeKey, int] = {}
+        credited: set[str] = set()
+        for node in removed:
+            total = 0
+            for blob, size in self._node_blobs[node].items():
+                if blob in credited or dropped[blob] < self._blob_refs[blob]:
+                    continue
+                credited.add(blob)
+                total += size
+            result[node] = total
+        return result
@@ -0,0 +1,188 @@
+"""Content-addressed cache for registry manifests and config blobs.
+
+Anything fetched by digest is immutable, so entries keyed by
+``(source_id, digest)`` never need revalidation.  Only tag → digest
+resolution can change; the cache remembers the last digest seen per tag
+so listings can revalidate with a conditional request instead of
+downloading the manifest again.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from app.config import (
+    get_manifest_cache_auto_size,
+    get_manifest_cache_dir,
+    get_manifest_cache_size,
+)
+from app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Only well-formed digests and plain source IDs become file names
+_DIGEST_RE = re.compile(r"[a-z0-9+._-]+:[a-fA-F0-9]{32,}")
+_SOURCE_ID_RE = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._:-]*")
+
+# A listed tag needs its manifest and its config blob; the rest is
+# headroom for index children and tags appearing between relistings.
+ENTRIES_PER_TAG = 2.5
+
+
+def manifest_blobs(manifest: dict[str, Any]) -> dict[str, int]:
+    """Map every blob digest referenced by an image manifest to its size."""
+    blobs = [manifest.get("config") or {}, *(manifest.get("layers") or [])]
+    return {b["digest"]: b.get("size", 0) for b in blobs if b.get("digest")}
+
+
+class ManifestCache:
+    """LRU of JSON documents keyed by ``(source_id, digest)``.
+
+    Entries evicted from memory are written to *spill_dir* (when set) and
+    read back transparently on the next miss.  With *auto_size* the
+    capacity follows the inventory (see :meth:`fit`), never dropping below
+    *max_entries*.
+    """
+
+    def __init__(self, max_entries: int, spill_dir: Path | None = None, auto_size: bool = False):
+        self.max_entries = self.min_entries = max(1, max_entries)
+        self.auto_size = auto_size
+        self.spill_dir = spill_dir
+        self._lock = threading.Lock()
+        self._docs: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+        self._tags: dict[tuple[str, str, str], str] = {}
+
+    # ------------------------------------------------------------------
+    # Digest-addressed documents
+    # ------------------------------------------------------------------
+
+    def get(self, source_id: str, digest: str) -> dict[str, Any] | None:
+        key = (source_id, digest)
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+                return doc
+        doc = self._read_spill(key)
+        if doc is not None:
+            self.put(source_id, digest, doc)
+        return doc
+
+    def put(self, source_id: str, digest: str, doc: dict[str, Any]) -> None:
+        key = (source_id, digest)
+        evicted: list[tuple[tuple[str, str], dict[str, Any]]] = []
+        with self._lock:
+            self._docs[key] = doc
+            self._docs.move_to_end(key)
+            while len(self._docs) > self.max_entries:
+                evicted.append(self._docs.popitem(last=False))
+        for old_key, old_doc in evicted:
+            self._write_spill(old_key, old_doc)
+
+    def fit(self, listed_tags: int) -> None:
+        """Resize an auto-sized cache to hold every currently listed tag.
+
+        An LRU smaller than one full relisting evicts each entry before
+        the next relisting could reuse it, so nothing would ever hit.
+        """
+        if not self.auto_size:
+            return
+        evicted: list[tuple[tuple[str, str], dict[str, Any]]] = []
+        with self._lock:
+            self.max_entries = max(self.min_entries, int(listed_tags * ENTRIES_PER_TAG))
+            while len(self._docs) > self.max_entries:
+                evicted.append(self._docs.popitem(last=False))
+        for old_key, old_doc in evicted:
+            self._write_spill(old_key, old_doc)
+
+    def blob_sizes(self, source_id: str, digest: str) -> dict[str, int] | None:
+        """Blobs (config + layers) of a cached manifest, following indexes.
+
+        Returns ``None`` when the manifest, or one of an index's platform
+        manifests, is not cached.
+        """
+        entry = self.get(source_id, digest)
+        if entry is None or "manifest" not in entry:
+            return None
+        manifest = entry["manifest"]
+        blobs = manifest_blobs(manifest)
+        for child in manifest.get("manifests") or []:
+            child_blobs = self.blob_sizes(source_id, child.get("digest", ""))
+            if child_blobs is None:
+                return None
+            blobs.update(child_blobs)
+        return blobs
+
+    # ------------------------------------------------------------------
+    # Tag → digest memo
+    # ------------------------------------------------------------------
+
+    def get_tag(self, source_id: str, repo: str, tag: str) -> str | None:
+        with self._lock:
+            return self._tags.get((source_id, repo, tag))
+
+    def set_tag(self, source_id: str, repo: str, tag: str, digest: str) -> None:
+        with self._lock:
+            self._tags[(source_id, repo, tag)] = digest
+
+    def forget_tag(self, source_id: str, repo: str, tag: str) -> None:
+        with self._lock:
+            self._tags.pop((source_id, repo, tag), None)
+
+    # ------------------------------------------------------------------
+    # Disk spill
+    # ------------------------------------------------------------------
+
+    def _spill_path(self, key: tuple[str, str]) -> Path | None:
+        if self.spill_dir is None:
+            return None
+        source_id, digest = key
+        if not _DIGEST_RE.fullmatch(digest) or not _SOURCE_ID_RE.fullmatch(source_id):
+            return None
+        algo, _, hexpart = digest.partition(":")
+        return self.spill_dir / source_id / f"{algo}-{hexpart}.json"
+
+    def _read_spill(self, key: tuple[str, str]) -> dict[str, Any] | None:
+        path = self._spill_path(key)
+        if path is None or not path.is_file():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            log.warning("Discarding unreadable cache file %s: %s", path, exc)
+            return None
+
+    def _write_spill(self, key: tuple[str, str], doc: dict[str, Any]) -> None:
+        path = self._spill_path(key)
+        if path is None or path.exists():
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(doc), encoding="utf-8")
+            tmp.replace(path)
+        except OSError as exc:
+            log.warning("Failed to spill %s to disk: %s", key[1], exc)
+
+
+_cache: ManifestCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_manifest_cache() -> ManifestCache:
+    """Return the process-wide cache, created from env settings on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ManifestCache(
+                get_manifest_cache_size(),
+                get_manifest_cache_dir(),
+                auto_size=get_manifest_cache_auto_size(),
+            )
+        return _cache
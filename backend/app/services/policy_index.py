@@ -0,0 +1,278 @@
+"""Compiled image-policy lookup with glob/regex keys and tag patterns.
+
+``image_policies`` keys and ``protected_tags`` entries may be patterns:
+
+* ``name`` – exact match
+* ``team/*``, ``app-?``, ``[ab]pi`` – glob (``fnmatch``, case-sensitive)
+* ``re:<regex>`` – regular expression matching the whole name
+* ``semver:<range>`` – protected tags only, e.g. ``semver:>=1.0 <2``
+  (see :func:`app.utils.semver.parse_range`)
+
+An image takes the policy of the first key that matches, in this order:
+an exact key; then globs, longest literal prefix first (then longer
+pattern, then config order); then regexes in config order.
+
+Everything is compiled once per config version.  Globs sit in a trie
+keyed by their literal prefix, so an image name only meets globs whose
+prefix it starts with, and all regex keys are tried as one combined
+alternation; resolved policies are memoized per image name.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import re
+import threading
+from typing import Callable
+
+from app.config import get_config_version
+from app.models import AppConfig, ImagePolicy
+from app.services.retention import Retention, retention_for
+from app.utils.logger import get_logger
+from app.utils.semver import parse_range, parse_version
+
+log = get_logger(__name__)
+
+REGEX_PREFIX = "re:"
+SEMVER_PREFIX = "semver:"
+_GLOB_CHARS = frozenset("*?[")
+_BACKREF = re.compile(r"\\[1-9]")
+
+
+def _is_glob(pattern: str) -> bool:
+    return bool(_GLOB_CHARS.intersection(pattern))
+
+
+def _literal_prefix(glob: str) -> str:
+    for i, ch in enumerate(glob):
+        if ch in _GLOB_CHARS:
+            return glob[:i]
+    return glob
+
+
+def _combine(patterns: list[str]) -> re.Pattern[str] | None:
+    """One alternation of *patterns*; ``None`` if they cannot be combined.
+
+    Numbered backreferences or duplicate group names only work in a
+    pattern of their own, so such sets are matched one by one instead.
+    """
+    if any(_BACKREF.search(p) for p in patterns):
+        return None
+    try:
+        return re.compile("|".join(f"(?:{p})" for p in patterns))
+    except re.error:
+        return None
+
+
+def validate_image_pattern(key: str) -> None:
+    """Raise :class:`ValueError` if a policy key is not a usable pattern."""
+    if key.startswith(REGEX_PREFIX):
+        try:
+            re.compile(key[len(REGEX_PREFIX):])
+        except re.error as exc:
+            raise ValueError(f"Invalid regex {key!r}: {exc}") from exc
+
+
+def validate_tag_pattern(pattern: str) -> None:
+    """Raise :class:`ValueError` if a protected-tag entry is not usable."""
+    if pattern.startswith(SEMVER_PREFIX):
+        parse_range(pattern[len(SEMVER_PREFIX):])
+    else:
+        validate_image_pattern(pattern)
+
+
+class TagMatcher:
+    """Compiled ``protected_tags``: exact names, globs, regexes and semver ranges."""
+
+    def __init__(self, patterns: list[str]):
+        self.exact: frozenset[str] = frozenset(
+            p for p in patterns
+            if not p.startswith((REGEX_PREFIX, SEMVER_PREFIX)) and not _is_glob(p)
+        )
+        regexes: list[str] = []
+        self._ranges: list[Callable] = []
+        for p in patterns:
+            try:
+                if p.startswith(SEMVER_PREFIX):
+                    self._ranges.append(parse_range(p[len(SEMVER_PREFIX):]))
+                elif p.startswith(REGEX_PREFIX):
+                    validate_image_pattern(p)
+                    regexes.append(p[len(REGEX_PREFIX):])
+                elif _is_glob(p):
+                    regexes.append(fnmatch.translate(p))
+            except ValueError as exc:
+                log.warning("Ignoring protected tag pattern: %s", exc)
+        combined = _combine(regexes) if regexes else None
+        self._regexes = (
+            [combined.fullmatch] if combined is not None
+            else [re.compile(r).fullmatch for r in regexes]
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.exact or self._regexes or self._ranges)
+
+    def __call__(self, tag: str) -> bool:
+        if tag in self.exact:
+            return True
+        if any(match(tag) for match in self._regexes):
+            return True
+        if self._ranges:
+            version = parse_version(tag)
+            return version is not None and any(in_range(version) for in_range in self._ranges)
+        return False
+
+
+_NO_TAGS = TagMatcher([])
+
+
+class _TrieNode:
+    __slots__ = ("children", "globs")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # (match, key) for globs whose literal prefix ends here, in precedence order
+        self.globs: list[tuple[Callable, str]] = []
+
+
+class PolicyIndex:
+    """Policy resolution for one config version."""
+
+    def __init__(self, cfg: AppConfig):
+        self._cfg = cfg
+        self._policies = cfg.image_policies
+        self._exact: dict[str, str] = {}
+        self._trie = _TrieNode()
+        regex_keys: list[str] = []
+
+        globs: list[tuple[str, int, str]] = []  # (literal prefix, config order, key)
+        for order, key in enumerate(cfg.image_policies):
+            if key.startswith(REGEX_PREFIX):
+                try:
+                    validate_image_pattern(key)
+                except ValueError as exc:
+                    log.warning("Ignoring policy: %s", exc)
+                    continue
+                regex_keys.append(key)
+            elif _is_glob(key):
+                globs.append((_literal_prefix(key), order, key))
+            else:
+                self._exact[key] = key
+
+        for prefix, _, key in sorted(globs, key=lambda g: (-len(g[2]), g[1])):
+            node = self._trie
+            for ch in prefix:
+                node = node.children.setdefault(ch, _TrieNode())
+            node.globs.append((re.compile(fnmatch.translate(key)).match, key))
+
+        self._regex_keys = regex_keys
+        patterns = [k[len(REGEX_PREFIX):] for k in regex_keys]
+        compiled = [re.compile(p) for p in patterns]
+        self._regex_groups = [c.groups for c in compiled]
+        self._regex_each = [c.fullmatch for c in compiled]
+        self._regex = _combine([f"({p})" for p in patterns]) if patterns else None
+
+        self._lock = threading.Lock()
+        self._resolved: dict[str, str | None] = {}
+        self._tag_matchers: dict[str | None, TagMatcher] = {None: _NO_TAGS}
+        self._retention: dict[str | None, Retention] = {}
+        self._fingerprints: dict[str | None, str] = {}
+
+    def _match_glob(self, name: str) -> str | None:
+        node, candidates = self._trie, [self._trie]
+        for ch in name:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            candidates.append(node)
+        for node in reversed(candidates):  # longest literal prefix first
+            for match, key in node.globs:
+                if match(name):
+                    return key
+        return None
+
+    def _match_regex(self, name: str) -> str | None:
+        if self._regex is not None:
+            m = self._regex.fullmatch(name)
+            if m is None:
+                return None
+            # Each key is wrapped in a group of its own; find the one that matched
+            pos = 1
+            for key, groups in zip(self._regex_keys, self._regex_groups):
+                if m.group(pos) is not None:
+                    return key
+                pos += 1 + groups
+            return None
+        for key, match in zip(self._regex_keys, self._regex_each):
+            if match(name):
+                return key
+        return None
+
+    def key_for(self, image_name: str) -> str | None:
+        """Key of the policy that applies to *image_name*, if any."""
+        with self._lock:
+            if image_name in self._resolved:
+                return self._resolved[image_name]
+        key = self._exact.get(image_name)
+        if key is None:
+            key = self._match_glob(image_name)
+        if key is None and self._regex_keys:
+            key = self._match_regex(image_name)
+        with self._lock:
+            self._resolved[image_name] = key
+        return key
+
+    def resolve(self, image_name: str) -> ImagePolicy:
+        key = self.key_for(image_name)
+        return self._policies[key] if key is not None else ImagePolicy()
+
+    def protected(self, image_name: str) -> TagMatcher:
+        """Compiled protected tags of the policy that applies to *image_name*."""
+        key = self.key_for(image_name)
+        with self._lock:
+            matcher = self._tag_matchers.get(key)
+        if matcher is None:
+            matcher = TagMatcher(self._policies[key].protected_tags)
+            with self._lock:
+                self._tag_matchers[key] = matcher
+        return matcher
+
+    def fingerprint(self, image_name: str) -> str:
+        """Identifies the effective policy of *image_name* across config versions."""
+        key = self.key_for(image_name)
+        with self._lock:
+            fp = self._fingerprints.get(key)
+        if fp is None:
+            policy = self._policies[key] if key is not None else ImagePolicy()
+            fp = f"{self._cfg.default_keep_tags}\0{policy.model_dump_json()}"
+            with self._lock:
+                self._fingerprints[key] = fp
+        return fp
+
+    def retention(self, image_name: str) -> Retention:
+        """Retention rules of the policy that applies to *image_name*."""
+        key = self.key_for(image_name)
+        with self._lock:
+            retention = self._retention.get(key)
+        if retention is None:
+            policy = self._policies[key] if key is not None else ImagePolicy()
+            retention = retention_for(policy, self._cfg)
+            with self._lock:
+                self._retention[key] = retention
+        return retention
+
+
+_index: tuple[tuple[int, int], PolicyIndex] | None = None
+_index_lock = threading.Lock()
+
+
+def get_policy_index(cfg: AppConfig) -> PolicyIndex:
+    """Index for *cfg*, rebuilt when the config is reloaded or saved."""
+    global _index
+    ident = (get_config_version(), id(cfg))
+    with _index_lock:
+        if _index is not None and _index[0] == ident:
+            return _index[1]
+    index = PolicyIndex(cfg)
+    with _index_lock:
+        _index = (ident, index)
+    return index
@@ -2,26 +2,54 @@
 
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Iterator
 
 import httpx
 
 from app.models import ImageInfo, TagInfo, SourceType
+from app.services import http_clients
+from app.services.manifest_cache import get_manifest_cache, manifest_blobs
+from app.utils import aio
 from app.utils.logger import get_logger
 
 log = get_logger(__name__)
 
 _TIMEOUT = 30.0
+_DEFAULT_CONCURRENCY = 16
+_PAGE_SIZE = 1000
+_MANIFEST_V2 = "application/vnd.docker.distribution.manifest.v2+json"
+_MANIFEST_LIST_V2 = "application/vnd.docker.distribution.manifest.list.v2+json"
+_OCI_MANIFEST = "application/vnd.oci.image.manifest.v1+json"
+_OCI_INDEX = "application/vnd.oci.image.index.v1+json"
+_INDEX_TYPES = (_MANIFEST_LIST_V2, _OCI_INDEX)
+# Offer every type so the registry returns what the tag really points to;
+# otherwise multi-arch tags get down-converted to one platform's manifest
+# and the digest we delete by is not the tag's digest.
+_MANIFEST_ACCEPT = ", ".join((_MANIFEST_V2, _MANIFEST_LIST_V2, _OCI_MANIFEST, _OCI_INDEX))
+
+
+def next_page_url(r: httpx.Response) -> str | None:
+    """Absolute URL of the RFC 5988 ``Link: <...>; rel="next"`` page, if any."""
+    nxt = r.links.get("next", {}).get("url")
+    return str(r.url.join(nxt)) if nxt else None
 
 
 class PrivateRegistryService:
     """Interact with a Docker Registry via HTTP API V2."""
 
-    def __init__(self, connection: dict[str, Any]):
+    def __init__(self, connection: dict[str, Any], source_id: str | None = None):
+        self.connection = connection
+        self.source_key = source_id or f"conn:{http_clients.fingerprint(connection)}"
         self.base_url = connection.get("url", "").rstrip("/")
         self.username = connection.get("username", "")
         self.password = connection.get("password", "")
         self.insecure = connection.get("insecure", False)
+        self.max_concurrency = max(1, int(connection.get("max_concurrency", _DEFAULT_CONCURRENCY)))
+        self.fetch_created = connection.get("fetch_created", True)
+        # Extra headers sent with every request, e.g. an Artifactory API key
+        self.headers: dict[str, str] = dict(connection.get("headers") or {})
         self._auth = (
             (self.username, self.password) if self.username else None
         )
@@ -30,22 +58,50 @@ class PrivateRegistryService:
     # Helpers
     # ------------------------------------------------------------------
 
+    def _client_options(self) -> dict[str, Any]:
+        return {
+            "auth": self._auth,
+            "headers": self.headers,
+            "verify": not self.insecure,
+            "timeout": _TIMEOUT,
+            "limits": httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+        }
+
     def _client(self) -> httpx.Client:
-        return httpx.Client(
-            auth=self._auth,
-            verify=not self.insecure,
-            timeout=_TIMEOUT,
+        """Pooled keep-alive client shared by every call for this source."""
+        return http_clients.get_client(
+            self.source_key, "registry", self.connection, **self._client_options()
+        )
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """Pooled async client; only usable on the shared :mod:`aio` loop."""
+        return http_clients.get_async_client(
+            self.source_key, "registry", self.connection, **self._client_options()
         )
 
+    @staticmethod
+    def _response_digest(r: httpx.Response) -> str:
+        digest = r.headers.get("Docker-Content-Digest", "")
+        if not digest and r.request.method == "GET":
+            digest = "sha256:" + hashlib.sha256(r.content).hexdigest()
+        return digest
+
+    @staticmethod
+    def _media_type(r: httpx.Response, data: dict[str, Any]) -> str:
+        return data.get("mediaType") or r.headers.get("Content-Type", "").split(";")[0]
+
+
     # ------------------------------------------------------------------
     # Connectivity
     # ------------------------------------------------------------------
 
     def ping(self) -> bool:
         try:
-            with self._client() as c:
-                r = c.get(f"{self.base_url}/v2/")
-                return r.status_code in (200, 401)
+            r = self._client().get(f"{self.base_url}/v2/")
+            return r.status_code in (200, 401)
         except httpx.HTTPError:
             return False
 
@@ -53,83 +109,227 @@ class PrivateRegistryService:
     # Catalog / tags
     # ------------------------------------------------------------------
 
-    def list_repositories(self) -> list[str]:
+    def _iter_pages(self, path: str, key: str) -> Iterator[list[str]]:
+        """Yield ``key`` from each page of a paginated listing endpoint."""
+        url: str | None = f"{self.base_url}{path}"
+        params: dict[str, Any] | None = {"n": _PAGE_SIZE}
+        c = self._client()
+        while url:
+            r = c.get(url, params=params)
+            r.raise_for_status()
+            yield r.json().get(key) or []
+            url, params = next_page_url(r), None
+
+    def iter_repositories(self) -> Iterator[str]:
+        """Stream repository names page by page following ``Link`` headers."""
         try:
-            with self._client() as c:
-                r = c.get(f"{self.base_url}/v2/_catalog", params={"n": 10000})
-                r.raise_for_status()
-                return r.json().get("repositories", [])
+            for page in self._iter_pages("/v2/_catalog", "repositories"):
+                yield from page
         except httpx.HTTPError as exc:
             log.error("Failed to list repos: %s", exc)
-            return []
 
-    def list_tags(self, repo: str) -> list[str]:
+    def iter_tags(self, repo: str) -> Iterator[str]:
+        """Stream the tags of *repo* page by page following ``Link`` headers."""
         try:
-            with self._client() as c:
-                r = c.get(f"{self.base_url}/v2/{repo}/tags/list")
-                r.raise_for_status()
-                return r.json().get("tags") or []
+            for page in self._iter_pages(f"/v2/{repo}/tags/list", "tags"):
+                yield from page
         except httpx.HTTPError as exc:
             log.error("Failed to list tags for %s: %s", repo, exc)
-            return []
+
+    def list_repositories(self) -> list[str]:
+        return list(self.iter_repositories())
+
+    def list_tags(self, repo: str) -> list[str]:
+        return list(self.iter_tags(repo))
 
     def get_manifest_digest(self, repo: str, tag: str) -> str | None:
-        """Get the digest for a manifest (needed for deletion)."""
+        """Get the digest for a manifest (needed for deletion).
+
+        Uses ``HEAD`` so no manifest body is downloaded; falls back to a
+        ``GET`` only for registries that omit ``Docker-Content-Digest``.
+        """
+        url = f"{self.base_url}/v2/{repo}/manifests/{tag}"
+        headers = {"Accept": _MANIFEST_ACCEPT}
         try:
-            with self._client() as c:
-                r = c.get(
-                    f"{self.base_url}/v2/{repo}/manifests/{tag}",
-                    headers={
-                        "Accept": "application/vnd.docker.distribution.manifest.v2+json"
-                    },
-                )
+            c = self._client()
+            r = http_clients.request_with_retry(c, "HEAD", url, headers=headers)
+            r.raise_for_status()
+            digest = r.headers.get("Docker-Content-Digest")
+            if not digest:
+                r = http_clients.request_with_retry(c, "GET", url, headers=headers)
                 r.raise_for_status()
-                return r.headers.get("Docker-Content-Digest")
+                digest = self._response_digest(r)
+            return digest
         except httpx.HTTPError as exc:
             log.error("Failed to get digest for %s:%s: %s", repo, tag, exc)
             return None
 
     def get_manifest_info(self, repo: str, tag: str) -> dict[str, Any]:
         """Return basic info from the manifest (created date, size)."""
-        info: dict[str, Any] = {}
-        try:
-            with self._client() as c:
-                r = c.get(
-                    f"{self.base_url}/v2/{repo}/manifests/{tag}",
-                    headers={
-                        "Accept": "application/vnd.docker.distribution.manifest.v2+json"
-                    },
-                )
-                r.raise_for_status()
-                data = r.json()
-                info["digest"] = r.headers.get("Docker-Content-Digest", "")
-                config = data.get("config", {})
-                layers = data.get("layers", [])
-                info["size"] = sum(l.get("size", 0) for l in layers) + config.get("size", 0)
-        except httpx.HTTPError:
-            pass
-        return info
+        return aio.run_sync(self._aget_manifest_info(self._async_client(), repo, tag))
 
     # ------------------------------------------------------------------
-    # Image listing
+    # Async listing engine
     # ------------------------------------------------------------------
 
-    def list_images(self, source_id: str, source_name: str) -> list[ImageInfo]:
-        repos = self.list_repositories()
-        result: list[ImageInfo] = []
-        for repo in repos:
-            tags_raw = self.list_tags(repo)
-            tags: list[TagInfo] = []
-            for t in tags_raw:
-                manifest_info = self.get_manifest_info(repo, t)
-                tags.append(
-                    TagInfo(
-                        tag=t,
-                        digest=manifest_info.get("digest"),
-                        size=manifest_info.get("size"),
+    async def _aiter_pages(
+        self, c: httpx.AsyncClient, sem: asyncio.Semaphore, path: str, key: str
+    ) -> AsyncIterator[list[str]]:
+        url: str | None = f"{self.base_url}{path}"
+        params: dict[str, Any] | None = {"n": _PAGE_SIZE}
+        while url:
+            async with sem:
+                r = await c.get(url, params=params)
+            r.raise_for_status()
+            yield r.json().get(key) or []
+            url, params = next_page_url(r), None
+
+    async def _aget_manifest(
+        self, c: httpx.AsyncClient, repo: str, ref: str
+    ) -> tuple[str, str, dict[str, Any]]:
+        """Fetch a manifest by tag or digest → ``(digest, media_type, body)``.
+
+        Digest references are served from the manifest cache outright.  For
+        tags the last known digest is revalidated with ``If-None-Match`` so
+        an unchanged tag costs a bodiless 304.
+        """
+        cache = get_manifest_cache()
+        by_digest = ":" in ref  # tag names cannot contain ':'
+        known = ref if by_digest else cache.get_tag(self.source_key, repo, ref)
+        cached = cache.get(self.source_key, known) if known else None
+        if by_digest and cached is not None:
+            return ref, cached["media_type"], cached["manifest"]
+
+        headers = {"Accept": _MANIFEST_ACCEPT}
+        if cached is not None:
+            headers["If-None-Match"] = f'"{known}"'
+        r = await c.get(f"{self.base_url}/v2/{repo}/manifests/{ref}", headers=headers)
+        if r.status_code == 304 and cached is not None:
+            return known, cached["media_type"], cached["manifest"]
+        r.raise_for_status()
+
+        data = r.json()
+        digest, media_type = self._response_digest(r), self._media_type(r, data)
+        cache.put(self.source_key, digest, {"media_type": media_type, "manifest": data})
+        if not by_digest:
+            cache.set_tag(self.source_key, repo, ref, digest)
+        return digest, media_type, data
+
+    async def _aget_manifest_info(
+        self, c: httpx.AsyncClient, repo: str, tag: str
+    ) -> dict[str, Any]:
+        try:
+            digest, media_type, data = await self._aget_manifest(c, repo, tag)
+            blobs = manifest_blobs(data)
+            config = (data.get("config") or {}).get("digest")
+            if media_type in _INDEX_TYPES:
+                # Multi-arch: the image is the union of its platform manifests.
+                children = await asyncio.gather(
+                    *(
+                        self._aget_manifest(c, repo, m["digest"])
+                        for m in data.get("manifests") or []
+                        if m.get("digest")
                     )
                 )
-            result.append(
+                for _, _, child in children:
+                    blobs.update(manifest_blobs(child))
+                    config = config or (child.get("config") or {}).get("digest")
+            return {"digest": digest, "size": sum(blobs.values()), "config": config}
+        except httpx.HTTPError:
+            return {}
+
+    async def aget_manifest_infos(
+        self, refs: list[tuple[str, str]]
+    ) -> list[dict[str, Any]]:
+        """Concurrently resolve ``(repo, tag-or-digest)`` pairs to manifest info."""
+        sem = asyncio.Semaphore(self.max_concurrency)
+        c = self._async_client()
+
+        async def one(repo: str, ref: str) -> dict[str, Any]:
+            async with sem:
+                return await self._aget_manifest_info(c, repo, ref)
+
+        return list(await asyncio.gather(*(one(repo, ref) for repo, ref in refs)))
+
+    def get_manifest_infos(self, refs: list[tuple[str, str]]) -> list[dict[str, Any]]:
+        """Batched, cache-backed :meth:`get_manifest_info`."""
+        if not refs:
+            return []
+        return aio.run_sync(self.aget_manifest_infos(refs))
+
+    async def _aget_created(self, c: httpx.AsyncClient, repo: str, config_digest: str) -> str | None:
+        """Read ``created`` from an image config blob (cached by digest)."""
+        cache = get_manifest_cache()
+        cached = cache.get(self.source_key, config_digest)
+        if cached is None:
+            try:
+                r = await c.get(
+                    f"{self.base_url}/v2/{repo}/blobs/{config_digest}",
+                    follow_redirects=True,
+                )
+                r.raise_for_status()
+                cached = {"created": r.json().get("created")}
+            except (httpx.HTTPError, ValueError) as exc:
+                log.warning("Failed to read config %s of %s: %s", config_digest, repo, exc)
+                return None
+            # Only the field we need is kept; the blob itself is immutable.
+            cache.put(self.source_key, config_digest, cached)
+        return cached.get("created")
+
+    async def _alist_repo(
+        self,
+        c: httpx.AsyncClient,
+        sem: asyncio.Semaphore,
+        repo: str,
+        configs: dict[str, asyncio.Task[str | None]],
+    ) -> list[TagInfo]:
+        async def read_created(config_digest: str) -> str | None:
+            async with sem:
+                return await self._aget_created(c, repo, config_digest)
+
+        async def fetch(tag: str) -> TagInfo:
+            async with sem:
+                info = await self._aget_manifest_info(c, repo, tag)
+            created = None
+            config_digest = info.get("config")
+            if self.fetch_created and config_digest:
+                # One fetch per unique config, shared by every tag using it.
+                if config_digest not in configs:
+                    configs[config_digest] = asyncio.create_task(read_created(config_digest))
+                created = await configs[config_digest]
+            return TagInfo(
+                tag=tag,
+                digest=info.get("digest"),
+                size=info.get("size"),
+                created=created,
+            )
+
+        # Manifest fetches start as soon as each tags page arrives.
+        tasks: list[asyncio.Task[TagInfo]] = []
+        try:
+            async for page in self._aiter_pages(c, sem, f"/v2/{repo}/tags/list", "tags"):
+                tasks.extend(asyncio.create_task(fetch(t)) for t in page)
+        except httpx.HTTPError as exc:
+            log.error("Failed to list tags for %s: %s", repo, exc)
+        return list(await asyncio.gather(*tasks))
+
+    async def aiter_images(self, source_id: str, source_name: str) -> AsyncIterator[ImageInfo]:
+        """Yield each repo's :class:`ImageInfo` as soon as all its tags resolve.
+
+        All requests share one ``AsyncClient`` and at most
+        ``max_concurrency`` of them are in flight at any time.  Work on a
+        catalog page starts while the next page is still being fetched,
+        and repos are yielded in completion order.
+        """
+        sem = asyncio.Semaphore(self.max_concurrency)
+        c = self._async_client()
+        configs: dict[str, asyncio.Task[str | None]] = {}
+        ready: asyncio.Queue[ImageInfo | None] = asyncio.Queue()
+        tasks: list[asyncio.Task[None]] = []
+
+        async def resolve(repo: str) -> None:
+            tags = await self._alist_repo(c, sem, repo, configs)
+            ready.put_nowait(
                 ImageInfo(
                     name=repo,
                     tag_count=len(tags),
@@ -139,28 +339,70 @@ class PrivateRegistryService:
                     source_type=SourceType.PRIVATE_REGISTRY,
                 )
             )
-        return result
+
+        async def crawl() -> None:
+            try:
+                async for page in self._aiter_pages(c, sem, "/v2/_catalog", "repositories"):
+                    tasks.extend(asyncio.create_task(resolve(repo)) for repo in page)
+            except httpx.HTTPError as exc:
+                log.error("Failed to list repos: %s", exc)
+            finally:
+                for res in await asyncio.gather(*tasks, return_exceptions=True):
+                    if isinstance(res, Exception):
+                        log.error("Failed to list repo: %s", res)
+                ready.put_nowait(None)
+
+        crawler = asyncio.create_task(crawl())
+        try:
+            while (image := await ready.get()) is not None:
+                yield image
+        finally:
+            crawler.cancel()
+            for task in tasks:
+                task.cancel()
+
+    async def alist_images(self, source_id: str, source_name: str) -> list[ImageInfo]:
+        images = [img async for img in self.aiter_images(source_id, source_name)]
+        return sorted(images, key=lambda img: img.name)
+
+    # ------------------------------------------------------------------
+    # Image listing
+    # ------------------------------------------------------------------
+
+    def list_images(self, source_id: str, source_name: str) -> list[ImageInfo]:
+        return aio.run_sync(self.alist_images(source_id, source_name))
+
+    def iter_images(self, source_id: str, source_name: str) -> Iterator[ImageInfo]:
+        """Streaming :meth:`list_images`: repos are yielded as they resolve."""
+        return aio.iter_sync(self.aiter_images(source_id, source_name))
 
     # ------------------------------------------------------------------
     # Deletion
     # ------------------------------------------------------------------
 
-    def delete_tag(self, repo: str, tag: str) -> bool:
-        digest = self.get_manifest_digest(repo, tag)
+    def delete_tag(self, repo: str, tag: str, digest: str | None = None) -> bool:
+        """Delete *tag* by its manifest digest.
+
+        Pass the digest already known from a listing/preview to skip the
+        lookup; otherwise it is resolved with a ``HEAD`` request.
+        """
+        digest = digest or self.get_manifest_digest(repo, tag)
         if not digest:
             log.error("Cannot delete %s:%s – digest not found", repo, tag)
             return False
         try:
-            with self._client() as c:
-                r = c.delete(f"{self.base_url}/v2/{repo}/manifests/{digest}")
-                if r.status_code == 202:
-                    log.info("Deleted %s:%s (digest %s)", repo, tag, digest)
-                    return True
-                log.error(
-                    "Delete %s:%s returned %s: %s",
-                    repo, tag, r.status_code, r.text,
-                )
-                return False
+            r = http_clients.request_with_retry(
+                self._client(), "DELETE", f"{self.base_url}/v2/{repo}/manifests/{digest}"
+            )
+            if r.status_code == 202:
+                get_manifest_cache().forget_tag(self.source_key, repo, tag)
+                log.info("Deleted %s:%s (digest %s)", repo, tag, digest)
+                return True
+            log.error(
+                "Delete %s:%s returned %s: %s",
+                repo, tag, r.status_code, r.text,
+            )
+            return False
         except httpx.HTTPError as exc:
             log.error("Failed to delete %s:%s: %s", repo, tag, exc)
             return False
@@ -0,0 +1,203 @@
+"""Retention strategies: which unprotected tags of an image to keep.
+
+A policy combines any of these keep rules; a tag survives if at least
+one keeps it:
+
+* ``keep_tags`` – the N newest by creation time (``default_keep_tags``
+  when unset)
+* ``keep_semver`` – the N highest semantic versions
+* ``keep_per_major`` – the N highest versions of every major version
+
+``delete_older_than`` (a duration such as ``"30d"``) then caps their
+result: a tag created before the cutoff is deleted even if a keep rule
+chose it.  Only protected tags, running images and tags whose creation
+time is unknown outlive it.
+
+Tag creation times and versions are parsed once into a :class:`TagKey`,
+so every strategy sorts plain numbers and tuples.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Iterable, Protocol
+
+from app.models import AppConfig, ImagePolicy, TagInfo
+from app.utils.logger import get_logger
+from app.utils.semver import Version, parse_version
+
+log = get_logger(__name__)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([smhdw])", re.IGNORECASE)
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_duration(value: str) -> float:
+    """Seconds in ``"90m"``, ``"12h"``, ``"30d"``, ``"2w"`` or ``"1d12h"``.
+
+    Raises :class:`ValueError` for anything else.
+    """
+    text = value.replace(" ", "")
+    parts = _DURATION_RE.findall(text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        raise ValueError(f"Invalid duration: {value!r} (use e.g. 12h, 30d, 2w)")
+    return sum(float(n) * _UNIT_SECONDS[u.lower()] for n, u in parts)
+
+
+@lru_cache(maxsize=65536)
+def parse_created(value: str | None) -> float:
+    """Epoch seconds of an ISO-8601 time; ``-inf`` if missing or unparsable."""
+    if not value:
+        return -math.inf
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return -math.inf
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+_parse_version = lru_cache(maxsize=65536)(parse_version)
+
+
+@dataclass(frozen=True, slots=True)
+class TagKey:
+    tag: TagInfo
+    created: float
+    version: Version | None
+
+    @classmethod
+    def of(cls, tag: TagInfo) -> TagKey:
+        return cls(tag, parse_created(tag.created), _parse_version(tag.tag))
+
+
+class RetentionStrategy(Protocol):
+    reason: str  # reported in ``reason_kept``
+
+    def keep(self, keys: list[TagKey], now: float) -> Iterable[TagKey]:
+        """The tags among *keys* this strategy retains."""
+        ...
+
+    def valid_until(self, keys: list[TagKey], now: float) -> float:
+        """When :meth:`keep` may start answering differently for the same *keys*."""
+        ...
+
+
+class _Timeless:
+    def valid_until(self, keys: list[TagKey], now: float) -> float:
+        return math.inf
+
+
+@dataclass(frozen=True)
+class KeepNewest(_Timeless):
+    count: int
+    reason: str = "retention_policy"
+
+    def keep(self, keys: list[TagKey], now: float) -> Iterable[TagKey]:
+        return sorted(keys, key=lambda k: k.created, reverse=True)[: self.count]
+
+
+@dataclass(frozen=True)
+class KeepHighestVersions(_Timeless):
+    count: int
+    reason: str = "semver_retention"
+
+    def keep(self, keys: list[TagKey], now: float) -> Iterable[TagKey]:
+        versioned = [k for k in keys if k.version is not None]
+        return sorted(versioned, key=lambda k: k.version, reverse=True)[: self.count]
+
+
+@dataclass(frozen=True)
+class KeepPerMajor(_Timeless):
+    count: int
+    reason: str = "major_version_retention"
+
+    def keep(self, keys: list[TagKey], now: float) -> Iterable[TagKey]:
+        versioned = sorted(
+            (k for k in keys if k.version is not None), key=lambda k: k.version, reverse=True
+        )
+        seen: dict[int, int] = {}
+        for k in versioned:
+            major = k.version[0]
+            if seen.get(major, 0) < self.count:
+                seen[major] = seen.get(major, 0) + 1
+                yield k
+
+
+@dataclass(frozen=True)
+class MaxAge:
+    """Filter applied after the keep rules: drops tags older than *seconds*."""
+
+    seconds: float
+
+    def expired(self, key: TagKey, now: float) -> bool:
+        # A tag of unknown age (no or unparsable creation time) never expires
+        return key.created != -math.inf and key.created < now - self.seconds
+
+    def valid_until(self, keys: list[TagKey], now: float) -> float:
+        # The next surviving tag to age out
+        return min(
+            (
+                k.created + self.seconds
+                for k in keys
+                if k.created != -math.inf and k.created + self.seconds >= now
+            ),
+            default=math.inf,
+        )
+
+
+@dataclass(frozen=True)
+class Retention:
+    """Keep rules of a policy plus its optional :class:`MaxAge` cap."""
+
+    strategies: list[RetentionStrategy]
+    max_age: MaxAge | None = None
+
+
+def retention_for(policy: ImagePolicy, cfg: AppConfig) -> Retention:
+    """Retention of *policy*; an unparsable duration deletes nothing by age."""
+    keep = policy.keep_tags if policy.keep_tags is not None else cfg.default_keep_tags
+    strategies: list[RetentionStrategy] = [KeepNewest(keep)]
+    if policy.keep_semver:
+        strategies.append(KeepHighestVersions(policy.keep_semver))
+    if policy.keep_per_major:
+        strategies.append(KeepPerMajor(policy.keep_per_major))
+    max_age = None
+    if policy.delete_older_than:
+        try:
+            max_age = MaxAge(parse_duration(policy.delete_older_than))
+        except ValueError as exc:
+            log.warning("%s; not deleting by age", exc)
+    return Retention(strategies, max_age)
+
+
+def retained(
+    keys: list[TagKey], retention: Retention, now: float | None = None
+) -> tuple[dict[str, str], float]:
+    """Tag name → reason for every tag in *keys* the retention keeps.
+
+    Also returns until when that answer holds for the same tags.
+    """
+    now = time.time() if now is None else now
+    reasons: dict[str, str] = {}
+    valid_until = math.inf
+    for strategy in retention.strategies:
+        for k in strategy.keep(keys, now):
+            reasons.setdefault(k.tag.tag, strategy.reason)
+        valid_until = min(valid_until, strategy.valid_until(keys, now))
+    max_age = retention.max_age
+    if max_age is not None:
+        survivors = [k for k in keys if k.tag.tag in reasons]
+        for k in survivors:
+            if max_age.expired(k, now):
+                del reasons[k.tag.tag]
+        valid_until = min(
+            valid_until, max_age.valid_until([k for k in survivors if k.tag.tag in reasons], now)
+        )
+    return reasons, valid_until
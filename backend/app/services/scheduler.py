@@ -1,7 +1,7 @@
 import asyncio
 import time
 from app.config import get_current_config, save_config
-from app.services.cleanup import execute_cleanup
+from app.services.cleanup_jobs import get_cleanup_jobs
 from app.utils.logger import get_logger
 
 log = get_logger(__name__)
@@ -36,9 +36,12 @@ async def run_scheduler():
                     
                 if should_run:
                     log.info("Running scheduled automatic cleanup (%s)", schedule)
-                    result = await asyncio.to_thread(execute_cleanup)
-                    log.info("Scheduled cleanup finished. Deleted: %d, Failed: %d, Freed Bytes: %d", 
-                             result.total_deleted, result.total_failed, result.total_freed_bytes)
+                    # Queued behind any manual cleanup instead of racing it
+                    job = get_cleanup_jobs().submit()
+                    await asyncio.wrap_future(job.future)
+                    result = job.info()
+                    log.info("Scheduled cleanup %s. Deleted: %d, Failed: %d, Freed Bytes: %d",
+                             result.state.value, result.total_deleted, result.total_failed, result.total_freed_bytes)
                     
                     # Update config with last run time
                     cfg = get_current_config()  # reload in case it changed during cleanup
@@ -0,0 +1,97 @@
+"""Shared background event loop for running coroutines from sync code."""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+_thread: threading.Thread | None = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the background loop, starting its thread on first use.
+
+    Long-lived async resources (pooled ``httpx.AsyncClient`` instances)
+    are bound to the loop they were created on, so every coroutine that
+    touches them must run here rather than in a throwaway ``asyncio.run``.
+    """
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name="dim-aio", daemon=True
+            )
+            _thread.start()
+        return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+    """Run *coro* on the background loop and block until it finishes."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    return future.result(timeout)
+
+
+def in_loop() -> bool:
+    """Whether the caller is running on the background loop's thread."""
+    with _lock:
+        thread = _thread
+    return thread is not None and threading.current_thread() is thread
+
+
+def spawn(coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+    """Schedule *coro* on the background loop without waiting for it.
+
+    Safe from any thread, including the loop's own, where :func:`run_sync`
+    would deadlock.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def iter_sync(agen: AsyncIterator[T]) -> Iterator[T]:
+    """Consume *agen* on the background loop, yielding items as they arrive.
+
+    Closing the returned generator early cancels the async side.
+    """
+    items: queue.SimpleQueue[Any] = queue.SimpleQueue()
+    done = object()
+
+    async def pump() -> None:
+        try:
+            async for item in agen:
+                items.put(item)
+        except BaseException as exc:
+            items.put(exc)
+            raise
+        finally:
+            items.put(done)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    try:
+        while (item := items.get()) is not done:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        future.cancel()
+
+
+def shutdown() -> None:
+    """Stop the background loop (called once on application shutdown)."""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None:
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout=5)
+    loop.close()
@@ -0,0 +1,41 @@
+"""Conditional GET helpers: strong ETags and ``304 Not Modified``."""
+
+from __future__ import annotations
+
+import hashlib
+import uuid
+
+from fastapi import Request, Response
+
+# Version counters restart with the process; mixing in a per-boot id keeps
+# an ETag issued before a restart from matching a different body after it.
+_BOOT_ID = uuid.uuid4().hex
+
+# Clients may keep a copy but must revalidate it on every use.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag for a representation determined entirely by *parts*."""
+    raw = "\0".join(str(p) for p in (_BOOT_ID, *parts))
+    return '"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """Whether the request's ``If-None-Match`` already names *etag*."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison (RFC 9110 §13.1.2)
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_validators(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
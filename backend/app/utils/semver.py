@@ -0,0 +1,104 @@
+"""Lenient semantic-version parsing and ranges for image tags.
+
+Tags such as ``1.4``, ``v2.0.3`` or ``3.1.0-rc.1`` parse to a
+:data:`Version` tuple that compares correctly with ``<``; anything else
+(``latest``, commit hashes, dates like ``2024-01-15``, bare build numbers
+like ``20240101``) is not a version.  A tag needs at least
+``major.minor``; a missing patch counts as ``0`` and a prerelease sorts
+before its release.  Range bounds may be a bare major (``<2``).
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable
+
+# (major, minor, patch, is_release, prerelease identifiers)
+Version = tuple[int, int, int, int, tuple[tuple[int, int | str], ...]]
+
+_VERSION_RE = re.compile(
+    r"v?(0|[1-9]\d*)\.(0|[1-9]\d*)(?:\.(0|[1-9]\d*))?"
+    r"(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?",
+    re.IGNORECASE,
+)
+_BOUND_RE = re.compile(r"v?(0|[1-9]\d*)", re.IGNORECASE)
+_COMPARATOR_RE = re.compile(r"(>=|<=|>|<|=|\^|~)?(\S+)")
+_OPERATOR_SPACE_RE = re.compile(r"(>=|<=|>|<|=|\^|~)\s+")
+
+
+def _prerelease(pre: str) -> tuple[tuple[int, int | str], ...]:
+    # Numeric identifiers sort before alphanumeric ones (SemVer §11)
+    return tuple((0, int(p)) if p.isdigit() else (1, p) for p in pre.split("."))
+
+
+def parse_version(tag: str) -> Version | None:
+    """:data:`Version` of *tag*, or ``None`` if it is not version-like."""
+    m = _VERSION_RE.fullmatch(tag)
+    if m is None:
+        return None
+    major, minor, patch, pre = m.groups()
+    return (
+        int(major),
+        int(minor or 0),
+        int(patch or 0),
+        0 if pre else 1,
+        _prerelease(pre) if pre else (),
+    )
+
+
+def _major_range(op: str, major: int) -> Callable[[Version], bool]:
+    # A bare major stands for every version in [major, major + 1)
+    lo, hi = _release(major), _release(major + 1)
+    if op == ">=":
+        return lambda v: v >= lo
+    if op == ">":
+        return lambda v: v >= hi
+    if op == "<":
+        return lambda v: v < lo
+    if op == "<=":
+        return lambda v: v < hi
+    return lambda v: lo <= v < hi
+
+
+def _release(major: int, minor: int = 0, patch: int = 0) -> Version:
+    return (major, minor, patch, 1, ())
+
+
+def parse_range(spec: str) -> Callable[[Version], bool]:
+    """Predicate for a range such as ``>=1.2 <2``, ``^1.4`` or ``~2.1.0``.
+
+    Comparators are separated by spaces or commas and must all hold.
+    Raises :class:`ValueError` for an unparsable range.
+    """
+    checks: list[Callable[[Version], bool]] = []
+    for part in _OPERATOR_SPACE_RE.sub(r"\1", spec.replace(",", " ")).split():
+        m = _COMPARATOR_RE.fullmatch(part)
+        if m is None:
+            raise ValueError(f"Invalid version range: {spec!r}")
+        op = m.group(1) or "="
+        bare = _BOUND_RE.fullmatch(m.group(2))
+        if bare is not None:
+            checks.append(_major_range(op, int(bare.group(1))))
+            continue
+        bound = parse_version(m.group(2))
+        if bound is None:
+            raise ValueError(f"Invalid version range: {spec!r}")
+        major, minor, patch = bound[:3]
+        if op == "^":
+            upper = _release(major + 1) if major else _release(0, minor + 1) if minor else _release(0, 0, patch + 1)
+            checks.append(lambda v, lo=bound, hi=upper: lo <= v < hi)
+        elif op == "~":
+            checks.append(lambda v, lo=bound, hi=_release(major, minor + 1): lo <= v < hi)
+        elif op == ">=":
+            checks.append(lambda v, b=bound: v >= b)
+        elif op == ">":
+            checks.append(lambda v, b=bound: v > b)
+        elif op == "<=":
+            checks.append(lambda v, b=bound: v <= b)
+        elif op == "<":
+            checks.append(lambda v, b=bound: v < b)
+        else:
+            checks.append(lambda v, b=bound: v == b)
+    if not checks:
+        raise ValueError(f"Invalid version range: {spec!r}")
+    return lambda v: all(check(v) for check in checks)
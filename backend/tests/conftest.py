@@ -0,0 +1,142 @@
+"""Shared test setup: an isolated config and in-memory fake sources."""
+
+from __future__ import annotations
+
+import pytest
+
+from app import config
+from app.models import AppConfig, ImageInfo, Source, SourceType, TagInfo
+from app.services import cleanup, factory, inventory
+from app.services.docker_engine import DiskUsage, EngineImage
+
+
+class FakeRegistry:
+    """Registry source backed by ``repos[source_id][repo][tag] = (digest, created)``."""
+
+    repos: dict[str, dict[str, dict[str, tuple[str, str]]]] = {}
+    deleted: list[tuple[str, str, str | None]] = []
+    down: set[str] = set()  # source IDs whose listing fails
+
+    def __init__(self, connection, source_id=None):
+        self.source_id = source_id
+
+    def list_images(self, source_id, source_name):
+        if source_id in self.down:
+            raise RuntimeError("registry down")
+        return [
+            ImageInfo(
+                name=repo,
+                tag_count=len(tags),
+                tags=[TagInfo(tag=t, digest=d, size=10, created=c) for t, (d, c) in tags.items()],
+                source_id=source_id,
+                source_name=source_name,
+                source_type=SourceType.PRIVATE_REGISTRY,
+            )
+            for repo, tags in self.repos.get(source_id, {}).items()
+        ]
+
+    def iter_images(self, source_id, source_name):
+        yield from self.list_images(source_id, source_name)
+
+    def get_manifest_digest(self, repo, tag):
+        entry = self.repos[self.source_id].get(repo, {}).get(tag)
+        return entry[0] if entry else None
+
+    def delete_tag(self, repo, tag, digest=None):
+        self.deleted.append((repo, tag, digest))
+        self.repos[self.source_id][repo].pop(tag, None)
+        return True
+
+
+class FakeEngine:
+    """Docker Engine source backed by ``images[image_id] = EngineImage``."""
+
+    images: dict[str, EngineImage] = {}
+    calls: list[tuple[str, ...]] = []
+
+    def __init__(self, connection, source_id=None):
+        pass
+
+    def list_images(self, source_id, source_name):
+        repos: dict[str, list[TagInfo]] = {}
+        for img in self.images.values():
+            for ref in img.repo_tags:
+                repo, tag = ref.rsplit(":", 1)
+                repos.setdefault(repo, []).append(
+                    TagInfo(tag=tag, digest=img.id, size=img.size, created=img.created)
+                )
+        return [
+            ImageInfo(
+                name=repo, tag_count=len(tags), tags=tags, source_id=source_id,
+                source_name=source_name, source_type=SourceType.DOCKER_ENGINE,
+            )
+            for repo, tags in repos.items()
+        ]
+
+    def iter_images(self, source_id, source_name):
+        yield from self.list_images(source_id, source_name)
+
+    def disk_usage(self):
+        return DiskUsage(dict(self.images), sum(img.size for img in self.images.values()))
+
+    def get_image_tags(self, image_id):
+        img = self.images.get(image_id)
+        return list(img.repo_tags) if img is not None else None
+
+    def get_manifest_digest(self, image_name, tag):
+        ref = f"{image_name}:{tag}"
+        return next((i.id for i in self.images.values() if ref in i.repo_tags), None)
+
+    def remove_image_id(self, image_id):
+        self.calls.append(("remove_id", image_id))
+        del self.images[image_id]
+        return True
+
+    def delete_image(self, image_name, tag, force=False):
+        ref = f"{image_name}:{tag}"
+        self.calls.append(("untag", ref))
+        for img in list(self.images.values()):
+            if ref in img.repo_tags:
+                img.repo_tags = tuple(t for t in img.repo_tags if t != ref)
+                if not img.repo_tags:
+                    del self.images[img.id]
+        return True
+
+    def prune_images(self):
+        self.calls.append(("prune",))
+        return 0
+
+    def prune_build_cache(self):
+        return 0
+
+
+_FAKES = {SourceType.PRIVATE_REGISTRY: FakeRegistry, SourceType.DOCKER_ENGINE: FakeEngine}
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """Fresh config file, inventory and cleanup memo; sources use the fakes."""
+    monkeypatch.setenv("DIM_CONFIG_PATH", str(tmp_path / "config.json"))
+    monkeypatch.setattr(config, "_config", None)
+    monkeypatch.setattr(inventory, "_store", None)
+    monkeypatch.setattr(cleanup, "_decisions", cleanup.DecisionMemo())
+    monkeypatch.setattr(cleanup, "_graphs", {})
+    monkeypatch.setattr(factory, "get_service_class", _FAKES.get)
+    monkeypatch.setattr(cleanup, "get_service_class", _FAKES.get)
+    FakeRegistry.repos, FakeRegistry.deleted, FakeRegistry.down = {}, [], set()
+    FakeEngine.images, FakeEngine.calls = {}, []
+    yield
+    if inventory._store is not None:
+        inventory._store.shutdown()
+
+
+@pytest.fixture
+def cfg() -> AppConfig:
+    """Saved config with one registry (``reg``) and one engine (``eng``)."""
+    cfg = AppConfig(default_keep_tags=1)
+    cfg.sources = [
+        Source(id="reg", name="reg", type=SourceType.PRIVATE_REGISTRY, connection={}),
+        Source(id="eng", name="eng", type=SourceType.DOCKER_ENGINE, connection={}),
+    ]
+    config.save_config(cfg)
+    return cfg
@@ -0,0 +1,52 @@
+import json
+
+import httpx
+
+from app.services import http_clients
+from app.services.artifactory import ArtifactoryService
+
+API_KEY = "secret-key"
+MANIFEST = {
+    "schemaVersion": 2,
+    "mediaType": "application/vnd.docker.distribution.manifest.v2+json",
+    "config": {"digest": "sha256:" + "c" * 64, "size": 5},
+    "layers": [{"digest": "sha256:" + "1" * 64, "size": 100}, {"digest": "sha256:" + "2" * 64, "size": 20}],
+}
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.headers.get("X-JFrog-Art-Api") != API_KEY:
+        return httpx.Response(401)
+    path = request.url.path
+    if path.endswith("/v2/_catalog"):
+        return httpx.Response(200, json={"repositories": ["app"]})
+    if path.endswith("/v2/app/tags/list"):
+        return httpx.Response(200, json={"name": "app", "tags": ["1.0"]})
+    if path.endswith("/v2/app/manifests/1.0"):
+        return httpx.Response(
+            200,
+            content=json.dumps(MANIFEST).encode(),
+            headers={
+                "Content-Type": MANIFEST["mediaType"],
+                "Docker-Content-Digest": "sha256:" + "d" * 64,
+            },
+        )
+    return httpx.Response(404)
+
+
+def test_api_key_only_source_gets_sizes(monkeypatch):
+    transport = httpx.MockTransport(handler)
+    get_client, get_async_client = http_clients.get_client, http_clients.get_async_client
+    monkeypatch.setattr(
+        http_clients, "get_client", lambda *a, **k: get_client(*a, **k, transport=transport)
+    )
+    monkeypatch.setattr(
+        http_clients, "get_async_client",
+        lambda *a, **k: get_async_client(*a, **k, transport=transport),
+    )
+    svc = ArtifactoryService(
+        {"url": "http://art.test/artifactory/api/docker/docker-local", "api_key": API_KEY},
+        source_id="art-api-key",
+    )
+    [image] = svc.list_images("art-api-key", "art")
+    assert [(t.tag, t.size) for t in image.tags] == [("1.0", 125)]
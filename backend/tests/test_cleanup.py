@@ -0,0 +1,77 @@
+import pytest
+from conftest import FakeEngine, FakeRegistry
+
+from app.config import save_config
+from app.models import ImagePolicy
+from app.services import cleanup
+from app.services.docker_engine import EngineImage
+from app.services.inventory import get_inventory
+
+OLD, NEW = "2024-01-01T00:00:00+00:00", "2024-06-01T00:00:00+00:00"
+
+
+def test_failed_relisting_is_not_planned_from_an_old_snapshot(cfg):
+    FakeRegistry.repos = {"reg": {"app": {"1": ("sha256:a", OLD), "2": ("sha256:b", NEW)}}}
+    assert [p.tags_to_delete for p in cleanup.build_cleanup_preview()] == [["1"]]
+
+    FakeRegistry.down.add("reg")
+    plan = cleanup.build_cleanup_plan(refresh=True)
+    assert plan.previews == []
+    assert plan.errors == {"reg": "registry down"}
+
+    result = cleanup.execute_cleanup()
+    assert result.total_deleted == 0 and FakeRegistry.deleted == []
+    assert result.source_errors == {"reg": "registry down"}
+    # Readers are still served the last good listing
+    assert get_inventory().peek("reg").error is None
+
+
+def engine_image(image_id: str, *refs: str, containers: int = 0, created: str = OLD) -> EngineImage:
+    return EngineImage(image_id, refs, (), created, 100, shared_size=0, containers=containers)
+
+
+def test_image_losing_every_tag_is_removed_once_by_id(cfg):
+    FakeEngine.images = {
+        "sha256:old": engine_image("sha256:old", "app:1", "app:2"),
+        "sha256:new": engine_image("sha256:new", "app:3", created=NEW),
+    }
+    result = cleanup.execute_cleanup(["eng"])
+    assert FakeEngine.calls == [("remove_id", "sha256:old")]
+    assert result.total_deleted == 2 and result.total_failed == 0
+    assert sorted(d.tag for d in result.details) == ["1", "2"]
+
+
+@pytest.mark.parametrize("containers", [1, -1], ids=["stopped-container", "unknown-usage"])
+def test_image_maybe_in_use_is_untagged_tag_by_tag(cfg, containers):
+    FakeEngine.images = {
+        "sha256:old": engine_image("sha256:old", "app:1", "app:2", containers=containers),
+        "sha256:new": engine_image("sha256:new", "app:3", created=NEW),
+    }
+    cleanup.execute_cleanup(["eng"])
+    assert sorted(FakeEngine.calls) == [("untag", "app:1"), ("untag", "app:2")]
+
+
+def test_partially_deleted_image_is_untagged(cfg):
+    cfg.image_policies["app"] = ImagePolicy(protected_tags=["2"])
+    save_config(cfg)
+    FakeEngine.images = {
+        "sha256:old": engine_image("sha256:old", "app:1", "app:2"),
+        "sha256:new": engine_image("sha256:new", "app:3", created=NEW),
+    }
+    cleanup.execute_cleanup(["eng"])
+    assert FakeEngine.calls == [("untag", "app:1")]
+
+
+def test_reviewed_plan_skips_a_tag_that_moved(cfg):
+    FakeRegistry.repos = {"reg": {"app": {
+        "1": ("sha256:a", OLD), "2": ("sha256:b", OLD), "3": ("sha256:c", NEW),
+    }}}
+    plan = cleanup.build_cleanup_plan(["reg"])
+    assert sorted(plan.previews[0].tags_to_delete) == ["1", "2"]
+
+    FakeRegistry.repos["reg"]["app"]["2"] = ("sha256:moved", NEW)  # re-pushed after review
+    result = cleanup.execute_cleanup(plan=plan)
+    assert FakeRegistry.deleted == [("app", "1", "sha256:a")]
+    assert result.total_deleted == 1 and result.total_failed == 1
+    [failed] = [d for d in result.details if not d.success]
+    assert failed.tag == "2" and "sha256:moved" in failed.error
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.services import http_clients
+from app.services.deletion import DeletionExecutor, DeletionTask
+
+
+def tasks(source_id: str, n: int) -> list[DeletionTask]:
+    return [DeletionTask(source_id, "app", str(i)) for i in range(n)]
+
+
+def test_failures_are_reported_per_task():
+    def delete(task):
+        if task.tag == "1":
+            raise RuntimeError("boom")
+        return task.tag != "2"
+
+    results = {t.tag: (ok, error) for t, ok, error in DeletionExecutor(4).run(tasks("s", 4), delete)}
+    assert results == {
+        "0": (True, None),
+        "1": (False, "boom"),
+        "2": (False, "Delete returned False"),
+        "3": (True, None),
+    }
+
+
+def test_per_source_limit_caps_deletes_in_flight():
+    running, peak, lock = {"a": 0, "b": 0}, {"a": 0, "b": 0}, threading.Lock()
+
+    def delete(task):
+        with lock:
+            running[task.source_id] += 1
+            peak[task.source_id] = max(peak[task.source_id], running[task.source_id])
+        time.sleep(0.01)
+        with lock:
+            running[task.source_id] -= 1
+        return True
+
+    done = list(DeletionExecutor(8).run(tasks("a", 6) + tasks("b", 6), delete, {"a": 1, "b": 3}))
+    assert len(done) == 12
+    assert peak["a"] == 1 and 1 <= peak["b"] <= 3
+
+
+def test_cancel_stops_starting_new_deletes():
+    cancel = threading.Event()
+
+    def delete(task):
+        cancel.set()
+        return True
+
+    done = list(DeletionExecutor(1).run(tasks("s", 5), delete, {"s": 1}, cancel))
+    assert len(done) == 1
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(http_clients.time, "sleep", lambda _: None)
+
+
+def client(*responses) -> tuple[httpx.Client, list[httpx.Request]]:
+    seen: list[httpx.Request] = []
+    queue = list(responses)
+
+    def handler(request):
+        seen.append(request)
+        item = queue.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return httpx.Response(item)
+
+    return httpx.Client(transport=httpx.MockTransport(handler)), seen
+
+
+def test_retries_transient_statuses(no_sleep):
+    c, seen = client(503, 429, 202)
+    assert http_clients.request_with_retry(c, "DELETE", "http://reg/v2/app/manifests/x").status_code == 202
+    assert len(seen) == 3
+
+
+def test_returns_the_last_response_when_retries_run_out(no_sleep):
+    c, seen = client(*[500] * http_clients._RETRY_ATTEMPTS)
+    assert http_clients.request_with_retry(c, "DELETE", "http://reg/x").status_code == 500
+    assert len(seen) == http_clients._RETRY_ATTEMPTS
+
+
+def test_does_not_retry_client_errors(no_sleep):
+    c, seen = client(404)
+    assert http_clients.request_with_retry(c, "DELETE", "http://reg/x").status_code == 404
+    assert len(seen) == 1
+
+
+def test_reraises_the_last_transport_error(no_sleep):
+    c, _ = client(*[httpx.ConnectError("refused")] * http_clients._RETRY_ATTEMPTS)
+    with pytest.raises(httpx.ConnectError):
+        http_clients.request_with_retry(c, "DELETE", "http://reg/x")
@@ -0,0 +1,68 @@
+import base64
+import json
+
+import pytest
+
+from app.models import ImageInfo, TagInfo
+from app.services.image_index import ImageIndex, InvalidCursor, decode_cursor
+from app.services.inventory import Snapshot
+
+
+def image(name: str, created: str | None) -> ImageInfo:
+    return ImageInfo(name=name, source_id="s", tags=[TagInfo(tag="a", created=created)])
+
+
+def cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_created_pages_by_time_not_string(order):
+    images = [
+        image("utc", "2024-01-01T00:00:00+00:00"),
+        image("unknown", None),
+        image("zulu", "2023-05-01T10:00:00Z"),
+        image("offset", "2024-01-01T00:30:00+01:00"),  # before "utc"
+    ]
+    index = ImageIndex([Snapshot("s", images, 0.0, 0.0, None)])
+    names, next_cursor = [], None
+    while True:
+        page = index.query(lambda img: True, "created", order, 1, next_cursor)
+        names += [img.name for img in page.items]
+        next_cursor = page.next_cursor
+        if next_cursor is None:
+            break
+    expected = ["unknown", "zulu", "offset", "utc"]
+    assert names == (expected if order == "asc" else expected[::-1])
+
+
+@pytest.mark.parametrize(
+    "sort, key",
+    [
+        ("name", [1, "s"]),
+        ("name", ["a", "s", "x"]),
+        ("size", [1.5, "a", "s"]),
+        ("tag_count", [True, "a", "s"]),
+        ("created", ["2024-01-01", "a", "s"]),
+        ("created", [1.0]),
+        ("size", "abc"),
+    ],
+)
+def test_cursor_key_must_match_sort_field(sort, key):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor([sort, "asc", key]), sort, "asc")
+
+
+def test_total_is_counted_once_per_filter():
+    index = ImageIndex([Snapshot("s", [image(f"i{n}", None) for n in range(5)], 0.0, 0.0, None)])
+    calls = []
+
+    def predicate(img):
+        calls.append(img.name)
+        return img.name != "i0"
+
+    first = index.query(predicate, "name", "asc", 2, None, filter_key="not-i0")
+    counted = len(calls)
+    second = index.query(predicate, "name", "asc", 2, first.next_cursor, filter_key="not-i0")
+    assert first.total == second.total == 4
+    assert len(calls) - counted < 5  # the second page did not rescan every row
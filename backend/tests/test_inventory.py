@@ -0,0 +1,65 @@
+from app.models import ImageInfo, TagInfo
+from app.services.inventory import InventoryStore
+
+
+def listing(tag: str) -> list[ImageInfo]:
+    return [ImageInfo(name="app", source_id="s", tags=[TagInfo(tag=tag, digest="sha256:a")])]
+
+
+def test_generation_changes_only_with_content():
+    store = InventoryStore(max_workers=1)
+    try:
+        first = store.publish("s", listing("1"))
+        generation = store.generation
+
+        again = store.publish("s", listing("1"))
+        assert store.generation == generation
+        assert again.digest == first.digest
+        assert store.peek("s") is again  # still re-stamped as fresh
+
+        changed = store.publish("s", listing("2"))
+        assert store.generation == generation + 1
+        assert changed.digest != first.digest
+    finally:
+        store.shutdown()
+
+
+def test_failed_refresh_keeps_serving_but_tells_refresher(monkeypatch):
+    from app.models import Source, SourceType
+    from app.services import inventory
+
+    source = Source(id="s", name="reg", type=SourceType.PRIVATE_REGISTRY, connection={})
+    store = InventoryStore(max_workers=1)
+    try:
+        good = store.publish("s", listing("1"))
+
+        def fail(_source):
+            raise RuntimeError("registry down")
+
+        monkeypatch.setattr(inventory, "_list_source", fail)
+        refreshed = store.read(source, max_age=300, refresh=True)
+        assert refreshed.refresh_error == "registry down"
+        assert refreshed.images == good.images
+
+        served = store.read(source, max_age=300)
+        assert served is good and served.refresh_error is None
+    finally:
+        store.shutdown()
+
+
+def test_marking_protection_leaves_snapshot_untouched():
+    from app.models import AppConfig, ImagePolicy
+    from app.routers.images import _mark_protected
+    from app.services.inventory import content_digest
+
+    store = InventoryStore(max_workers=1)
+    try:
+        snapshot = store.publish("s", listing("1"))
+        cfg = AppConfig(image_policies={"app": ImagePolicy(protected_tags=["1"])})
+
+        (marked,) = _mark_protected(snapshot.images, cfg)
+        assert marked.tags[0].is_protected
+        assert not snapshot.images[0].tags[0].is_protected
+        assert content_digest(snapshot.images) == snapshot.digest
+    finally:
+        store.shutdown()
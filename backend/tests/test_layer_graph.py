@@ -0,0 +1,48 @@
+from app.models import ImageInfo, Source, SourceType, TagInfo
+from app.services.cleanup import _build_graph
+from app.services.layer_graph import LayerGraph
+
+BASE, APP1, APP2 = "sha256:base", "sha256:app1", "sha256:app2"
+V1, V2 = ("app", "sha256:m1"), ("app", "sha256:m2")
+
+
+def graph() -> LayerGraph:
+    g = LayerGraph()
+    g.add_tag(V1, {BASE: 1000, APP1: 10})
+    g.add_tag(V2, {BASE: 1000, APP2: 20})
+    return g
+
+
+def test_shared_layer_is_freed_only_with_its_last_referrer():
+    g = graph()
+    assert g.freed([V1]) == {V1: 10}
+    assert g.freed([V1, V2]) == {V1: 1010, V2: 20}  # credited once
+
+
+def test_node_is_removed_only_with_all_its_tags():
+    g = graph()
+    g.add_tag(V1, {BASE: 1000, APP1: 10})  # second tag aliasing the same manifest
+    assert g.tag_count(V1) == 2
+    assert g.freed([V1]) == {}
+    assert g.freed([V1, V1]) == {V1: 10}
+
+
+def test_pinned_node_frees_nothing():
+    g = LayerGraph()
+    g.add_tag(V1, {APP1: 10}, pinned=True)
+    assert g.freed([V1]) == {}
+
+
+def test_unknown_manifest_counts_as_one_opaque_blob_per_node():
+    source = Source(id="unknown-sizes", name="reg", type=SourceType.PRIVATE_REGISTRY)
+    image = ImageInfo(name="app", source_id=source.id, tags=[
+        TagInfo(tag="a", digest="sha256:" + "1" * 64, size=300),
+        TagInfo(tag="b", digest="sha256:" + "1" * 64, size=300),
+        TagInfo(tag="c", digest="sha256:" + "2" * 64, size=None),
+    ])
+    g = _build_graph(source, [image])
+    a = ("app", "sha256:" + "1" * 64)
+    c = ("app", "sha256:" + "2" * 64)
+    assert g.freed([a]) == {}  # tag b still points at the manifest
+    assert g.freed([a, a]) == {a: 300}  # reported size, counted once for both tags
+    assert g.freed([c]) == {c: 0}  # no size known at all
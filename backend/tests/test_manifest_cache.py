@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.manifest_cache import ManifestCache
+
+DIGEST = "sha256:" + "ab" * 32
+
+
+def test_spills_well_formed_digests(tmp_path: Path):
+    cache = ManifestCache(8, spill_dir=tmp_path)
+    assert cache._spill_path(("r0", DIGEST)) == tmp_path / "r0" / f"sha256-{'ab' * 32}.json"
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        ("r0", "sha256:../../etc/passwd"),
+        ("r0", "../x:" + "ab" * 32),
+        ("r0", "sha256:abc"),
+        ("r0", "latest"),
+        ("../r0", DIGEST),
+        ("..", DIGEST),
+        ("a/b", DIGEST),
+    ],
+)
+def test_never_spills_unsafe_keys(tmp_path: Path, key):
+    cache = ManifestCache(8, spill_dir=tmp_path)
+    assert cache._spill_path(key) is None
+
+
+def test_auto_sized_cache_holds_a_full_relisting(tmp_path: Path):
+    cache = ManifestCache(4, auto_size=True)
+    cache.fit(10)
+    assert cache.max_entries == 25
+    cache.fit(1)
+    assert cache.max_entries == 4  # never below the configured floor
+
+    fixed = ManifestCache(4)
+    fixed.fit(10)
+    assert fixed.max_entries == 4
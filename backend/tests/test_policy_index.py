@@ -0,0 +1,81 @@
+import fnmatch
+import itertools
+import re
+
+import pytest
+
+from app.models import AppConfig, ImagePolicy
+from app.services.policy_index import PolicyIndex, TagMatcher
+
+KEYS = [
+    "team/api",
+    "team/*",
+    "team/a*",
+    "team/api-?",
+    "*",
+    "svc-[0-9]",
+    "re:(svc|job)-([0-9]+)",
+    "re:(?P<env>dev|prod)/.*",
+    "re:team/.*-(old|legacy)",
+    "re:(a)\\1x",
+    "re:([",  # invalid, ignored
+]
+
+NAMES = [
+    "team/api", "team/api-1", "team/apx", "team/b", "team/x-old", "svc-1", "svc-12",
+    "job-7", "dev/app", "prod/app", "staging/app", "aax", "abx", "other", "",
+]
+
+
+def linear_match(keys: list[str], name: str) -> str | None:
+    """Reference matcher: the documented precedence, one pattern at a time."""
+    if name in keys:
+        return name
+    globs = [(i, k) for i, k in enumerate(keys) if not k.startswith("re:") and set("*?[") & set(k)]
+
+    def literal_prefix(glob: str) -> str:
+        return re.split(r"[*?\[]", glob, maxsplit=1)[0]
+
+    globs.sort(key=lambda g: (-len(literal_prefix(g[1])), -len(g[1]), g[0]))
+    for _, key in globs:
+        if fnmatch.fnmatchcase(name, key):
+            return key
+    for key in keys:
+        if key.startswith("re:"):
+            try:
+                if re.fullmatch(key[3:], name):
+                    return key
+            except re.error:
+                continue
+    return None
+
+
+def index(keys: list[str]) -> PolicyIndex:
+    return PolicyIndex(AppConfig(image_policies={k: ImagePolicy(keep_tags=i) for i, k in enumerate(keys)}))
+
+
+@pytest.mark.parametrize("keys", [KEYS, [k for k in KEYS if k != "*"], [k for k in KEYS if k.startswith("re:")]])
+def test_index_matches_linear_matcher(keys):
+    idx = index(keys)
+    for name in NAMES:
+        assert idx.key_for(name) == linear_match(keys, name), name
+
+
+def test_config_order_decides_between_regexes():
+    keys = ["re:(x)(y)?z.*", "re:x.*", "re:(?:x)(q)?.*"]
+    for order in itertools.permutations(keys):
+        assert index(list(order)).key_for("xz1") == linear_match(list(order), "xz1")
+
+
+def test_combined_regex_maps_groups_back_to_their_key():
+    idx = index(["re:(a)(b)(c)", "re:(d)", "re:e(f)?"])
+    assert idx.key_for("abc") == "re:(a)(b)(c)"
+    assert idx.key_for("d") == "re:(d)"
+    assert idx.key_for("e") == "re:e(f)?"
+    assert idx.resolve("e").keep_tags == 2
+
+
+def test_tag_matcher_kinds():
+    match = TagMatcher(["latest", "v*-stable", r"re:rc-\d+", "semver:>=1.2 <2", "re:(["])
+    assert all(map(match, ["latest", "v1-stable", "rc-3", "1.4.0", "v1.2"]))
+    assert not any(map(match, ["v1", "rc-x", "2.0", "1.1", "20240101"]))
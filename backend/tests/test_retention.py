@@ -0,0 +1,124 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import AppConfig, ImageInfo, ImagePolicy, TagInfo
+from app.services.cleanup import evaluate_image
+from app.services.retention import TagKey, retained, retention_for
+from app.utils.semver import parse_range, parse_version
+
+NOW = datetime(2026, 1, 31, tzinfo=timezone.utc)
+DAY = 86400
+
+
+def tag(name: str, age_days: float, **kw) -> TagInfo:
+    return TagInfo(tag=name, created=(NOW - timedelta(days=age_days)).isoformat(), **kw)
+
+
+def keep(tags: list[TagInfo], cfg: AppConfig | None = None, **policy) -> set[str]:
+    retention = retention_for(ImagePolicy(**policy), cfg or AppConfig())
+    reasons, _ = retained([TagKey.of(t) for t in tags], retention, NOW.timestamp())
+    return set(reasons)
+
+
+TAGS = [
+    tag("2.1.0", 1),
+    tag("2.0.0", 10),
+    tag("1.9.0", 40),
+    tag("1.8.0", 50),
+    tag("latest", 0.5),
+]
+
+
+def test_keep_newest_capped_by_age():
+    assert keep(TAGS, keep_tags=4, delete_older_than="30d") == {"latest", "2.1.0", "2.0.0"}
+
+
+def test_semver_capped_by_age():
+    assert keep(TAGS, keep_tags=0, keep_semver=3, delete_older_than="30d") == {"2.1.0", "2.0.0"}
+
+
+def test_per_major_capped_by_age():
+    kept = keep(TAGS, keep_tags=0, keep_per_major=1, delete_older_than="45d")
+    assert kept == {"2.1.0", "1.9.0"}
+    assert keep(TAGS, keep_tags=0, keep_per_major=1, delete_older_than="30d") == {"2.1.0"}
+
+
+def test_age_alone_keeps_nothing_extra():
+    assert keep(TAGS, keep_tags=0, delete_older_than="30d") == set()
+
+
+def test_invalid_duration_deletes_nothing_by_age():
+    assert keep(TAGS, keep_tags=5, delete_older_than="soon") == {t.tag for t in TAGS}
+
+
+def test_valid_until_is_next_survivor_to_expire():
+    retention = retention_for(ImagePolicy(keep_tags=2, delete_older_than="30d"), AppConfig())
+    _, valid_until = retained([TagKey.of(t) for t in TAGS], retention, NOW.timestamp())
+    assert valid_until == pytest.approx(NOW.timestamp() + 29 * DAY)
+
+    retention = retention_for(ImagePolicy(keep_tags=2), AppConfig())
+    _, valid_until = retained([TagKey.of(t) for t in TAGS], retention, NOW.timestamp())
+    assert valid_until == math.inf
+
+
+def test_protected_and_running_outlive_max_age():
+    cfg = AppConfig(image_policies={
+        "app": ImagePolicy(keep_tags=5, protected_tags=["1.8.0"], delete_older_than="30d"),
+    })
+    img = ImageInfo(name="app", tags=[*TAGS[:2], tag("1.9.0", 40, is_running=True), TAGS[3]])
+    decision = evaluate_image(img, cfg, NOW.timestamp())
+    assert set(decision.tags_to_keep) == {"2.1.0", "2.0.0", "1.9.0", "1.8.0"}
+    assert decision.reason_kept["1.8.0"] == "protected_tag"
+    assert decision.reason_kept["1.9.0"] == "running_container"
+    assert decision.tags_to_delete == []
+
+
+@pytest.mark.parametrize("value", ["20240101", "2024-01-15", "2", "latest", "abc123"])
+def test_not_versions(value):
+    assert parse_version(value) is None
+
+
+def test_versions_compare():
+    assert parse_version("1.4") < parse_version("v1.4.1") < parse_version("1.5.0-rc.1") < parse_version("1.5")
+
+
+@pytest.mark.parametrize(
+    "spec, inside, outside",
+    [
+        (">= 1.0, < 2", ["1.0", "1.9.9"], ["0.9", "2.0"]),
+        ("<2", ["1.9"], ["2.0", "2.1"]),
+        ("~1", ["1.0", "1.9"], ["2.0"]),
+        ("^0", ["0.5"], ["1.0"]),
+        ("<=1", ["1.9"], ["2.0"]),
+        (">1", ["2.0"], ["1.9"]),
+        ("^1.4", ["1.4", "1.9"], ["1.3", "2.0"]),
+    ],
+)
+def test_ranges(spec, inside, outside):
+    in_range = parse_range(spec)
+    assert all(in_range(parse_version(v)) for v in inside)
+    assert not any(in_range(parse_version(v)) for v in outside)
+
+
+@pytest.mark.parametrize("spec", ["", ">=", ">=2024-01-15", "banana"])
+def test_invalid_ranges(spec):
+    with pytest.raises(ValueError):
+        parse_range(spec)
+
+
+def test_unknown_created_never_expires():
+    tags = [
+        TagInfo(tag="v1"),
+        TagInfo(tag="v2", created="not a time"),
+        tag("new", 1),
+        tag("old", 40),
+    ]
+    assert keep(tags, keep_tags=5, delete_older_than="30d") == {"v1", "v2", "new"}
+    # Without a keep rule choosing them they are still deleted
+    assert keep(tags, keep_tags=0, delete_older_than="30d") == set()
+
+    retention = retention_for(ImagePolicy(keep_tags=5, delete_older_than="30d"), AppConfig())
+    _, valid_until = retained([TagKey.of(t) for t in tags], retention, NOW.timestamp())
+    assert valid_until == pytest.approx(NOW.timestamp() + 29 * DAY)
@@ -2,7 +2,7 @@
 
 const BASE_URL = import.meta.env.VITE_API_URL || '';
 
-async function request(path, options = {}) {
+async function send(path, options = {}) {
     const url = `${BASE_URL}${path}`;
 
     // Auto-inject Authorization header if token exists
@@ -34,10 +34,56 @@ async function request(path, options = {}) {
         throw new Error(text || `${res.status} Error`);
     }
 
+    return res;
+}
+
+async function request(path, options = {}) {
+    const res = await send(path, options);
     if (res.status === 204) return null;
     return res.json();
 }
 
+/**
+ * Stream an NDJSON endpoint, calling onItem for each object as it arrives.
+ * Resolves with every item once the stream ends.
+ */
+async function streamNdjson(path, onItem) {
+    const token = localStorage.getItem('dim_token');
+    const headers = { Accept: 'application/x-ndjson' };
+    if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+    }
+
+    const res = await fetch(`${BASE_URL}${path}`, { headers });
+    if (res.status === 401) {
+        localStorage.removeItem('dim_token');
+        window.location.href = '/login';
+    }
+    if (!res.ok || !res.body) {
+        throw new Error(`${res.status} Error`);
+    }
+
+    const items = [];
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    const emit = (line) => {
+        if (!line.trim()) return;
+        const item = JSON.parse(line);
+        items.push(item);
+        onItem(item);
+    };
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(emit);
+    }
+    emit(buffer);
+    return items;
+}
+
 // Auth
 export const login = (username, password) => {
     const formData = new URLSearchParams();
@@ -61,8 +107,25 @@ export const deleteSource = (id) => request(`/api/sources/${id}`, { method: 'DEL
 export const testSource = (id) => request(`/api/sources/${id}/test`, { method: 'POST' });
 
 // Images
-export const getAllImages = () => request('/api/images');
-export const getImagesBySource = (sourceId) => request(`/api/images/by-source/${sourceId}`);
+// Pass onImage to render progressively: images are streamed as each source/repo resolves.
+export const getAllImages = (onImage = null) => (
+    onImage ? streamNdjson('/api/images?stream=ndjson', onImage) : request('/api/images')
+);
+// Server-side filtered/sorted page: { items, next_cursor, total, errors }
+export const getImagesPage = (params = {}) => {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+        if (value === null || value === undefined || value === '') return;
+        (Array.isArray(value) ? value : [value]).forEach(v => query.append(key, v));
+    });
+    if (!query.has('limit')) query.set('limit', '50');
+    return request(`/api/images?${query}`);
+};
+export const getImagesBySource = (sourceId, onImage = null) => (
+    onImage
+        ? streamNdjson(`/api/images/by-source/${sourceId}?stream=ndjson`, onImage)
+        : request(`/api/images/by-source/${sourceId}`)
+);
 export const deleteImageTag = (sourceId, imageName, tag, force = false) => request(`/api/images/${sourceId}/${encodeURIComponent(imageName)}/tags/${encodeURIComponent(tag)}?force=${force}`, { method: 'DELETE' });
 
 // Policies
@@ -73,8 +136,37 @@ export const updateImagePolicy = (name, data) => request(`/api/policies/${encode
 export const deleteImagePolicy = (name) => request(`/api/policies/${encodeURIComponent(name)}`, { method: 'DELETE' });
 
 // Cleanup
-export const previewCleanup = (sourceIds = null) => request('/api/cleanup/preview', { method: 'POST', body: JSON.stringify({ source_ids: sourceIds }) });
-export const executeCleanup = (sourceIds = null) => request('/api/cleanup/execute', { method: 'POST', body: JSON.stringify({ source_ids: sourceIds }) });
+/** Preview a cleanup; planId executes exactly this preview (see executeCleanup). */
+export async function previewCleanup(sourceIds = null) {
+    const res = await send('/api/cleanup/preview', { method: 'POST', body: JSON.stringify({ source_ids: sourceIds }) });
+    return { items: await res.json(), planId: res.headers.get('X-Cleanup-Plan') };
+}
+export const getCleanupJob = (id) => request(`/api/cleanup/jobs/${id}`);
+export const cancelCleanupJob = (id) => request(`/api/cleanup/jobs/${id}/cancel`, { method: 'POST' });
+
+const JOB_POLL_MS = 1000;
+const FINISHED_JOB_STATES = ['succeeded', 'failed', 'cancelled'];
+
+/**
+ * Start a cleanup job and poll it until it finishes, reporting live
+ * counters through onProgress. Resolves with the final job plus all details.
+ */
+export async function executeCleanup(sourceIds = null, onProgress = null, planId = null) {
+    let job = await request('/api/cleanup/execute', { method: 'POST', body: JSON.stringify({ source_ids: sourceIds, plan_id: planId }) });
+    while (!FINISHED_JOB_STATES.includes(job.state)) {
+        if (onProgress) onProgress(job);
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+        job = await getCleanupJob(job.id);
+    }
+    const details = [];
+    let offset = 0;
+    while (offset !== null) {
+        const page = await request(`/api/cleanup/jobs/${job.id}/details?offset=${offset}`);
+        details.push(...page.items);
+        offset = page.next_offset;
+    }
+    return { ...job, details };
+}
 
 // Health
 export const healthCheck = () => request('/api/health');
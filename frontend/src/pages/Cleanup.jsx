@@ -1,20 +1,24 @@
 import { useState } from 'react';
-import { previewCleanup, executeCleanup } from '../api/client';
+import { previewCleanup, executeCleanup, cancelCleanupJob } from '../api/client';
 import { useToast } from '../components/Toast';
 
 export default function Cleanup() {
     const toast = useToast();
     const [preview, setPreview] = useState(null);
+    const [planId, setPlanId] = useState(null);
     const [loading, setLoading] = useState(false);
     const [executing, setExecuting] = useState(false);
     const [result, setResult] = useState(null);
+    const [jobId, setJobId] = useState(null);
+    const [cancelling, setCancelling] = useState(false);
 
     const handlePreview = async () => {
         setLoading(true);
         setResult(null);
         try {
-            const data = await previewCleanup();
+            const { items: data, planId: id } = await previewCleanup();
             setPreview(data);
+            setPlanId(id);
             if (data.length === 0) {
                 toast('No tags to clean up', 'info');
             }
@@ -28,14 +32,40 @@ export default function Cleanup() {
         if (!confirm('⚠️ This action is IRREVERSIBLE. Are you sure you want to delete these tags?')) return;
         setExecuting(true);
         try {
-            const res = await executeCleanup();
+            const res = await executeCleanup(null, (job) => {
+                setJobId(job.id);
+                setResult(job);
+            }, planId);
             setResult(res);
             setPreview(null);
-            toast(`Cleanup complete: ${res.total_deleted} deleted, ${res.total_failed} failed`, res.total_failed > 0 ? 'error' : 'success');
+            setPlanId(null);
+            if (res.state === 'failed') {
+                toast(`Cleanup failed: ${res.error}`, 'error');
+            } else {
+                toast(`Cleanup ${res.state === 'cancelled' ? 'cancelled' : 'complete'}: ${res.total_deleted} deleted, ${res.total_failed} failed`, res.total_failed > 0 ? 'error' : 'success');
+            }
+            const skipped = Object.keys(res.source_errors || {});
+            if (skipped.length > 0) {
+                toast(`Skipped sources that could not be relisted: ${skipped.join(', ')}`, 'error');
+            }
         } catch (e) {
             toast(e.message, 'error');
         }
         setExecuting(false);
+        setJobId(null);
+        setCancelling(false);
+    };
+
+    const handleCancel = async () => {
+        if (!jobId) return;
+        setCancelling(true);
+        try {
+            await cancelCleanupJob(jobId);
+            toast('Cancelling cleanup – deletions already running will finish', 'info');
+        } catch (e) {
+            toast(e.message, 'error');
+            setCancelling(false);
+        }
     };
 
     const sourceTypeLabel = (type) => {
@@ -69,6 +99,11 @@ export default function Cleanup() {
                         {executing ? '⏳ ' : '🗑️ '}Execute Cleanup
                     </button>
                 )}
+                {executing && jobId && (
+                    <button className="btn btn-secondary" onClick={handleCancel} disabled={cancelling}>
+                        {cancelling ? '⏳ ' : '⏹️ '}Cancel
+                    </button>
+                )}
             </div>
 
             {/* Warning */}
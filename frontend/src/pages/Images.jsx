@@ -1,9 +1,16 @@
-import { useState, useEffect } from 'react';
-import { getAllImages, getSources, deleteImageTag, getImagePolicy, updateImagePolicy, getPolicies } from '../api/client';
+import { useState, useEffect, useRef } from 'react';
+import { getImagesPage, getSources, deleteImageTag, getImagePolicy, updateImagePolicy, getPolicies } from '../api/client';
 import { useToast } from '../components/Toast';
 
+const PAGE_SIZE = 50;
+
 export default function Images() {
     const [images, setImages] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [total, setTotal] = useState(0);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [imagePolicies, setImagePolicies] = useState({});
+    const latestLoad = useRef(0);
     const [sources, setSources] = useState([]);
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState('all');
@@ -13,23 +20,57 @@ export default function Images() {
 
     const toast = useToast();
 
+    // Filtering happens on the server; only the pages shown are held here
+    const pageParams = (cursor) => ({
+        name: search ? `*${search}*` : null,
+        source_type: filter !== 'all' ? filter : null,
+        limit: PAGE_SIZE,
+        cursor,
+    });
+
+    const withProtection = (items, policies) => items.map(img => ({
+        ...img,
+        is_protected: policies[img.name]?.exclude_from_cleanup || false
+    }));
+
     const load = async () => {
+        const id = ++latestLoad.current;
         setLoading(true);
         try {
-            const [imgs, srcs, pols] = await Promise.all([getAllImages(), getSources(), getPolicies()]);
-            const imagePolicies = pols?.image_policies || {};
-            setImages((imgs || []).filter(i => !i.error).map(img => ({
-                ...img,
-                is_protected: imagePolicies[img.name]?.exclude_from_cleanup || false
-            })));
+            const [srcs, pols, page] = await Promise.all([getSources(), getPolicies(), getImagesPage(pageParams(null))]);
+            if (id !== latestLoad.current) return; // superseded by a newer search
+            const policies = pols?.image_policies || {};
             setSources(srcs || []);
+            setImagePolicies(policies);
+            setImages(withProtection(page.items, policies));
+            setNextCursor(page.next_cursor);
+            setTotal(page.total);
+            setExpanded(null);
         } catch { /* */ }
-        setLoading(false);
+        if (id === latestLoad.current) setLoading(false);
+    };
+
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        const id = latestLoad.current;
+        setLoadingMore(true);
+        try {
+            const page = await getImagesPage(pageParams(nextCursor));
+            if (id === latestLoad.current) {
+                setImages(prev => prev.concat(withProtection(page.items, imagePolicies)));
+                setNextCursor(page.next_cursor);
+                setTotal(page.total);
+            }
+        } catch (err) {
+            toast(`Failed to load more images: ${err.message}`, 'error');
+        }
+        setLoadingMore(false);
     };
 
     useEffect(() => {
-        load();
-    }, []);
+        const timer = setTimeout(load, search ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [search, filter]);
 
     const handleDeleteTag = async (sourceId, imageName, tagParam, force = false) => {
         if (!confirm(`Are you sure you want to delete ${imageName}:${tagParam}?`)) return;
@@ -147,12 +188,6 @@ export default function Images() {
         return `${mb.toFixed(1)} MB`;
     };
 
-    const filtered = images.filter(img => {
-        if (filter !== 'all' && img.source_type !== filter) return false;
-        if (search && !img.name.toLowerCase().includes(search.toLowerCase())) return false;
-        return true;
-    });
-
     return (
         <div>
             <div className="page-header">
@@ -184,15 +219,15 @@ export default function Images() {
 
             {loading ? (
                 <div className="loading-overlay"><div className="spinner"></div> Loading images...</div>
-            ) : filtered.length === 0 ? (
+            ) : images.length === 0 ? (
                 <div className="card">
                     <div className="empty-state">
                         <div className="empty-state-icon">🐳</div>
                         <div className="empty-state-title">No images found</div>
                         <div className="empty-state-desc">
-                            {images.length === 0
-                                ? 'Connect a source and make sure it has images.'
-                                : 'No images match your current filter.'}
+                            {search || filter !== 'all'
+                                ? 'No images match your current filter.'
+                                : 'Connect a source and make sure it has images.'}
                         </div>
                     </div>
                 </div>
@@ -211,7 +246,7 @@ export default function Images() {
                                 </tr>
                             </thead>
                             <tbody>
-                                {filtered.map((img, idx) => (
+                                {images.map((img, idx) => (
                                     <>
                                         <tr key={idx} style={{ cursor: 'pointer' }} onClick={() => setExpanded(expanded === idx ? null : idx)}>
                                             <td style={{ width: 30 }}>{expanded === idx ? '▼' : '▶'}</td>
@@ -306,6 +341,13 @@ export default function Images() {
                             </tbody>
                         </table>
                     </div>
+                    {nextCursor && (
+                        <div style={{ display: 'flex', justifyContent: 'center', padding: 16 }}>
+                            <button className="btn btn-secondary" onClick={loadMore} disabled={loadingMore}>
+                                {loadingMore ? '⏳ ' : ''}Load more ({images.length} of {total})
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
         </div>
@@ -10,7 +10,7 @@ export default function Policies() {
     const [loading, setLoading] = useState(true);
     const [showModal, setShowModal] = useState(false);
     const [editName, setEditName] = useState('');
-    const [form, setForm] = useState({ keep_tags: '', exclude_from_cleanup: false, protected_tags: [] });
+    const [form, setForm] = useState({ keep_tags: '', exclude_from_cleanup: false, protected_tags: [], keep_semver: '', keep_per_major: '', delete_older_than: '' });
 
     const load = async () => {
         setLoading(true);
@@ -37,6 +37,12 @@ export default function Policies() {
         }
     };
 
+    const extraRules = (pol) => [
+        pol.keep_semver && `top ${pol.keep_semver} versions`,
+        pol.keep_per_major && `top ${pol.keep_per_major} per major`,
+        pol.delete_older_than && `delete older than ${pol.delete_older_than}`,
+    ].filter(Boolean).join(' · ');
+
     const openEdit = (name = '') => {
         const existing = policies[name] || {};
         setEditName(name);
@@ -44,13 +50,16 @@ export default function Policies() {
             keep_tags: existing.keep_tags ?? '',
             exclude_from_cleanup: existing.exclude_from_cleanup || false,
             protected_tags: existing.protected_tags || [],
+            keep_semver: existing.keep_semver ?? '',
+            keep_per_major: existing.keep_per_major ?? '',
+            delete_older_than: existing.delete_older_than ?? '',
         });
         setShowModal(true);
     };
 
     const openCreate = () => {
         setEditName('');
-        setForm({ keep_tags: '', exclude_from_cleanup: false, protected_tags: [] });
+        setForm({ keep_tags: '', exclude_from_cleanup: false, protected_tags: [], keep_semver: '', keep_per_major: '', delete_older_than: '' });
         setShowModal(true);
     };
 
@@ -63,6 +72,10 @@ export default function Policies() {
                 keep_tags: form.keep_tags !== '' ? Number(form.keep_tags) : null,
                 exclude_from_cleanup: form.exclude_from_cleanup,
                 protected_tags: protectedList,
+                // 0 / '' clear these rules
+                keep_semver: form.keep_semver !== '' ? Number(form.keep_semver) : 0,
+                keep_per_major: form.keep_per_major !== '' ? Number(form.keep_per_major) : 0,
+                delete_older_than: form.delete_older_than.trim(),
             });
             toast('Policy saved', 'success');
             setShowModal(false);
@@ -168,6 +181,7 @@ export default function Policies() {
                                     <tr>
                                         <th>Image</th>
                                         <th>Keep Tags</th>
+                                        <th>Extra Rules</th>
                                         <th>Exclude</th>
                                         <th>Protected Tags</th>
                                         <th style={{ textAlign: 'right' }}>Actions</th>
@@ -178,6 +192,7 @@ export default function Policies() {
                                         <tr key={name}>
                                             <td style={{ fontWeight: 600, fontFamily: 'monospace' }}>{name}</td>
                                             <td>{pol.keep_tags ?? <span style={{ color: 'var(--text-muted)' }}>default ({defaultKeep})</span>}</td>
+                                            <td>{extraRules(pol) || <span style={{ color: 'var(--text-muted)' }}>-</span>}</td>
                                             <td>
                                                 <span className={`badge ${pol.exclude_from_cleanup ? 'badge-warning' : 'badge-neutral'}`}>
                                                     {pol.exclude_from_cleanup ? 'Excluded' : 'No'}
@@ -228,6 +243,37 @@ export default function Policies() {
                                     placeholder={`Default: ${defaultKeep}`}
                                 />
                             </div>
+                            <div className="form-group">
+                                <label className="form-label">Also Keep Highest Versions (semver)</label>
+                                <input
+                                    className="form-input"
+                                    type="number"
+                                    min={0}
+                                    value={form.keep_semver}
+                                    onChange={e => setForm(f => ({ ...f, keep_semver: e.target.value }))}
+                                    placeholder="e.g. 3"
+                                />
+                            </div>
+                            <div className="form-group">
+                                <label className="form-label">Also Keep Highest Versions per Major</label>
+                                <input
+                                    className="form-input"
+                                    type="number"
+                                    min={0}
+                                    value={form.keep_per_major}
+                                    onChange={e => setForm(f => ({ ...f, keep_per_major: e.target.value }))}
+                                    placeholder="e.g. 1"
+                                />
+                            </div>
+                            <div className="form-group">
+                                <label className="form-label">Delete Tags Older Than</label>
+                                <input
+                                    className="form-input"
+                                    value={form.delete_older_than}
+                                    onChange={e => setForm(f => ({ ...f, delete_older_than: e.target.value }))}
+                                    placeholder="e.g. 30d, 12h, 2w"
+                                />
+                            </div>
                             <div className="form-group">
                                 <label className="form-checkbox">
                                     <input type="checkbox" checked={form.exclude_from_cleanup} onChange={e => setForm(f => ({ ...f, exclude_from_cleanup: e.target.checked }))} />